@@ -0,0 +1,137 @@
+"""Benchmark of the cold start of lambda_create_shot.
+
+Measures, each in fresh interpreters as a new Lambda container would:
+- the cold import time of every module on the import path of the handler, and its resident memory,
+- the first event handled after the import, against moto, then the following (warm) events.
+
+The time to the first response of a cold container is the cold import of the handler plus its
+first event. Results are medians over --runs interpreters, written as JSON with --output.
+
+Usage: PYTHONPATH=. python -m benchmarks.bench_cold_start [--runs 10] [--events 20] [--output cold_start.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.results import write_results
+
+# From the dependencies to the handler, each import includes the ones it depends on
+MODULES = [
+    "boto3",
+    "pydantic",
+    "src.constants.constants",
+    "src.model.base.base_modelling",
+    "src.model.business.business_modelling",
+    "src.model.orm.orm_modelling",
+    "src.model.orm.dynamodb_codec",
+    "src.services.aws_clients",
+    "src.services.tikee_shot_service",
+    "src.services.stitcher_dispatcher",
+    "src.lambdas.lambda_create_shot.lambda_create_shot",
+]
+
+IMPORT = """
+import json, resource, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+FIRST_EVENT = """
+import json, time
+import boto3
+from moto import mock_aws
+
+def event(photo_index):
+    return {{"body": json.dumps({{
+        "s3_key": f"12345678-1234-5678-1234-567812345678/12345678/left/my_photo{{photo_index}}.jpg",
+        "resolution": "1920x1080",
+        "file_size": 1024,
+        "shooting_date": "2024-01-01T12:00:00",
+    }})}}
+
+with mock_aws():
+    import src.constants.constants as constants
+    boto3.client("dynamodb", constants.AWS_REGION).create_table(
+        TableName=constants.DDB_TABLE_NAME,
+        KeySchema=constants.DDB_KEYS,
+        AttributeDefinitions=constants.DDB_ATTRIBUTE,
+        GlobalSecondaryIndexes=constants.DDB_GLOBAL_SECONDARY_INDEXES,
+        LocalSecondaryIndexes=constants.DDB_LOCAL_SECONDARY_INDEXES,
+        BillingMode="PAY_PER_REQUEST",
+    )
+    from src.lambdas.lambda_create_shot.lambda_create_shot import lambda_handler
+    durations = []
+    for photo_index in range({events}):
+        start = time.perf_counter()
+        response = lambda_handler(event(photo_index), None)
+        durations.append(time.perf_counter() - start)
+        assert response["statusCode"] == 201, response
+print(json.dumps(durations))
+"""
+
+
+def run_python(code: str) -> str:
+    """Run code in a fresh interpreter, with dummy AWS credentials, and return its output"""
+    env = dict(
+        os.environ,
+        AWS_ACCESS_KEY_ID="testing",
+        AWS_SECRET_ACCESS_KEY="testing",
+        AWS_SESSION_TOKEN="testing",
+        DDB_TABLE_NAME=os.environ.get("DDB_TABLE_NAME") or "TikeeShots",
+    )
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, check=True, text=True, env=env).stdout
+
+
+def measure_import(module: str, runs: int) -> dict:
+    """Return the median cold import time and resident memory of a module"""
+    measures = [json.loads(run_python(IMPORT.format(module=module))) for _ in range(runs)]
+    return {
+        "import_ms": statistics.median(measure["seconds"] for measure in measures) * 1e3,
+        "max_rss_mb": statistics.median(measure["max_rss_kb"] for measure in measures) / 1024,
+    }
+
+
+def measure_events(runs: int, events: int) -> dict:
+    """Return the median duration of the first event handled after the import, and of the following ones"""
+    durations = [json.loads(run_python(FIRST_EVENT.format(events=events))) for _ in range(runs)]
+    return {
+        "first_event_ms": statistics.median(run[0] for run in durations) * 1e3,
+        "warm_event_ms": statistics.median(duration for run in durations for duration in run[1:]) * 1e3,
+    }
+
+
+def report(label: str, milliseconds: float, megabytes: float | None = None) -> None:
+    """Print a measure"""
+    memory = f" {megabytes:7.1f} MB" if megabytes is not None else ""
+    print(f"{label:<60}: {milliseconds:8.1f} ms{memory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--output", help="JSON file to write the results to")
+    args = parser.parse_args()
+
+    results = {"imports": {}}
+    for module in MODULES:
+        results["imports"][module] = measure_import(module, args.runs)
+        report(f"import {module}", results["imports"][module]["import_ms"], results["imports"][module]["max_rss_mb"])
+    results["handler"] = measure_events(args.runs, args.events)
+    results["handler"]["time_to_first_response_ms"] = (
+        results["imports"][MODULES[-1]]["import_ms"] + results["handler"]["first_event_ms"]
+    )
+    report("first event after import", results["handler"]["first_event_ms"])
+    report("warm event", results["handler"]["warm_event_ms"])
+    report("time to first response (cold import + first event)", results["handler"]["time_to_first_response_ms"])
+    if args.output:
+        write_results(args.output, "cold_start", results)
+
+
+if __name__ == "__main__":
+    main()
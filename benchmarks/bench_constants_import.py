@@ -0,0 +1,47 @@
+"""Benchmark of the import of src.constants.constants on a cold interpreter.
+
+Compares the import as a Lambda performs it, which no longer parses the CloudFormation template,
+to the import followed by the access of DDB_KEYS, which loads PyYAML and parses the template as
+every import did before. Each measure runs in a fresh interpreter, as a cold start would.
+
+Usage: PYTHONPATH=. python -m benchmarks.bench_constants_import [--runs 20]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+MEASURE = """
+import time
+start = time.perf_counter()
+import src.constants.constants as constants
+{access}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(access: str, runs: int) -> float:
+    """Return the median duration, in seconds, of the import followed by access in fresh interpreters"""
+    durations = [
+        float(subprocess.run(
+            [sys.executable, "-c", MEASURE.format(access=access)], capture_output=True, check=True, text=True
+        ).stdout)
+        for _ in range(runs)
+    ]
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    lazy = measure("", args.runs)
+    eager = measure("constants.DDB_KEYS", args.runs)
+    print(f"import only (Lambda cold start)     {lazy * 1e3:8.2f} ms")
+    print(f"import and DDB_KEYS (former import) {eager * 1e3:8.2f} ms")
+    print(f"saved on cold start                 {(eager - lazy) * 1e3:8.2f} ms ({eager / lazy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
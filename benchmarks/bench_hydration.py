@@ -0,0 +1,77 @@
+"""Benchmark of the hydration of ORMTikeeShot from DynamoDB items.
+
+Decodes synthetic items, in low-level client format, with the former path (boto3's
+TypeDeserializer then ORMTikeeShot(**item)) and with the strict and trusted modes of the codec.
+
+Usage: PYTHONPATH=. python -m benchmarks.bench_hydration [--number 100000]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from uuid import UUID
+
+from boto3.dynamodb.types import TypeDeserializer
+
+from src.model.base.base_modelling import TikeeShotSide
+from src.model.orm.dynamodb_codec import ORM_TIKEE_SHOT_CODEC
+from src.model.orm.key_codec import encode_pk, encode_sk
+from src.model.orm.orm_modelling import ORMTikeeShot
+
+
+def build_items(count: int) -> list[dict]:
+    """Build the items of a camera listing: one camera, sequences of 1000 pairs"""
+    camera_id = UUID("123e4567-e89b-12d3-a456-426614174000")
+    items = []
+    for index in range(count):
+        sequence = str(100000 + index // 2000)
+        side = (TikeeShotSide.LEFT, TikeeShotSide.RIGHT)[index % 2]
+        photo_index = index % 2000 // 2
+        items.append(ORM_TIKEE_SHOT_CODEC.encode(ORMTikeeShot(
+            PK=encode_pk(camera_id, sequence),
+            SK=encode_sk(photo_index, side),
+            camera_id=camera_id,
+            sequence=sequence,
+            side=side,
+            photo_name=f"my_photo{photo_index}.jpg",
+            photo_index=photo_index,
+            resolution="1920x1080",
+            file_size=4_000_000 + index,
+            shooting_date=datetime(2024, 1, 1) + timedelta(seconds=index),
+            gps_latitude=Decimal("48.858370"),
+            gps_longitude=Decimal("2.294481"),
+            gps_altitude=Decimal("35"),
+        )))
+    return items
+
+
+def legacy_hydrate(deserializer: TypeDeserializer, item: dict) -> ORMTikeeShot:
+    """Hydration as the service performed it before the codec"""
+    return ORMTikeeShot(**{key: deserializer.deserialize(value) for key, value in item.items()})
+
+
+def measure(label: str, function, items: list[dict], reference: float | None = None) -> float:
+    """Print and return the number of items hydrated per second by function"""
+    start = time.perf_counter()
+    for item in items:
+        function(item)
+    items_per_second = len(items) / (time.perf_counter() - start)
+    speedup = f" ({items_per_second / reference:.2f}x)" if reference else ""
+    print(f"{label:<24}: {items_per_second:>10,.0f} items/s{speedup}")
+    return items_per_second
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=100_000, help="number of synthetic items")
+    args = parser.parse_args()
+
+    items = build_items(args.number)
+    deserializer = TypeDeserializer()
+    legacy = measure("TypeDeserializer + model", lambda item: legacy_hydrate(deserializer, item), items)
+    measure("codec strict", ORM_TIKEE_SHOT_CODEC.decode, items, legacy)
+    measure("codec trusted", lambda item: ORM_TIKEE_SHOT_CODEC.decode(item, trusted=True), items, legacy)
+
+
+if __name__ == "__main__":
+    main()
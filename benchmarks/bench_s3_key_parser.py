@@ -0,0 +1,80 @@
+"""Benchmark of the s3_key validation of NewTikeeShot.
+
+Compares the former split/UUID/uncompiled regex validation to parse_s3_key, and reports the
+number of NewTikeeShot validations per second.
+
+Usage: PYTHONPATH=. python -m benchmarks.bench_s3_key_parser [--number 100000]
+"""
+import argparse
+import re
+import timeit
+from datetime import datetime
+from uuid import UUID
+
+from src.model.base.base_modelling import TikeeShotSide
+from src.model.business.business_modelling import NewTikeeShot
+from src.model.business.s3_key_parser import parse_s3_key
+
+CAMERA_IDS = [
+    "123e4567-e89b-12d3-a456-426614174000",
+    "12345678-1234-5678-1234-567812345678",
+]
+
+
+def legacy_parse_s3_key(s3_key: str):
+    """s3_key validation as NewTikeeShot performed it before parse_s3_key"""
+    parts = s3_key.strip().split('/')
+    if len(parts) != 4:
+        raise ValueError('s3_key must have 4 parts: <uuid>/<sequence>/<side>/<filename>')
+    parts = s3_key.strip().split('/')
+    camera_id_str, sequence, side, filename = parts
+    camera_id = UUID(camera_id_str)
+    if not re.fullmatch(r'\d+', sequence):
+        raise ValueError("Sequence must be digits")
+    side = TikeeShotSide(side).value
+    match = re.fullmatch(r'my_photo(?:(\d+))?\.jpg', filename)
+    if not match:
+        raise ValueError("Invalid filename")
+    return camera_id, sequence, side, filename, int(match.group(1)) if match.group(1) else None
+
+
+def build_s3_keys(count: int) -> list[str]:
+    """Build s3 keys of a timelapse: few cameras, many photo indexes"""
+    return [
+        f"{CAMERA_IDS[index % len(CAMERA_IDS)]}/123456/{('left', 'right')[index % 2]}/my_photo{index}.jpg"
+        for index in range(count)
+    ]
+
+
+def rate(function, s3_keys: list[str], repeat: int) -> float:
+    """Return the best number of calls per second of function over s3_keys"""
+    best = min(timeit.repeat(lambda: [function(s3_key) for s3_key in s3_keys], number=1, repeat=repeat))
+    return len(s3_keys) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=100_000, help="number of s3 keys parsed per run")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs, the best one is reported")
+    args = parser.parse_args()
+
+    s3_keys = build_s3_keys(args.number)
+    legacy = rate(legacy_parse_s3_key, s3_keys, args.repeat)
+    compiled = rate(parse_s3_key, s3_keys, args.repeat)
+    print(f"legacy s3_key validation : {legacy:>12,.0f} keys/s")
+    print(f"parse_s3_key             : {compiled:>12,.0f} keys/s ({compiled / legacy:.2f}x)")
+
+    def new_tikee_shot(s3_key):
+        return NewTikeeShot(
+            s3_key=s3_key,
+            resolution="1920x1080",
+            file_size=1024,
+            shooting_date=datetime(2024, 1, 1, 12, 0),
+        )
+
+    shots = rate(new_tikee_shot, s3_keys[: max(1, args.number // 10)], args.repeat)
+    print(f"NewTikeeShot validation  : {shots:>12,.0f} shots/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Micro-benchmark suite of the shot model and service hot paths.
+
+Times each operation at several batch sizes, inputs being built before the timer starts, and
+reports the best of --repeat runs in operations per second, with the peak memory allocated per
+operation (tracemalloc). lambda_handler is called end to end against moto, on new left shots.
+
+Results can be written as JSON with --output, and compared with --baseline to the ones of a
+previous run: operations slower by more than --threshold are reported as regressions.
+
+Usage: set -a; . ./.env; set +a; PYTHONPATH=. python -m benchmarks.bench_suite \
+    [--sizes 1 100 1000] [--repeat 7] [--only to_orm ...] [--output suite.json] \
+    [--baseline suite.json] [--threshold 0.1] [--fail-on-regression]
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, NamedTuple
+
+import boto3
+from moto import mock_aws
+
+import src.constants.constants as constants
+from src.lambdas.lambda_create_shot.lambda_create_shot import get_photo_with_side, is_same_resolution, lambda_handler
+from src.model.base.base_modelling import TikeeShotSide
+from src.model.business.business_modelling import NewTikeeShot
+from src.model.orm.dynamodb_codec import ORM_TIKEE_SHOT_CODEC
+from src.model.orm.orm_modelling import ORMTikeeShot
+from src.services.tikee_shot_service import TikeeShotServices
+from benchmarks.results import compare_results, load_results, write_results
+
+CAMERA_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+# Photo indexes of the shots sent to lambda_handler, new ones for every run
+_photo_indexes = itertools.count(1)
+
+
+class Benchmark(NamedTuple):
+    """An operation timed on batches: setup builds the inputs of a batch, run processes them"""
+    setup: Callable[[int], Any]
+    run: Callable[[Any], Any]
+    max_size: int | None = None
+
+
+def build_bodies(size: int, first_photo_index: int = 0) -> list[dict]:
+    """Build the bodies of size shots, left and right sides of consecutive photos"""
+    return [
+        {
+            "s3_key": f"{CAMERA_ID}/123456/{('left', 'right')[index % 2]}/my_photo{first_photo_index + index // 2}.jpg",
+            "resolution": "1920x1080",
+            "file_size": 4_000_000 + index,
+            "shooting_date": "2024-01-01T12:00:00",
+            "metadata": {"gps_latitude": "48.858370", "gps_longitude": "2.294481", "gps_altitude": "35"},
+        }
+        for index in range(size)
+    ]
+
+
+def build_shots(size: int) -> list[NewTikeeShot]:
+    return [NewTikeeShot(**body) for body in build_bodies(size)]
+
+
+def build_pairs(size: int) -> list[list[ORMTikeeShot]]:
+    """Build size pairs of ORM shots"""
+    shots = [shot.to_orm() for shot in build_shots(2 * size)]
+    return [shots[index:index + 2] for index in range(0, len(shots), 2)]
+
+
+def build_events(size: int) -> list[dict]:
+    """Build the events of size left shots never sent before"""
+    return [
+        {"body": json.dumps(build_bodies(1, 2 * next(_photo_indexes))[0])}
+        for _ in range(size)
+    ]
+
+
+BENCHMARKS: dict[str, Benchmark] = {
+    "NewTikeeShot": Benchmark(build_bodies, lambda bodies: [NewTikeeShot(**body) for body in bodies]),
+    "to_orm": Benchmark(build_shots, lambda shots: [shot.to_orm() for shot in shots]),
+    "model_dump_json": Benchmark(build_shots, lambda shots: [shot.model_dump_json() for shot in shots]),
+    "ORMTikeeShot(**item)": Benchmark(
+        lambda size: [shot.to_orm().model_dump() for shot in build_shots(size)],
+        lambda items: [ORMTikeeShot(**item) for item in items],
+    ),
+    "codec.decode": Benchmark(
+        lambda size: [ORM_TIKEE_SHOT_CODEC.encode(shot.to_orm()) for shot in build_shots(size)],
+        lambda items: [ORM_TIKEE_SHOT_CODEC.decode(item) for item in items],
+    ),
+    "codec.decode trusted": Benchmark(
+        lambda size: [ORM_TIKEE_SHOT_CODEC.encode(shot.to_orm()) for shot in build_shots(size)],
+        lambda items: [ORM_TIKEE_SHOT_CODEC.decode(item, trusted=True) for item in items],
+    ),
+    "build_pk/build_sk": Benchmark(
+        lambda size: [shot.to_orm() for shot in build_shots(size)],
+        lambda shots: [
+            (TikeeShotServices.build_pk(shot.camera_id, shot.sequence), TikeeShotServices.build_sk(shot.photo_index, shot.side))
+            for shot in shots
+        ],
+    ),
+    "get_photo_with_side": Benchmark(
+        build_pairs, lambda pairs: [get_photo_with_side(TikeeShotSide.RIGHT, pair) for pair in pairs]
+    ),
+    "is_same_resolution": Benchmark(
+        build_pairs, lambda pairs: [is_same_resolution(left, right) for left, right in pairs]
+    ),
+    "lambda_handler": Benchmark(
+        build_events, lambda events: [lambda_handler(event, None) for event in events], max_size=100
+    ),
+}
+
+
+def measure(benchmark: Benchmark, size: int, repeat: int) -> dict[str, float]:
+    """Return the operations per second of the best run, and the peak memory allocated per operation"""
+    best = float("inf")
+    for _ in range(max(repeat, 100 // size)):
+        inputs = benchmark.setup(size)
+        start = time.perf_counter()
+        benchmark.run(inputs)
+        best = min(best, time.perf_counter() - start)
+
+    inputs = benchmark.setup(size)
+    tracemalloc.start()
+    benchmark.run(inputs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ops_per_sec": size / best, "peak_alloc_bytes_per_op": peak / size}
+
+
+def create_table() -> None:
+    """Create the table lambda_handler writes to, in moto"""
+    boto3.client("dynamodb", constants.AWS_REGION).create_table(
+        TableName=constants.DDB_TABLE_NAME,
+        KeySchema=constants.DDB_KEYS,
+        AttributeDefinitions=constants.DDB_ATTRIBUTE,
+        GlobalSecondaryIndexes=constants.DDB_GLOBAL_SECONDARY_INDEXES,
+        LocalSecondaryIndexes=constants.DDB_LOCAL_SECONDARY_INDEXES,
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 1000], help="batch sizes")
+    parser.add_argument("--repeat", type=int, default=7, help="runs per batch size, the best one is kept")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="benchmarks to run, all if omitted")
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--baseline", help="JSON file of previous results to compare to")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with 1 if a benchmark regressed")
+    args = parser.parse_args()
+    if constants.DDB_TABLE_NAME is None:
+        parser.error("DDB_TABLE_NAME must be set, see .env")
+    for variable in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        os.environ.setdefault(variable, "testing")
+
+    results = {}
+    with mock_aws():
+        create_table()
+        for name in args.only or BENCHMARKS:
+            benchmark = BENCHMARKS[name]
+            for size in args.sizes:
+                if benchmark.max_size is not None and size > benchmark.max_size:
+                    continue
+                key = f"{name}[{size}]"
+                results[key] = measure(benchmark, size, args.repeat)
+                print(f"{key:<32}: {results[key]['ops_per_sec']:>12,.0f} ops/s "
+                      f"{results[key]['peak_alloc_bytes_per_op']:>10,.0f} B/op")
+    if args.output:
+        write_results(args.output, "micro", results)
+
+    if args.baseline:
+        baseline = load_results(args.baseline)["results"]
+        rows = compare_results(
+            {key: measure["ops_per_sec"] for key, measure in baseline.items()},
+            {key: measure["ops_per_sec"] for key, measure in results.items()},
+            args.threshold,
+        )
+        print(f"\nCompared to {args.baseline}:")
+        for key, reference, value, change, regression in rows:
+            print(f"{key:<32}: {reference:>12,.0f} -> {value:>12,.0f} ops/s {change:+7.1%}"
+                  f"{'  REGRESSION' if regression else ''}")
+        if args.fail_on_regression and any(row[4] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark of NewTikeeShot.to_orm.
+
+Compares the former conversion (model_dump then a validated ORMTikeeShot) to the trusted
+conversion with model_construct, and to the cached result returned on later calls.
+
+Usage: PYTHONPATH=. python -m benchmarks.bench_to_orm [--number 20000]
+"""
+import argparse
+import timeit
+from datetime import datetime
+
+from src.model.base.base_modelling import TikeeMetadata
+from src.model.business.business_modelling import NewTikeeShot
+from src.model.orm.orm_modelling import ORMTikeeShot
+
+
+def legacy_to_orm(shot: NewTikeeShot) -> ORMTikeeShot:
+    """to_orm as NewTikeeShot performed it before the trusted conversion"""
+    model_dict = shot.model_dump()
+    for key in ['metadata', 's3_key']:
+        model_dict.pop(key, None)
+    return ORMTikeeShot(
+        PK=f"{shot.camera_id}#{shot.sequence}",
+        SK=f"{shot.photo_index}#{shot.side}",
+        **model_dict,
+        **(shot.metadata.model_dump() if shot.metadata is not None else {})
+    )
+
+
+def trusted_to_orm(shot: NewTikeeShot) -> ORMTikeeShot:
+    """First call of to_orm on a shot, its cache being emptied"""
+    shot._orm = None
+    return shot.to_orm()
+
+
+def build_shots(count: int) -> list[NewTikeeShot]:
+    """Build shots with metadata, as sent by the cameras"""
+    return [
+        NewTikeeShot(
+            s3_key=f"123e4567-e89b-12d3-a456-426614174000/123456/{('left', 'right')[index % 2]}/my_photo{index}.jpg",
+            resolution="1920x1080",
+            file_size=1024,
+            shooting_date=datetime(2024, 1, 1, 12, 0),
+            metadata=TikeeMetadata(gps_latitude="48.8584", gps_longitude="2.2945", gps_altitude="35"),
+        )
+        for index in range(count)
+    ]
+
+
+def rate(function, shots: list[NewTikeeShot], repeat: int) -> float:
+    """Return the best number of conversions per second of function over shots"""
+    best = min(timeit.repeat(lambda: [function(shot) for shot in shots], number=1, repeat=repeat))
+    return len(shots) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20_000, help="number of shots converted per run")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs, the best one is reported")
+    args = parser.parse_args()
+
+    shots = build_shots(args.number)
+    legacy = rate(legacy_to_orm, shots, args.repeat)
+    trusted = rate(trusted_to_orm, shots, args.repeat)
+    cached = rate(NewTikeeShot.to_orm, shots, args.repeat)
+    print(f"validated conversion : {legacy:>12,.0f} shots/s")
+    print(f"trusted conversion   : {trusted:>12,.0f} shots/s ({trusted / legacy:.2f}x)")
+    print(f"cached conversion    : {cached:>12,.0f} shots/s ({cached / legacy:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Synthetic camera-fleet load generator and replay harness of lambda_create_shot.
+
+Simulates --cameras cameras shooting --sequences sequences of --photos photos each. Both sides of
+a photo are sent with a random delay of up to --jitter seconds, so sides and photos arrive out of
+order, with the resolution of the right side differing on --mismatch-rate of the photos.
+
+The traffic is sent to lambda_handler in-process by a pool of --workers threads, against moto
+standing in for DynamoDB, at --rate events per second. The run reports throughput, latency
+percentiles of the handler, status codes, completed pairs and stitcher invocations (the stitcher
+itself is not invoked). moto copies its tables on every transaction, absolute numbers are therefore
+meant to compare runs and commits rather than to size DynamoDB. Generated traffic can be saved with --record and sent again with --replay,
+at its recorded pace or scaled by --speed.
+
+Usage: set -a; . ./.env; set +a; PYTHONPATH=. python -m benchmarks.load_generator \
+    [--cameras 10] [--sequences 2] [--photos 50] [--rate 200] [--jitter 0.5] [--workers 8] \
+    [--record traffic.ndjson | --replay traffic.ndjson [--speed 1.0]] [--output load.json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import boto3
+from moto import mock_aws
+
+import src.constants.constants as constants
+from src.lambdas.lambda_create_shot.lambda_create_shot import lambda_handler
+from src.services.aws_clients import get_client
+from src.services.stitcher_dispatcher import StitcherDispatcher
+from benchmarks.results import write_results
+
+RESOLUTIONS = ["1920x1080", "3840x2160", "4056x3040"]
+
+
+def generate_traffic(
+    cameras: int,
+    sequences: int,
+    photos: int,
+    rate: float,
+    jitter: float,
+    mismatch_rate: float = 0.0,
+    seed: int | None = None,
+) -> list[dict]:
+    """
+    Generate the events sent by a fleet of cameras, ordered by arrival.
+
+    Args:
+        cameras (int): Number of cameras.
+        sequences (int): Number of sequences shot by each camera.
+        photos (int): Number of photos of each sequence, each sent as a left and a right shot.
+        rate (float): Mean number of events per second.
+        jitter (float): Maximum delay, in seconds, of a side after its nominal arrival.
+        mismatch_rate (float): Share of photos whose right side has another resolution.
+        seed (int | None): Seed of the random generator, for reproducible traffic.
+
+    Returns:
+        list[dict]: The events, {"at": arrival in seconds, "body": JSON body of a shot}.
+    """
+    generator = random.Random(seed)
+    fleet = [
+        (uuid.UUID(int=generator.getrandbits(128), version=4), generator.choice(RESOLUTIONS))
+        for _ in range(cameras)
+    ]
+    start = datetime(2024, 6, 1, 8, 0)
+    events = []
+    slot = 0
+    for sequence_index in range(sequences):
+        for photo_index in range(1, photos + 1):
+            # Cameras shoot in turn, each photo making two events
+            for camera_id, resolution in fleet:
+                sequence = f"{sequence_index + 1:06d}"
+                shooting_date = start + timedelta(days=sequence_index, seconds=30 * photo_index)
+                gps = {
+                    "gps_latitude": f"{45 + generator.random():.6f}",
+                    "gps_longitude": f"{5 + generator.random():.6f}",
+                    "gps_altitude": str(generator.randint(200, 3000)),
+                }
+                for side in ("left", "right"):
+                    side_resolution = resolution
+                    if side == "right" and generator.random() < mismatch_rate:
+                        side_resolution = generator.choice([other for other in RESOLUTIONS if other != resolution])
+                    events.append({
+                        "at": slot / rate + generator.uniform(0, jitter),
+                        "body": {
+                            "s3_key": f"{camera_id}/{sequence}/{side}/my_photo{photo_index}.jpg",
+                            "resolution": side_resolution,
+                            "file_size": generator.randint(2_000_000, 8_000_000),
+                            "shooting_date": shooting_date.isoformat(),
+                            "metadata": gps,
+                        },
+                    })
+                    slot += 1
+    events.sort(key=lambda event: event["at"])
+    return events
+
+
+def write_traffic(path: str | Path, events: list[dict]) -> None:
+    """Record traffic as NDJSON, one event per line"""
+    with Path(path).open("w", encoding="utf8") as file:
+        for event in events:
+            file.write(json.dumps(event) + "\n")
+
+
+def read_traffic(path: str | Path) -> list[dict]:
+    """Read traffic recorded by write_traffic, ordered by arrival"""
+    with Path(path).open("r", encoding="utf8") as file:
+        return sorted((json.loads(line) for line in file if line.strip()), key=lambda event: event["at"])
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Return the percentile of sorted values, by nearest rank"""
+    return values[min(len(values) - 1, max(0, round(percent / 100 * len(values)) - 1))]
+
+
+def drive(events: list[dict], workers: int, speed: float = 1.0) -> dict:
+    """
+    Send events to lambda_handler from a pool of threads, each at its arrival time divided by speed.
+
+    moto must be active and the table created. moto is not thread safe: each DynamoDB request is
+    made atomic, as it is in DynamoDB, while the requests of concurrent handlers interleave.
+
+    Returns:
+        dict: Throughput, latency percentiles in ms, status codes, completed pairs and stitcher invocations.
+    """
+    client = get_client("dynamodb")
+    make_api_call = client._make_api_call
+    request_lock = threading.Lock()
+
+    def atomic_make_api_call(operation_name, api_params):
+        with request_lock:
+            return make_api_call(operation_name, api_params)
+
+    client._make_api_call = atomic_make_api_call
+
+    dispatch_lock = threading.Lock()
+    dispatched = {"pairs": 0, "invocations": 0}
+
+    def count_invoke(dispatcher, pairs):
+        with dispatch_lock:
+            dispatched["pairs"] += len(pairs)
+            dispatched["invocations"] += 1
+        return len(pairs)
+
+    invoke = StitcherDispatcher._invoke
+    StitcherDispatcher._invoke = count_invoke
+
+    def handle(event: dict) -> tuple[float, int]:
+        handler_start = time.perf_counter()
+        response = lambda_handler({"body": json.dumps(event["body"])}, None)
+        return time.perf_counter() - handler_start, response["statusCode"]
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            start = time.perf_counter()
+            futures = []
+            for event in events:
+                delay = start + event["at"] / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(executor.submit(handle, event))
+            outcomes = [future.result() for future in futures]
+            elapsed = time.perf_counter() - start
+    finally:
+        StitcherDispatcher._invoke = invoke
+        client._make_api_call = make_api_call
+
+    latencies = sorted(latency * 1e3 for latency, _ in outcomes)
+    return {
+        "events": len(events),
+        "elapsed_s": elapsed,
+        "throughput_per_s": len(events) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "mean": statistics.fmean(latencies),
+        } if latencies else {},
+        "status_codes": dict(sorted(Counter(str(status_code) for _, status_code in outcomes).items())),
+        "completed_pairs": dispatched["pairs"],
+        "stitcher_invocations": dispatched["invocations"],
+    }
+
+
+def create_table() -> None:
+    """Create the table lambda_handler writes to, in moto"""
+    boto3.client("dynamodb", constants.AWS_REGION).create_table(
+        TableName=constants.DDB_TABLE_NAME,
+        KeySchema=constants.DDB_KEYS,
+        AttributeDefinitions=constants.DDB_ATTRIBUTE,
+        GlobalSecondaryIndexes=constants.DDB_GLOBAL_SECONDARY_INDEXES,
+        LocalSecondaryIndexes=constants.DDB_LOCAL_SECONDARY_INDEXES,
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cameras", type=int, default=10)
+    parser.add_argument("--sequences", type=int, default=2)
+    parser.add_argument("--photos", type=int, default=50, help="photos per sequence")
+    parser.add_argument("--rate", type=float, default=200, help="events per second")
+    parser.add_argument("--jitter", type=float, default=0.5, help="maximum delay of a side, in seconds")
+    parser.add_argument("--mismatch-rate", type=float, default=0.0, help="share of photos with mismatched sides")
+    parser.add_argument("--seed", type=int, help="seed of the generated traffic")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--record", help="NDJSON file to save the generated traffic to")
+    parser.add_argument("--replay", help="NDJSON file of recorded traffic to send instead of generating it")
+    parser.add_argument("--speed", type=float, default=1.0, help="pace of the traffic, 2 sends it twice as fast")
+    parser.add_argument("--output", help="JSON file to write the report to")
+    args = parser.parse_args()
+    if constants.DDB_TABLE_NAME is None:
+        parser.error("DDB_TABLE_NAME must be set, see .env")
+    for variable in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        os.environ.setdefault(variable, "testing")
+
+    if args.replay:
+        events = read_traffic(args.replay)
+    else:
+        events = generate_traffic(
+            args.cameras, args.sequences, args.photos, args.rate, args.jitter, args.mismatch_rate, args.seed
+        )
+        if args.record:
+            write_traffic(args.record, events)
+
+    with mock_aws():
+        create_table()
+        report = drive(events, args.workers, args.speed)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        write_results(args.output, "load", report)
+
+
+if __name__ == "__main__":
+    main()
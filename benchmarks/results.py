@@ -0,0 +1,73 @@
+"""Machine-readable results of the benchmarks, to follow their numbers across commits."""
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+def git_commit() -> str | None:
+    """Return the commit the benchmarks run on, None outside of a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, check=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path: str | Path, suite: str, results: dict) -> dict:
+    """
+    Write the results of a benchmark suite as JSON, along with where and when they were measured.
+
+    Args:
+        path (str | Path): The JSON file to write.
+        suite (str): The name of the benchmark suite.
+        results (dict): The measures, by benchmark name.
+
+    Returns:
+        dict: The document written.
+    """
+    document = {
+        "suite": suite,
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "measured_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "results": results,
+    }
+    Path(path).write_text(json.dumps(document, indent=2) + "\n", encoding="utf8")
+    return document
+
+
+def load_results(path: str | Path) -> dict:
+    """Read results written by write_results"""
+    return json.loads(Path(path).read_text(encoding="utf8"))
+
+
+def compare_results(
+    baseline: dict[str, float], current: dict[str, float], threshold: float, higher_is_better: bool = True
+) -> list[tuple[str, float, float, float, bool]]:
+    """
+    Compare measures to the ones of a baseline.
+
+    Args:
+        baseline (dict[str, float]): The measures of the baseline, by benchmark name.
+        current (dict[str, float]): The new measures, by benchmark name.
+        threshold (float): The relative change beyond which a worse measure is a regression, e.g. 0.1.
+        higher_is_better (bool): Whether the measures are throughputs (True) or durations (False).
+
+    Returns:
+        list[tuple[str, float, float, float, bool]]: For each benchmark measured in both, its name,
+        baseline measure, new measure, relative change and whether it regressed.
+    """
+    rows = []
+    for name, value in current.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        change = value / reference - 1
+        regression = -change > threshold if higher_is_better else change > threshold
+        rows.append((name, reference, value, change, regression))
+    return rows
@@ -1,41 +1,73 @@
 """File to store constants or load them from OS environment variable"""
 
 import os
-import yaml
-
+from functools import lru_cache
 from pathlib import Path
 
-
-class IgnoreUnknownTagsLoader(yaml.SafeLoader):
-    """Custom loader that ignores unknown YAML tags like !Ref or !GetAtt"""
-
-    def ignore_unknown(self, _):
-        """dummy function for constructor"""
-        return None  # or you can return node.value if you want to keep the value
-
-
-IgnoreUnknownTagsLoader.add_constructor(None, IgnoreUnknownTagsLoader.ignore_unknown)
-
-YAML_PATH = Path("cloudformation/dynamodb/dynamodb-setup.yaml")
-if not YAML_PATH.exists():
-    YAML_PATH = Path("/opt/python") / YAML_PATH
-with YAML_PATH.open("r", encoding="utf8") as file:
-    dynamodb_setup = yaml.load(file, Loader=IgnoreUnknownTagsLoader)
 # DynamoDB
 DDB_TABLE_NAME = os.environ.get("DDB_TABLE_NAME")
-DDB_ATTRIBUTE = (
-    dynamodb_setup.get("Resources", {})
-    .get("DDBTable", {})
-    .get("Properties", {})
-    .get("AttributeDefinitions")
-)
-DDB_KEYS = (
-    dynamodb_setup.get("Resources", {})
-    .get("DDBTable", {})
-    .get("Properties", {})
-    .get("KeySchema")
-)
+# Key schema, attributes and indexes of the table, read from its CloudFormation template on first
+# access: Lambdas never use them, they neither parse the template nor need PyYAML on cold start
+DDB_SETUP_CONSTANTS = {
+    "DDB_ATTRIBUTE": ("AttributeDefinitions", None),
+    "DDB_KEYS": ("KeySchema", None),
+    "DDB_GLOBAL_SECONDARY_INDEXES": ("GlobalSecondaryIndexes", []),
+    "DDB_LOCAL_SECONDARY_INDEXES": ("LocalSecondaryIndexes", []),
+}
+DDB_CAMERA_INDEX_NAME = "camera_id-index"
+DDB_SHOOTING_DATE_INDEX_NAME = "shooting_date-index"
 AWS_REGION = os.environ.get("AWS_REGION") or "eu-west-1"
 AWS_ACCOUNT_ID = os.environ.get("AWS_ACCOUNT_ID") or "test-account"
 
 LAMBDA_STITCHER = os.environ.get("LAMBDA_STITCHER")
+# Seconds a completed pair stays claimed by the invocation dispatching it to the stitcher: a pair
+# whose dispatcher died without releasing it is dispatched again by a later registration
+STITCHER_DISPATCH_LEASE = float(os.environ.get("STITCHER_DISPATCH_LEASE") or 60)
+
+# botocore connection settings shared by every AWS client of the process: the pool is sized for
+# the concurrent requests of batches and scans, the timeouts and keep-alive keep botocore's defaults
+# if unset. Retries are configured by botocore itself, from AWS_MAX_ATTEMPTS and AWS_RETRY_MODE
+AWS_MAX_POOL_CONNECTIONS = int(os.environ.get("AWS_MAX_POOL_CONNECTIONS") or 50)
+AWS_CONNECT_TIMEOUT = os.environ.get("AWS_CONNECT_TIMEOUT")
+AWS_READ_TIMEOUT = os.environ.get("AWS_READ_TIMEOUT")
+AWS_TCP_KEEPALIVE = os.environ.get("AWS_TCP_KEEPALIVE")
+
+# Per-stage latency metrics, emitted for a share of the invocations (0 disables them)
+METRICS_SAMPLE_RATE = float(os.environ.get("METRICS_SAMPLE_RATE") or 0)
+METRICS_NAMESPACE = os.environ.get("METRICS_NAMESPACE") or "TikeeShots"
+
+# In-memory cache of the shots read by the invocations of a warm container (0 disables it)
+SHOT_CACHE_MAX_SIZE = int(os.environ.get("SHOT_CACHE_MAX_SIZE") or 0)
+SHOT_CACHE_TTL = float(os.environ.get("SHOT_CACHE_TTL") or 5)
+
+
+@lru_cache(maxsize=1)
+def load_dynamodb_setup() -> dict:
+    """Parse the CloudFormation template of the table, once, ignoring tags like !Ref or !GetAtt"""
+    import yaml
+
+    class IgnoreUnknownTagsLoader(yaml.SafeLoader):
+        """Custom loader that ignores unknown YAML tags like !Ref or !GetAtt"""
+
+    IgnoreUnknownTagsLoader.add_constructor(None, lambda loader, node: None)
+
+    yaml_path = Path("cloudformation/dynamodb/dynamodb-setup.yaml")
+    if not yaml_path.exists():
+        yaml_path = Path(__file__).resolve().parents[2] / yaml_path
+    with yaml_path.open("r", encoding="utf8") as file:
+        return yaml.load(file, Loader=IgnoreUnknownTagsLoader)
+
+
+def __getattr__(name: str):
+    """Resolve the constants of DDB_SETUP_CONSTANTS from the CloudFormation template"""
+    if name not in DDB_SETUP_CONSTANTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    key, default = DDB_SETUP_CONSTANTS[name]
+    value = (
+        load_dynamodb_setup().get("Resources", {})
+        .get("DDBTable", {})
+        .get("Properties", {})
+        .get(key, default)
+    )
+    globals()[name] = value
+    return value
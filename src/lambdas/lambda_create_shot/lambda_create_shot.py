@@ -2,66 +2,62 @@
 import os
 import json
 import logging
-import boto3
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
 
 from pydantic import ValidationError
 
 from src.model.base.base_modelling import TikeeShotSide
 from src.model.business.business_modelling import NewTikeeShot
-from src.model.orm.orm_modelling import ORMTikeeShot
+from src.model.orm.orm_modelling import ORMTikeeShot, ORMTikeeShotIdentifier
 from src.services.tikee_shot_service import TikeeShotServices
-from src.constants.constants import LAMBDA_STITCHER, AWS_REGION, AWS_ACCOUNT_ID
+from src.services import metrics
+from src.services.shot_cache import ShotCache
+from src.services.stitcher_dispatcher import StitcherDispatcher
+from src.constants.constants import SHOT_CACHE_MAX_SIZE, SHOT_CACHE_TTL
 
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Attributes the pairing check reads from the other side: its resolution and its S3 path
+PAIRING_FIELDS = ["resolution", "side", "camera_id", "sequence", "photo_name"]
 
+# Concurrent writes and pair registrations of the shots of a batch
+PAIR_REGISTRATION_THREADS = 16
 
+S = TypeVar("S")
+T = TypeVar("T")
 
+# Shared by the invocations of a warm container, disabled unless SHOT_CACHE_MAX_SIZE is set
+shot_cache = ShotCache(SHOT_CACHE_MAX_SIZE, SHOT_CACHE_TTL) if SHOT_CACHE_MAX_SIZE > 0 else None
 
 
+
+
+
+
+@metrics.invocation("lambda_create_shot")
 def lambda_handler(event, _):
     """Lambda handler to create a tikee shot in dynamoDB table"""
 
     try:
 
-        body = json.loads(event.get("body", "{}"))
-        new_tikee_shot = NewTikeeShot(**body)
-        tikee_shot_service = TikeeShotServices()
-        photos_with_same_index = tikee_shot_service.get_tikee_shot_of_photo_index(
-            new_tikee_shot.camera_id,
-            new_tikee_shot.sequence,
-            new_tikee_shot.photo_index,
-        )
-        other_side = get_photo_with_side(
-                TikeeShotSide(new_tikee_shot.side).opposite_side(), photos_with_same_index
-            )
-        if is_same_resolution(
-            new_tikee_shot.to_orm(),
-            other_side,
-        ):
-            orm_tikee_shot = tikee_shot_service.create(new_tikee_shot)
-            if other_side is not None:
-                photos_with_same_index.append(orm_tikee_shot)
-                left_side: ORMTikeeShot | None = get_photo_with_side(TikeeShotSide.LEFT, photos_with_same_index)
-                right_side: ORMTikeeShot | None = get_photo_with_side(TikeeShotSide.RIGHT, photos_with_same_index)
-                if left_side is not None and right_side is not None:
-                    input = json.dumps({"body":
-                        {
-                            "left_side_s3_path": left_side.build_s3_path(),
-                            "right_side_s3_path": right_side.build_s3_path()
-                        }})
-                    lambda_client = boto3.client('lambda', AWS_REGION)
-                    lambda_client.invoke(
-                        FunctionName=f"arn:aws:lambda:{AWS_REGION}:{AWS_ACCOUNT_ID}:function:{LAMBDA_STITCHER}",
-                        InvocationType='Event',
-                        Payload=input
-                    )
-        else:
-            raise ValueError(
-                f"Resolution mismatch: The other side does not have the same resolution for camera {new_tikee_shot.camera_id}."
-            )
+        with metrics.stage("parse_json"):
+            body = json.loads(event.get("body", "{}"))
+        stitcher_dispatcher = StitcherDispatcher()
+        tikee_shot_service = TikeeShotServices(cache=shot_cache)
+        if isinstance(body, list):
+            response, queued_shots = create_tikee_shot_batch(body, tikee_shot_service, stitcher_dispatcher)
+            flush_stitcher(tikee_shot_service, stitcher_dispatcher, queued_shots)
+            return response
+        with metrics.stage("validate"):
+            new_tikee_shot = NewTikeeShot(**body)
+        # The resolution of the opposite side is checked by DynamoDB within the write
+        orm_tikee_shot = tikee_shot_service.create_with_pairing_check(new_tikee_shot)
+        queued = stitch_if_pair_completed(tikee_shot_service, orm_tikee_shot, None, stitcher_dispatcher)
+        stitcher_dispatcher.dispatch()
 
         response = {
             "statusCode": 201,
@@ -73,6 +69,8 @@ def lambda_handler(event, _):
                 default=str,
             ),
         }
+        # The container is frozen once the handler returns: wait for the stitcher invocations
+        flush_stitcher(tikee_shot_service, stitcher_dispatcher, [orm_tikee_shot] if queued else [])
     except ValidationError as e:
         response = {
             "statusCode": 400,
@@ -95,6 +93,181 @@ def lambda_handler(event, _):
     return response
 
 
+def create_tikee_shot_batch(
+    bodies: list, tikee_shot_service: TikeeShotServices, stitcher_dispatcher: StitcherDispatcher
+) -> tuple[dict, list[ORMTikeeShot]]:
+    """
+    Create a batch of tikee shots and report the outcome of each of them.
+
+    Every shot is validated on its own, so one bad s3_key does not reject the whole batch. Valid
+    shots are written with create_with_pairing_check, DynamoDB checking the resolution of their
+    opposite side within the write, then registered on their pair: the completed pairs are sent to
+    the stitcher in the background, see stitch_if_pair_completed. The photos are created
+    concurrently, the shots of a same photo one after the other in the order they were sent, so
+    that the first of two sides of different resolutions is the one created.
+
+    Args:
+        bodies (list): The JSON bodies of the shots to create.
+        tikee_shot_service (TikeeShotServices): The service persisting the shots.
+        stitcher_dispatcher (StitcherDispatcher): The dispatcher collecting the completed pairs,
+            to be flushed by the caller with flush_stitcher.
+
+    Returns:
+        tuple[dict, list[ORMTikeeShot]]: A 201 response if every shot was created, 207 if only some
+        were, 400 otherwise, whose body lists one result per shot, in the order they were sent; and
+        the shots whose pair was queued for the stitcher.
+
+    Raises:
+        ValueError: If the batch is empty
+    """
+    if not bodies:
+        raise ValueError("The batch must hold at least one shot")
+    results: list[dict | None] = [None] * len(bodies)
+    shots_by_photo: dict[tuple[str, int | None], list[tuple[int, NewTikeeShot]]] = {}
+    with metrics.stage("validate"):
+        for index, shot_body in enumerate(bodies):
+            try:
+                if not isinstance(shot_body, dict):
+                    raise ValueError("Each shot of the batch must be a JSON object")
+                new_tikee_shot = NewTikeeShot(**shot_body)
+                orm_tikee_shot = new_tikee_shot.to_orm()
+            except ValidationError as e:
+                results[index] = {"index": index, "statusCode": 400, "message": "Validation failed", "errors": e.errors()}
+                continue
+            except ValueError as e:
+                results[index] = {"index": index, "statusCode": 400, "message": str(e)}
+                continue
+            shots_by_photo.setdefault((orm_tikee_shot.PK, orm_tikee_shot.photo_index), []).append(
+                (index, new_tikee_shot)
+            )
+
+    def create_photo(shots: list[tuple[int, NewTikeeShot]]) -> list[ORMTikeeShot]:
+        queued_shots = []
+        for index, new_tikee_shot in shots:
+            try:
+                orm_tikee_shot = tikee_shot_service.create_with_pairing_check(new_tikee_shot)
+            except ValueError as e:
+                results[index] = {"index": index, "statusCode": 400, "message": str(e)}
+                continue
+            except Exception:
+                logger.exception("The shot %d of the batch could not be written", index)
+                results[index] = {"index": index, "statusCode": 500, "message": "Insertion failed, the shot could not be written"}
+                continue
+            results[index] = {"index": index, "statusCode": 201, "message": "Insertion successful", "data": new_tikee_shot.model_dump()}
+            if stitch_if_pair_completed(tikee_shot_service, orm_tikee_shot, None, stitcher_dispatcher):
+                queued_shots.append(orm_tikee_shot)
+        return queued_shots
+
+    with metrics.stage("create_shots"):
+        queued = map_shots(create_photo, list(shots_by_photo.values()))
+    queued_shots = [orm_tikee_shot for photo_shots in queued for orm_tikee_shot in photo_shots]
+    stitcher_dispatcher.dispatch()
+
+    succeeded = sum(1 for result in results if result["statusCode"] == 201)
+    if succeeded == len(results):
+        status_code, message = 201, "Insertion successful"
+    elif succeeded:
+        status_code, message = 207, "Insertion partially successful"
+    else:
+        status_code, message = 400, "Insertion failed"
+    return {
+        "statusCode": status_code,
+        "body": json.dumps({"message": message, "results": results}, default=str),
+    }, queued_shots
+
+
+def flush_stitcher(
+    tikee_shot_service: TikeeShotServices, stitcher_dispatcher: StitcherDispatcher, queued_shots: list[ORMTikeeShot]
+) -> None:
+    """
+    Wait for the stitcher invocations, then record the pairs as dispatched.
+
+    If an invocation failed, the claims of the pairs are released and the error raised: the request
+    fails, and its retry dispatches the pairs again.
+
+    Args:
+        tikee_shot_service (TikeeShotServices): The service the pairs were claimed with.
+        stitcher_dispatcher (StitcherDispatcher): The dispatcher the pairs were queued to.
+        queued_shots (list[ORMTikeeShot]): The shots whose pair was queued, see stitch_if_pair_completed.
+    """
+    with metrics.stage("stitcher_flush"):
+        try:
+            stitcher_dispatcher.flush()
+        except Exception:
+            map_shots(tikee_shot_service.release_dispatch, queued_shots)
+            raise
+    map_shots(tikee_shot_service.mark_dispatched, queued_shots)
+
+
+def map_shots(function: Callable[[S], T], items: list[S]) -> list[T]:
+    """
+    Call a function on each shot, or group of shots, concurrently when there are several, and return the results in order.
+
+    Each call runs in a copy of the caller's context, so the metrics of the invocation record its stages.
+    """
+    if len(items) <= 1:
+        return [function(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(PAIR_REGISTRATION_THREADS, len(items))) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, function, item) for item in items]
+        return [future.result() for future in futures]
+
+
+def opposite_side_identifier(tikee_shot: ORMTikeeShot) -> ORMTikeeShotIdentifier:
+    """
+    Build the identifier of the shot taken on the opposite side of the provided one.
+
+    Args:
+        tikee_shot (ORMTikeeShot): The shot whose opposite side is looked for.
+
+    Returns:
+        ORMTikeeShotIdentifier: The PK and SK of the opposite side.
+    """
+    return ORMTikeeShotIdentifier(
+        PK=tikee_shot.PK,
+        SK=TikeeShotServices.build_sk(tikee_shot.photo_index, TikeeShotSide(tikee_shot.side).opposite_side()),
+    )
+
+
+def stitch_if_pair_completed(
+    tikee_shot_service: TikeeShotServices,
+    tikee_shot: ORMTikeeShot,
+    other_side: ORMTikeeShot | None,
+    stitcher_dispatcher: StitcherDispatcher,
+) -> bool:
+    """
+    Register a persisted shot on its pair and queue the pair for the stitcher if it is complete.
+
+    Only the registration claiming the pair queues it, even when both sides are created at the
+    same time or a shot is sent twice. The claim is settled by flush_stitcher.
+
+    Args:
+        tikee_shot_service (TikeeShotServices): The service the shot was persisted with.
+        tikee_shot (ORMTikeeShot): The persisted shot.
+        other_side (ORMTikeeShot | None): The opposite side if already known, read from DB otherwise.
+        stitcher_dispatcher (StitcherDispatcher): The dispatcher sending the pair to the stitcher.
+
+    Returns:
+        bool: True if the pair was queued.
+    """
+    if not tikee_shot_service.register_side(tikee_shot):
+        return False
+    if other_side is None:
+        # The opposite side is only read once the pair is complete, by a strongly consistent read
+        # bypassing the cache: its registration proved it written, a stale miss would drop the pair
+        other_side = tikee_shot_service.get_tikee_shot_by_id(
+            opposite_side_identifier(tikee_shot), fields=PAIRING_FIELDS, consistent=True
+        )
+    pair = [tikee_shot] if other_side is None else [tikee_shot, other_side]
+    left_side = get_photo_with_side(TikeeShotSide.LEFT, pair)
+    right_side = get_photo_with_side(TikeeShotSide.RIGHT, pair)
+    if left_side is None or right_side is None:
+        # The opposite side was deleted since its registration
+        tikee_shot_service.release_dispatch(tikee_shot)
+        return False
+    stitcher_dispatcher.add(left_side, right_side)
+    return True
+
+
 def get_photo_with_side(side: TikeeShotSide, tikee_shots: list[ORMTikeeShot]) -> ORMTikeeShot | None:
     """
     Return the first tikee shot from the provided list that matches the specified side.
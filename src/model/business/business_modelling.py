@@ -1,11 +1,12 @@
 """Modelization of business models"""
 import uuid
-import re
 import sys
 from pydantic import Field, model_validator, ValidationError, computed_field, PrivateAttr, ModelWrapValidatorHandler
 from src.model.base.base_modelling import TikeeMetadata, TikeeShotDefinition, TikeeShotSide
 from uuid import UUID
+from src.model.business.s3_key_parser import parse_s3_key, split_s3_key
 from src.model.orm.orm_modelling import ORMTikeeShot
+from src.model.orm.key_codec import encode_pk, encode_sk
 from typing import Any
 from typing_extensions import Self
 from enum import Enum
@@ -28,6 +29,7 @@ class NewTikeeShot(TikeeShotDefinition):
     _side: str | None = PrivateAttr(None)
     _photo_name: str | None = PrivateAttr(None)
     _photo_index: int | None = PrivateAttr(None)
+    _orm: ORMTikeeShot | None = PrivateAttr(None)
 
 
     @computed_field
@@ -106,7 +108,11 @@ class NewTikeeShot(TikeeShotDefinition):
     def validate_and_parse_s3_path(cls, data: Any, handler: ModelWrapValidatorHandler[Self]):
         """Parse and validate the s3_key path structure.
         
-        This validator ensures the s3_key follows the expected format and extracts its components.
+        This validator ensures the s3_key follows the expected format and extracts its components:
+        - camera_id must be a valid UUID
+        - sequence must be numeric
+        - side must be a valid TikeeShotSide enum value
+        - photo_name must follow the expected format
         
         Args:
             data: The input data containing the s3_key
@@ -121,81 +127,51 @@ class NewTikeeShot(TikeeShotDefinition):
         try:
             res = handler(data)
         except ValueError:
-            parts = data.get('s3_key','').strip().split('/')
-            if len(parts) != 4:
-                raise ValueError('s3_key must have 4 parts: <uuid>/<sequence>/<side>/<filename>')
-            camera_id_str, sequence, side, filename = parts
+            camera_id_str, sequence, side, filename = split_s3_key(data.get('s3_key',''))
             original_error = sys.exc_info()[1]
             raise ValueError(f"Error processing s3_key for camera '{camera_id_str}': {original_error}") from original_error
-        parts = data.get('s3_key','').strip().split('/')
-        if len(parts) != 4:
-            raise ValueError('s3_key must have 4 parts: <uuid>/<sequence>/<side>/<filename>')
-        camera_id_str, sequence, side, filename = parts
-        res._camera_id_str = camera_id_str
-        res._sequence = sequence
-        res._side = side
-        res._photo_name = filename
+        parsed_s3_key = parse_s3_key(res.s3_key)
+        res._camera_id = parsed_s3_key.camera_id
+        res._camera_id_str = parsed_s3_key.camera_id_str
+        res._sequence = parsed_s3_key.sequence
+        res._side = parsed_s3_key.side
+        res._photo_name = parsed_s3_key.photo_name
+        res._photo_index = parsed_s3_key.photo_index
 
         return res
-        
-    @model_validator(mode="after")
-    @classmethod
-    def validate_members_of_s3_path(cls, v):
-        """Validate the extracted components of the s3_key path.
-        
-        This validator ensures all components of the s3_key are valid:
-        - camera_id must be a valid UUID
-        - sequence must be numeric
-        - side must be a valid TikeeShotSide enum value
-        - photo_name must follow the expected format
-        
-        Args:
-            v: The model instance to validate
-            
-        Returns:
-            Self: The validated model instance
-            
-        Raises:
-            ValueError: If any component of the s3_key is invalid
-        """
-        # Validate camera_id
-        try:
-            v._camera_id = UUID(v._camera_id_str)
-        except ValueError:
-            raise ValueError(f"Error processing s3_key for camera {v._camera_id_str}': Invalid UUID in s3_key")
-
-        # Validate sequence
-        if not re.fullmatch(r'\d+', v._sequence):
-            raise ValueError(f"Error processing s3_key for camera {v._camera_id_str}: Sequence must be digits")
-
-        # Validate side
-        try:
-            v._side = TikeeShotSide(v._side).value
-        except ValueError:
-            raise ValueError(f"Error processing s3_key for camera {v._camera_id_str}: Side must be one of: {', '.join(side.value for side in TikeeShotSide)}")
-
-        # Validate and extract photo name and index
-        match = re.fullmatch(r'my_photo(?:(\d+))?\.jpg', v._photo_name)
-        if not match:
-            raise ValueError(f"Error processing s3_key for camera {v._camera_id_str}: Filename must be in the format \"my_photo.jpg\" or \"my_photo[int].jpg\"")
-
-        v._photo_index = int(match.group(1)) if match.group(1) else None
-
-        return v
 
 
     def to_orm(self) -> ORMTikeeShot:
         """Convert the business model to an ORM model.
+
+        Every field has already been validated by this model, so the ORM model is built with
+        model_construct instead of validating them again. The result is cached on the instance:
+        the business model must not be mutated once converted.
         
         Returns:
             ORMTikeeShot: The ORM representation of the tikee shot
         """
-        model_dict = self.model_dump()
-        for key in ['metadata', 's3_key']:
-            model_dict.pop(key, None)
-        return ORMTikeeShot(
-            PK=f"{self.camera_id}#{self.sequence}",
-            SK=f"{self.photo_index}#{self.side}",
-            **model_dict,
-            **(self.metadata.model_dump() if self.metadata is not None else {})
-        )
+        # Private attributes are read from their dict: pydantic's __getattr__ dominates otherwise
+        private = self.__pydantic_private__
+        if private["_orm"] is None:
+            camera_id, sequence, side, photo_index = (
+                private["_camera_id"], private["_sequence"], private["_side"], private["_photo_index"]
+            )
+            fields = {
+                "PK": encode_pk(camera_id, sequence),
+                "SK": encode_sk(photo_index, side),
+                "resolution": self.resolution,
+                "file_size": self.file_size,
+                "shooting_date": self.shooting_date,
+                "camera_id": camera_id,
+                "sequence": sequence,
+                "side": TikeeShotSide(side),
+                "photo_name": private["_photo_name"],
+                "photo_index": photo_index,
+            }
+            if self.metadata is not None:
+                fields.update(
+                    (name, getattr(self.metadata, name)) for name in TikeeMetadata.model_fields
+                )
+            private["_orm"] = ORMTikeeShot.model_construct(**fields)
+        return private["_orm"]
@@ -0,0 +1,118 @@
+"""Single-pass parser of tikee shot s3 keys: <uuid>/<sequence>/<side>/<filename>"""
+import re
+from functools import lru_cache
+from typing import NamedTuple
+from uuid import UUID
+
+from src.model.base.base_modelling import TikeeShotSide
+from src.model.orm.key_codec import PHOTO_INDEX_WIDTH
+
+S3_KEY_PARTS_ERROR = 's3_key must have 4 parts: <uuid>/<sequence>/<side>/<filename>'
+
+CAMERA_ID_CACHE_SIZE = 4096
+
+# Matches a fully valid s3 key in one pass, the camera id is left to UUID()
+S3_KEY_PATTERN = re.compile(
+    r'(?P<camera_id>[^/]*)/(?P<sequence>\d+)/(?P<side>'
+    + '|'.join(re.escape(side.value) for side in TikeeShotSide)
+    + r')/(?P<photo_name>my_photo(?P<photo_index>\d{1,%d})?\.jpg)' % PHOTO_INDEX_WIDTH
+)
+SEQUENCE_PATTERN = re.compile(r'\d+')
+PHOTO_NAME_PATTERN = re.compile(r'my_photo(?:(\d+))?\.jpg')
+
+
+class ParsedS3Key(NamedTuple):
+    """Components of a valid tikee shot s3 key"""
+    camera_id: UUID
+    camera_id_str: str
+    sequence: str
+    side: str
+    photo_name: str
+    photo_index: int | None
+
+
+def split_s3_key(s3_key: str) -> list[str]:
+    """
+    Split an s3 key in its 4 parts, without validating them.
+
+    Raises:
+        ValueError: If the s3 key does not have 4 parts
+    """
+    parts = s3_key.strip().split('/')
+    if len(parts) != 4:
+        raise ValueError(S3_KEY_PARTS_ERROR)
+    return parts
+
+
+@lru_cache(maxsize=CAMERA_ID_CACHE_SIZE)
+def _parse_camera_id(camera_id_str: str) -> UUID:
+    """Parse the camera id of a key, memoized since every shot of a camera repeats it"""
+    return UUID(camera_id_str)
+
+
+def parse_s3_key(s3_key: str) -> ParsedS3Key:
+    """
+    Parse and validate an s3 key with a single precompiled pattern.
+
+    Valid keys are parsed in one regex pass, the UUID of their camera being memoized.
+    Invalid keys go through a slower step-by-step check to report the first invalid component.
+
+    Args:
+        s3_key (str): The s3 key, <uuid>/<sequence>/<side>/<filename>.
+
+    Returns:
+        ParsedS3Key: The components of the s3 key.
+
+    Raises:
+        ValueError: If the s3 key or one of its components is invalid
+    """
+    match = S3_KEY_PATTERN.fullmatch(s3_key.strip())
+    if match is not None:
+        camera_id_str = match.group('camera_id')
+        try:
+            camera_id = _parse_camera_id(camera_id_str)
+        except ValueError:
+            raise ValueError(f"Error processing s3_key for camera {camera_id_str}': Invalid UUID in s3_key")
+        photo_index = match.group('photo_index')
+        return ParsedS3Key(
+            camera_id,
+            camera_id_str,
+            match.group('sequence'),
+            match.group('side'),
+            match.group('photo_name'),
+            int(photo_index) if photo_index else None,
+        )
+    return _parse_invalid_s3_key(s3_key)
+
+
+def _parse_invalid_s3_key(s3_key: str) -> ParsedS3Key:
+    """Check the components of an s3 key one by one, raising on the first invalid one"""
+    camera_id_str, sequence, side, photo_name = split_s3_key(s3_key)
+    try:
+        camera_id = _parse_camera_id(camera_id_str)
+    except ValueError:
+        raise ValueError(f"Error processing s3_key for camera {camera_id_str}': Invalid UUID in s3_key")
+
+    if not SEQUENCE_PATTERN.fullmatch(sequence):
+        raise ValueError(f"Error processing s3_key for camera {camera_id_str}: Sequence must be digits")
+
+    try:
+        side = TikeeShotSide(side).value
+    except ValueError:
+        raise ValueError(f"Error processing s3_key for camera {camera_id_str}: Side must be one of: {', '.join(side.value for side in TikeeShotSide)}")
+
+    match = PHOTO_NAME_PATTERN.fullmatch(photo_name)
+    if not match:
+        raise ValueError(f"Error processing s3_key for camera {camera_id_str}: Filename must be in the format \"my_photo.jpg\" or \"my_photo[int].jpg\"")
+    if match.group(1) and len(match.group(1)) > PHOTO_INDEX_WIDTH:
+        raise ValueError(f"Error processing s3_key for camera {camera_id_str}: Photo index must have at most {PHOTO_INDEX_WIDTH} digits")
+
+    # Only reached for keys the fast pattern should have matched
+    return ParsedS3Key(
+        camera_id,
+        camera_id_str,
+        sequence,
+        side,
+        photo_name,
+        int(match.group(1)) if match.group(1) else None,
+    )
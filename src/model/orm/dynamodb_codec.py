@@ -0,0 +1,275 @@
+"""Convert ORM models to and from DynamoDB attribute values (low-level client format)"""
+import types
+from datetime import datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Union, get_args, get_origin
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from src.model.orm.orm_modelling import ORMSequenceSummary, ORMTikeeShot
+
+
+def encode_value(value: Any) -> dict[str, Any]:
+    """
+    Encode a python value as a DynamoDB attribute value.
+
+    Numbers are written as strings, so Decimal values are kept exact.
+
+    Raises:
+        TypeError: If the value has no DynamoDB representation
+    """
+    encoder = _ENCODERS.get(type(value))
+    if encoder is not None:
+        return encoder(value)
+    if isinstance(value, Enum):
+        return encode_value(value.value)
+    if isinstance(value, BaseModel):
+        return {"M": DynamoDBCodec.for_model(type(value)).encode(value)}
+    if isinstance(value, dict):
+        return {"M": {str(key): encode_value(item) for key, item in value.items() if item is not None}}
+    if isinstance(value, (list, tuple)):
+        return {"L": [encode_value(item) for item in value]}
+    raise TypeError(f"Cannot encode {type(value).__name__} as a DynamoDB attribute value")
+
+
+def decode_value(attribute_value: dict[str, Any]) -> Any:
+    """Decode a DynamoDB attribute value to a python value, numbers being decoded as Decimal"""
+    (attribute_type, value), = attribute_value.items()
+    if attribute_type in ("S", "BOOL", "B"):
+        return value
+    if attribute_type == "N":
+        return Decimal(value)
+    if attribute_type == "NULL":
+        return None
+    if attribute_type == "M":
+        return {key: decode_value(item) for key, item in value.items()}
+    if attribute_type == "L":
+        return [decode_value(item) for item in value]
+    if attribute_type in ("SS", "BS"):
+        return set(value)
+    if attribute_type == "NS":
+        return {Decimal(item) for item in value}
+    raise TypeError(f"Unknown DynamoDB attribute type {attribute_type}")
+
+
+def encode_datetime(value: datetime) -> str:
+    """
+    Encode a datetime as an ISO 8601 string sorting like the datetimes it encodes.
+
+    Timezone-aware datetimes are converted to UTC, so their strings share the same offset: range
+    conditions on the shooting_date index then compare instants. Naive datetimes are kept as is.
+    Shots written by former versions hold the date as serialized by pydantic, with a Z or their local
+    offset: they sort apart until migrate_shot_keys writes their date again.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.isoformat()
+
+
+def encode_key(pk: str, sk: str) -> dict[str, dict[str, str]]:
+    """Encode the primary key of an item"""
+    return {"PK": {"S": pk}, "SK": {"S": sk}}
+
+
+_ENCODERS: dict[type, Callable[[Any], dict[str, Any]]] = {
+    str: lambda value: {"S": value},
+    bool: lambda value: {"BOOL": value},
+    int: lambda value: {"N": str(value)},
+    float: lambda value: {"N": repr(value)},
+    Decimal: lambda value: {"N": str(value)},
+    datetime: lambda value: {"S": encode_datetime(value)},
+    UUID: lambda value: {"S": str(value)},
+    bytes: lambda value: {"B": value},
+}
+
+
+UUID_CACHE_SIZE = 4096
+
+_object_setattr = object.__setattr__
+
+
+def _number(attribute_value: dict[str, Any]) -> str:
+    """Return the digits of a number, written as a string attribute by former versions"""
+    value = attribute_value.get("N")
+    return attribute_value["S"] if value is None else value
+
+
+def _raw(attribute_value: dict[str, Any]) -> Any:
+    """Return the value of an attribute value as found in the item, for pydantic to validate it"""
+    (attribute_type, value), = attribute_value.items()
+    if attribute_type in ("S", "N", "BOOL"):
+        return value
+    return decode_value(attribute_value)
+
+
+# Items of a camera or a sequence all repeat the same camera_id
+_decode_uuid = lru_cache(maxsize=UUID_CACHE_SIZE)(UUID)
+
+
+def _build_decoder(annotation: Any) -> Callable[[dict[str, Any]], Any]:
+    """Build the function decoding an attribute value to the type annotated on a field"""
+    if get_origin(annotation) in (Union, types.UnionType):
+        arguments = [argument for argument in get_args(annotation) if argument is not type(None)]
+        if len(arguments) != 1:
+            return decode_value
+        annotation = arguments[0]
+    if not isinstance(annotation, type):
+        return decode_value
+    if annotation is bool:
+        return decode_value
+    if annotation is int:
+        return lambda attribute_value: int(_number(attribute_value))
+    if annotation is Decimal:
+        return lambda attribute_value: Decimal(_number(attribute_value))
+    if annotation is datetime:
+        return lambda attribute_value: datetime.fromisoformat(attribute_value["S"])
+    if annotation is UUID:
+        return lambda attribute_value: _decode_uuid(attribute_value["S"])
+    if issubclass(annotation, Enum):
+        members = annotation._value2member_map_
+        return lambda attribute_value: members[attribute_value["S"]]
+    if annotation is str:
+        return lambda attribute_value: attribute_value["S"]
+    if issubclass(annotation, BaseModel):
+        return lambda attribute_value: DynamoDBCodec.for_model(annotation).decode(attribute_value["M"])
+    return decode_value
+
+
+class DynamoDBCodec:
+    """
+    Convert a pydantic model to and from DynamoDB attribute values, without JSON round trip.
+
+    Attributes are named after the field aliases, as model_dump(by_alias=True) would. Items are
+    decoded either strictly, pydantic validating every field, or trusted: for items this service
+    wrote itself, fields are decoded to their annotated type (UUID, datetime, enum, int, Decimal)
+    and set on the instance without any validation. Fields missing from the item, such as
+    attributes left out of a projection, are then simply not set.
+    """
+
+    _codecs: dict[type[BaseModel], "DynamoDBCodec"] = {}
+
+    def __init__(self, model: type[BaseModel]):
+        self.model = model
+        self._attribute_names: dict[str, str] = {}
+        self._decoders: dict[str, tuple[str, Callable[[dict[str, Any]], Any]]] = {}
+        for name, field in model.model_fields.items():
+            attribute = field.alias or name
+            self._attribute_names[name] = attribute
+            self._decoders[attribute] = (name, _build_decoder(field.annotation))
+        # Trusted instances are built like model_construct does, which is slower than validating
+        self._defaults = {
+            name: field.default
+            for name, field in model.model_fields.items()
+            if not field.is_required() and field.default_factory is None
+        }
+        self._construct_directly = (
+            len(self._defaults) + sum(field.is_required() for field in model.model_fields.values())
+            == len(model.model_fields)
+            and not model.__private_attributes__
+            and model.model_config.get("extra") != "allow"
+        )
+
+    @classmethod
+    def for_model(cls, model: type[BaseModel]) -> "DynamoDBCodec":
+        """Return the codec of a model, built once per model"""
+        codec = cls._codecs.get(model)
+        if codec is None:
+            codec = cls._codecs[model] = cls(model)
+        return codec
+
+    def encode(self, instance: BaseModel) -> dict[str, dict[str, Any]]:
+        """
+        Encode the fields set on a model instance, None values being left out.
+
+        Args:
+            instance (BaseModel): The instance to encode.
+
+        Returns:
+            dict: The item, in DynamoDB low-level client format.
+        """
+        item = {}
+        values = instance.__dict__
+        for name in instance.model_fields_set:
+            value = values.get(name)
+            if value is not None:
+                item[self._attribute_names[name]] = encode_value(value)
+        return item
+
+    def projection(self, fields: list[str]) -> dict[str, Any]:
+        """
+        Build the arguments of a request reading only some fields of the model.
+
+        Args:
+            fields (list[str]): The names of the fields to read.
+
+        Returns:
+            dict: The ProjectionExpression and its ExpressionAttributeNames.
+
+        Raises:
+            ValueError: If a field is not a field of the model
+        """
+        attribute_names = {}
+        for index, field in enumerate(dict.fromkeys(fields)):
+            if field not in self._attribute_names:
+                raise ValueError(f"{field} is not a field of {self.model.__name__}")
+            attribute_names[f"#p{index}"] = self._attribute_names[field]
+        return {
+            "ProjectionExpression": ", ".join(attribute_names),
+            "ExpressionAttributeNames": attribute_names,
+        }
+
+    def decode_fields(self, item: dict[str, dict[str, Any]]) -> dict[str, Any]:
+        """
+        Decode an item to the values of the model fields, attributes unknown to the model are ignored.
+
+        Args:
+            item (dict): The item, in DynamoDB low-level client format.
+
+        Returns:
+            dict: The value of every field present in the item, by field name.
+        """
+        decoders = self._decoders
+        fields = {}
+        for attribute, attribute_value in item.items():
+            decoder = decoders.get(attribute)
+            if decoder is not None:
+                fields[decoder[0]] = decoder[1](attribute_value) if "NULL" not in attribute_value else None
+        return fields
+
+    def decode(self, item: dict[str, dict[str, Any]], trusted: bool = False) -> BaseModel:
+        """
+        Decode an item to a model instance.
+
+        Args:
+            item (dict): The item, in DynamoDB low-level client format.
+            trusted (bool): Build the instance without validation, for items written by this codec.
+
+        Returns:
+            BaseModel: The model instance.
+        """
+        if trusted:
+            return self._construct(self.decode_fields(item))
+        decoders = self._decoders
+        return self.model(**{
+            decoders[attribute][0]: _raw(attribute_value)
+            for attribute, attribute_value in item.items()
+            if attribute in decoders
+        })
+
+    def _construct(self, fields: dict[str, Any]) -> BaseModel:
+        """Build a model instance from already typed field values, without validation"""
+        if not self._construct_directly:
+            return self.model.model_construct(**fields)
+        instance = self.model.__new__(self.model)
+        _object_setattr(instance, "__dict__", self._defaults | fields)
+        _object_setattr(instance, "__pydantic_fields_set__", set(fields))
+        _object_setattr(instance, "__pydantic_extra__", None)
+        _object_setattr(instance, "__pydantic_private__", None)
+        return instance
+
+
+ORM_TIKEE_SHOT_CODEC = DynamoDBCodec.for_model(ORMTikeeShot)
+ORM_SEQUENCE_SUMMARY_CODEC = DynamoDBCodec.for_model(ORMSequenceSummary)
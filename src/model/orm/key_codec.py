@@ -0,0 +1,39 @@
+"""Build the primary keys of the tikee shots, sorting like the photos they identify"""
+from uuid import UUID
+
+from src.model.base.base_modelling import TikeeShotSide
+
+# Photo indexes are zero-padded to this width: SKs then sort numerically, 0000000002#left before 0000000010#left
+PHOTO_INDEX_WIDTH = 10
+
+
+def encode_pk(camera_id: UUID | str, sequence: str) -> str:
+    """Build the PK of the shots of a sequence, such as 677c082c-3a1a-44d9-874a-20169546c653#123456789"""
+    return f"{camera_id}#{sequence}"
+
+
+def encode_photo_index(photo_index: int | None) -> str:
+    """
+    Encode a photo index as a zero-padded string, the empty string for photos without index.
+
+    Raises:
+        ValueError: If the photo index is negative or wider than PHOTO_INDEX_WIDTH digits, its SK
+            would not sort numerically
+    """
+    if photo_index is None:
+        return ""
+    if not 0 <= photo_index < 10 ** PHOTO_INDEX_WIDTH:
+        raise ValueError(f"Photo index {photo_index} must be a positive integer of at most {PHOTO_INDEX_WIDTH} digits")
+    return f"{photo_index:0{PHOTO_INDEX_WIDTH}d}"
+
+
+def encode_sk(photo_index: int | None, side: TikeeShotSide | str | None) -> str:
+    """
+    Build the SK of a shot, such as 0000000001#left, or #left for a photo without index.
+
+    Without side, build the prefix shared by the SKs of the sides of a photo index, such as 0000000001#.
+    Photos without index sort before the indexed ones.
+    """
+    if isinstance(side, TikeeShotSide):
+        side = side.value
+    return f"{encode_photo_index(photo_index)}#{side or ''}"
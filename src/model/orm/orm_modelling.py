@@ -1,4 +1,7 @@
 """Model Database entities"""
+from datetime import datetime
+from typing import Optional
+
 from pydantic import Field, BaseModel
 from src.model.base.base_modelling import TikeeShotDefinition, TikeeMetadata, TikeetShotComputedProperties
 
@@ -14,12 +17,51 @@ class ORMTikeeShotIdentifier(BaseModel):
     SK: str = Field(
         ...,
         min_length=1,
-        description="SK is formed from photo number and side such as 1#left or #left"
+        description="SK is formed from zero-padded photo number and side such as 0000000001#left or #left"
     )
 
 
 
 class ORMTikeeShot(ORMTikeeShotIdentifier, TikeeShotDefinition, TikeeMetadata, TikeetShotComputedProperties):
-    """ORM-facing tikee shot model for persistence."""
+    """ORM-facing tikee shot model for persistence.
+
+    camera_id is persisted as a string attribute: it is the partition key of the camera_id-index
+    global secondary index used to list the shots of a camera.
+    """
     def build_s3_path(self) -> str:
-        return f"{self.camera_id}/{self.sequence}/{self.side.value}/{self.photo_name}"
\ No newline at end of file
+        return f"{self.camera_id}/{self.sequence}/{self.side.value}/{self.photo_name}"
+
+
+class ORMSequenceSummary(ORMTikeeShotIdentifier):
+    """ORM-facing aggregate of the shots of a sequence, maintained as they are written.
+
+    Its PK is the PK of the shots prefixed with SUMMARY#: summaries hold no camera_id and stay out of
+    the sequence queries and of the camera_id index.
+    """
+    shot_count: int = Field(
+        0,
+        ge=0,
+        description="the number of shots of the sequence"
+    )
+
+    total_file_size: int = Field(
+        0,
+        ge=0,
+        description="the sum of the file sizes of the shots, in bytes"
+    )
+
+    first_shooting_date: Optional[datetime] = Field(
+        None,
+        description="the shooting date of the earliest shot"
+    )
+
+    last_shooting_date: Optional[datetime] = Field(
+        None,
+        description="the shooting date of the latest shot"
+    )
+
+    completed_pairs: int = Field(
+        0,
+        ge=0,
+        description="the number of photo indexes whose left and right sides were both written"
+    )
@@ -0,0 +1,198 @@
+"""Provide asynchronous CRUD services for tikee shots object"""
+
+import asyncio
+from contextlib import AsyncExitStack
+from uuid import UUID
+
+from aiobotocore.session import get_session
+from botocore.config import Config
+
+import src.constants.constants as constants
+from src.model.business.business_modelling import NewTikeeShot, TikeeShotSide
+from src.model.orm.orm_modelling import ORMTikeeShot, ORMTikeeShotIdentifier
+from src.model.orm.dynamodb_codec import ORM_TIKEE_SHOT_CODEC, encode_key
+from src.services.aws_clients import build_config
+from src.services.tikee_shot_service import TikeeShotServices, TABLE_KEY_ATTRIBUTES, CAMERA_INDEX_KEY_ATTRIBUTES
+
+DEFAULT_MAX_CONCURRENCY = 16
+
+
+class AsyncTikeeShotServices:
+    """
+    Asynchronous counterpart of TikeeShotServices, built on an aiobotocore DynamoDB client.
+
+    Independent calls overlap instead of adding up when awaited together, at most max_concurrency
+    requests being in flight at once:
+
+        async with AsyncTikeeShotServices() as service:
+            sequences = await asyncio.gather(*(service.get_tikee_shot_of_sequence(uuid, sequence) for sequence in sequences))
+    """
+
+    def __init__(
+        self,
+        trusted_hydration: bool = False,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        endpoint_url: str | None = None,
+    ):
+        """
+        Instanciate an AsyncTikeeShotServices object storing table in which to write, its client
+        is opened by entering the service with async with.
+
+        Args:
+            trusted_hydration (bool): Build the shots read from DB without validating them, as they
+                were written by this service. Every read method can override it with its trusted argument.
+            max_concurrency (int): Maximum number of requests in flight at once, and size of the connection pool.
+            endpoint_url (str | None): The DynamoDB endpoint, e.g. a local moto server, AWS if None.
+        """
+        self.table_name = constants.DDB_TABLE_NAME
+        self.trusted_hydration = trusted_hydration
+        self.max_concurrency = max_concurrency
+        self.endpoint_url = endpoint_url
+        self.client = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._exit_stack: AsyncExitStack | None = None
+
+    async def __aenter__(self) -> "AsyncTikeeShotServices":
+        self._exit_stack = AsyncExitStack()
+        self.client = await self._exit_stack.enter_async_context(
+            get_session().create_client(
+                "dynamodb",
+                region_name=constants.AWS_REGION,
+                endpoint_url=self.endpoint_url,
+                config=build_config().merge(Config(max_pool_connections=self.max_concurrency)),
+            )
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._exit_stack.aclose()
+        self.client = None
+        self._exit_stack = None
+
+    async def create(self, new_tikee_shot: NewTikeeShot) -> ORMTikeeShot:
+        """
+        Persist a tikeeshot in DB and add it to the summary of its sequence, see TikeeShotServices.create.
+        The shot is not registered on its pair: see TikeeShotServices.register_side.
+        """
+        orm_tikee_shot = new_tikee_shot.to_orm()
+        response = await self._call(
+            "put_item", TableName=self.table_name, Item=ORM_TIKEE_SHOT_CODEC.encode(orm_tikee_shot), ReturnValues="ALL_OLD"
+        )
+        previous_file_size = TikeeShotServices._previous_file_size(response.get("Attributes"))
+        for request in TikeeShotServices._summary_updates(self.table_name, [(orm_tikee_shot, previous_file_size)]):
+            summary = (await self._call("update_item", **request, ReturnValues="ALL_NEW"))["Attributes"]
+            for date_request in TikeeShotServices._summary_date_updates(self.table_name, request, summary):
+                try:
+                    await self._call("update_item", **date_request)
+                except self.client.exceptions.ConditionalCheckFailedException:
+                    # A concurrent write moved the date further already
+                    pass
+        return orm_tikee_shot
+
+    async def get_tikee_shot_by_id(
+        self,
+        orm_tikee_shot_identifier: ORMTikeeShotIdentifier,
+        trusted: bool | None = None,
+        fields: list[str] | None = None,
+    ) -> ORMTikeeShot | None:
+        """Get a tikee shot by Id"""
+        response_db = await self._call(
+            "get_item",
+            TableName=self.table_name,
+            Key=encode_key(orm_tikee_shot_identifier.PK, orm_tikee_shot_identifier.SK),
+            **TikeeShotServices._projection(fields, TABLE_KEY_ATTRIBUTES),
+        )
+        if "Item" in response_db:
+            return self._hydrate(response_db["Item"], trusted, fields)
+        return None
+
+    async def get_tikee_shot(
+        self,
+        uuid: UUID,
+        sequence: str,
+        photo_index: int | None,
+        side: TikeeShotSide,
+        trusted: bool | None = None,
+        fields: list[str] | None = None,
+    ) -> ORMTikeeShot | None:
+        identifier = ORMTikeeShotIdentifier(
+            PK=TikeeShotServices.build_pk(uuid, sequence), SK=TikeeShotServices.build_sk(photo_index, side)
+        )
+        return await self.get_tikee_shot_by_id(identifier, trusted=trusted, fields=fields)
+
+    async def get_tikee_shot_of_camera_by_id(
+        self, uuid: UUID, trusted: bool | None = None, fields: list[str] | None = None
+    ) -> list[ORMTikeeShot]:
+        """Retrieve all rows of tikee_shot_table with camera uuid, through the camera_id index"""
+        return await self._query(
+            {
+                "IndexName": constants.DDB_CAMERA_INDEX_NAME,
+                "KeyConditionExpression": "camera_id = :camera_id",
+                "ExpressionAttributeValues": {":camera_id": {"S": str(uuid)}},
+            },
+            CAMERA_INDEX_KEY_ATTRIBUTES,
+            trusted,
+            fields,
+        )
+
+    async def get_tikee_shot_of_sequence(
+        self, uuid: UUID, sequence: str, trusted: bool | None = None, fields: list[str] | None = None
+    ) -> list[ORMTikeeShot]:
+        return await self._query(
+            {
+                "KeyConditionExpression": "PK = :pk",
+                "ExpressionAttributeValues": {":pk": {"S": TikeeShotServices.build_pk(uuid, sequence)}},
+            },
+            TABLE_KEY_ATTRIBUTES,
+            trusted,
+            fields,
+        )
+
+    async def get_tikee_shot_of_photo_index(
+        self,
+        uuid: UUID,
+        sequence: str,
+        photo_index: int | None,
+        trusted: bool | None = None,
+        fields: list[str] | None = None,
+    ) -> list[ORMTikeeShot]:
+        return await self._query(
+            {
+                "KeyConditionExpression": "PK = :pk AND begins_with(SK, :sk)",
+                "ExpressionAttributeValues": {
+                    ":pk": {"S": TikeeShotServices.build_pk(uuid, sequence)},
+                    ":sk": {"S": TikeeShotServices.build_sk(photo_index, None)},
+                },
+            },
+            TABLE_KEY_ATTRIBUTES,
+            trusted,
+            fields,
+        )
+
+    async def _query(
+        self, query_kwargs: dict, key_attributes: tuple[str, ...], trusted: bool | None, fields: list[str] | None
+    ) -> list[ORMTikeeShot]:
+        """Read every page of a query of tikee_shot_table, one after another"""
+        query_kwargs = dict(
+            query_kwargs, TableName=self.table_name, **TikeeShotServices._projection(fields, key_attributes)
+        )
+        tikee_shots = []
+        while True:
+            response = await self._call("query", **query_kwargs)
+            tikee_shots.extend(self._hydrate(item, trusted, fields) for item in response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                return tikee_shots
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    async def _call(self, operation_name: str, **kwargs) -> dict:
+        """Send a request once fewer than max_concurrency requests are in flight"""
+        if self.client is None:
+            raise RuntimeError("AsyncTikeeShotServices must be entered with async with before use")
+        async with self._semaphore:
+            return await getattr(self.client, operation_name)(**kwargs)
+
+    def _hydrate(self, item: dict, trusted: bool | None, fields: list[str] | None = None) -> ORMTikeeShot:
+        """Build a shot from an item, see TikeeShotServices._hydrate"""
+        if fields is not None:
+            trusted = True
+        return ORM_TIKEE_SHOT_CODEC.decode(item, trusted=self.trusted_hydration if trusted is None else trusted)
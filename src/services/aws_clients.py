@@ -0,0 +1,78 @@
+"""Process-wide registry of boto3 clients.
+
+Building a client resolves the session, the endpoint and opens a new HTTP connection pool.
+Keeping them at module level lets warm Lambda invocations reuse open TLS connections.
+"""
+
+import threading
+
+import boto3
+from botocore.config import Config
+
+from src.constants.constants import (
+    AWS_REGION,
+    AWS_MAX_POOL_CONNECTIONS,
+    AWS_CONNECT_TIMEOUT,
+    AWS_READ_TIMEOUT,
+    AWS_TCP_KEEPALIVE,
+)
+
+_lock = threading.Lock()
+_session: boto3.session.Session | None = None
+_clients: dict[tuple[str, str], object] = {}
+
+
+def build_config() -> Config:
+    """
+    Build the botocore configuration shared by every client of the registry.
+
+    Only the connection pool is sized; timeouts and keep-alive keep botocore's defaults unless set
+    through the environment, see constants, and retries follow botocore's own AWS_MAX_ATTEMPTS and
+    AWS_RETRY_MODE.
+    """
+    settings = {}
+    if AWS_CONNECT_TIMEOUT is not None:
+        settings["connect_timeout"] = float(AWS_CONNECT_TIMEOUT)
+    if AWS_READ_TIMEOUT is not None:
+        settings["read_timeout"] = float(AWS_READ_TIMEOUT)
+    if AWS_TCP_KEEPALIVE is not None:
+        settings["tcp_keepalive"] = AWS_TCP_KEEPALIVE.lower() == "true"
+    return Config(max_pool_connections=AWS_MAX_POOL_CONNECTIONS, **settings)
+
+
+def _get_session() -> boto3.session.Session:
+    """Return the session of the registry, creating it on first use (lock must be held)"""
+    global _session
+    if _session is None:
+        _session = boto3.session.Session()
+    return _session
+
+
+def get_client(service_name: str, region_name: str = AWS_REGION):
+    """
+    Return the low-level client of an AWS service, built once per process.
+
+    Args:
+        service_name (str): The name of the AWS service, e.g. "lambda".
+        region_name (str): The region of the client.
+
+    Returns:
+        The boto3 client, shared by every caller of the process.
+    """
+    key = (service_name, region_name)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _get_session().client(service_name, region_name, config=build_config())
+                _clients[key] = client
+    return client
+
+
+def reset() -> None:
+    """Forget every client of the registry, the next calls build new ones"""
+    global _session
+    with _lock:
+        _clients.clear()
+        _session = None
@@ -0,0 +1,111 @@
+"""Per-stage latency metrics of the lambdas, emitted as CloudWatch Embedded Metric Format log lines.
+
+A sampled invocation records the duration of its stages and of the service calls made within it,
+then writes them as one EMF line to stdout, which CloudWatch turns into metrics. Invocations
+that are not sampled record nothing: a stage then costs a context variable lookup.
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Iterator
+
+from src.constants.constants import METRICS_NAMESPACE, METRICS_SAMPLE_RATE
+
+_recorder: ContextVar["MetricsRecorder | None"] = ContextVar("metrics_recorder", default=None)
+_disabled = nullcontext()
+
+
+class MetricsRecorder:
+    """Durations, in milliseconds, of the stages of a sampled invocation, recorded by any of its threads"""
+
+    def __init__(self, function_name: str):
+        self.function_name = function_name
+        self.durations: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, milliseconds: float) -> None:
+        """Add a duration to a stage, stages run several times keep every duration"""
+        with self._lock:
+            self.durations.setdefault(name, []).append(milliseconds)
+
+    def to_emf(self, namespace: str) -> dict:
+        """Build the EMF document of the recorded durations, with the function name as dimension"""
+        document = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": namespace,
+                    "Dimensions": [["Function"]],
+                    "Metrics": [{"Name": name, "Unit": "Milliseconds"} for name in self.durations],
+                }],
+            },
+            "Function": self.function_name,
+        }
+        for name, durations in self.durations.items():
+            document[name] = durations[0] if len(durations) == 1 else durations
+        return document
+
+
+@contextmanager
+def invocation(function_name: str, sample_rate: float | None = None, namespace: str | None = None) -> Iterator[None]:
+    """
+    Record the stages of an invocation if it is sampled, and emit them when it ends.
+
+    Args:
+        function_name (str): The name of the lambda, dimension of the metrics.
+        sample_rate (float | None): Share of the invocations recorded, METRICS_SAMPLE_RATE if None.
+        namespace (str | None): The CloudWatch namespace of the metrics, METRICS_NAMESPACE if None.
+    """
+    sample_rate = METRICS_SAMPLE_RATE if sample_rate is None else sample_rate
+    if sample_rate <= 0 or (sample_rate < 1 and random.random() >= sample_rate):
+        yield
+        return
+    recorder = MetricsRecorder(function_name)
+    token = _recorder.set(recorder)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.record("invocation", (time.perf_counter() - start) * 1e3)
+        _recorder.reset(token)
+        sys.stdout.write(json.dumps(recorder.to_emf(namespace or METRICS_NAMESPACE)) + "\n")
+
+
+def stage(name: str):
+    """Return a context manager timing a stage of the current invocation, doing nothing if it is not sampled"""
+    recorder = _recorder.get()
+    if recorder is None:
+        return _disabled
+    return _timed_stage(recorder, name)
+
+
+@contextmanager
+def _timed_stage(recorder: MetricsRecorder, name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.record(name, (time.perf_counter() - start) * 1e3)
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """Decorate a function to time its calls as a stage of the current invocation"""
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder.get()
+            if recorder is None:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                recorder.record(name, (time.perf_counter() - start) * 1e3)
+        return wrapper
+    return decorator
@@ -0,0 +1,91 @@
+"""Lazy iteration over paginated DynamoDB queries with resumable cursors"""
+
+import base64
+import binascii
+import json
+from typing import Any, Callable, Iterator
+
+
+def encode_cursor(key: dict[str, Any]) -> str:
+    """Encode a DynamoDB key as an opaque, URL-safe cursor"""
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """
+    Decode a cursor built by encode_cursor back to a DynamoDB key.
+
+    Raises:
+        ValueError: If the cursor was not built by encode_cursor
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(key, dict):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return key
+
+
+class ShotIterator:
+    """
+    Iterate lazily over the items of a paginated query, one page in memory at a time.
+
+    The cursor property gives the position of the last item yielded: passing it to a new
+    iterator of the same query resumes right after that item, without reading earlier pages
+    again. It is None once the query is exhausted.
+    """
+
+    def __init__(
+        self,
+        query: Callable[..., dict],
+        query_kwargs: dict[str, Any],
+        key_attributes: tuple[str, ...],
+        hydrate: Callable[[dict], Any],
+        page_size: int | None = None,
+        cursor: str | None = None,
+    ):
+        """
+        Args:
+            query: The query function of the table, called with query_kwargs for every page.
+            query_kwargs: The arguments of the query, without pagination arguments.
+            key_attributes: Attributes forming the key of an item for the queried table or index.
+            hydrate: Function converting a raw item to the yielded object.
+            page_size: Maximum number of items read per page, DynamoDB's 1 MB limit if None.
+            cursor: Cursor returned by a previous iterator of the same query to resume from.
+        """
+        self._query = query
+        self._query_kwargs = dict(query_kwargs)
+        self._key_attributes = key_attributes
+        self._hydrate = hydrate
+        if page_size is not None:
+            if page_size < 1:
+                raise ValueError("page_size must be a positive integer")
+            self._query_kwargs["Limit"] = page_size
+        if cursor is not None:
+            self._query_kwargs["ExclusiveStartKey"] = decode_cursor(cursor)
+        self._cursor = cursor
+        self._started = False
+
+    @property
+    def cursor(self) -> str | None:
+        """Opaque position after the last item yielded, None once every page has been read"""
+        return self._cursor
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._started:
+            raise RuntimeError("A ShotIterator can only be iterated once, resume it from its cursor instead")
+        self._started = True
+        return self._iterate()
+
+    def _iterate(self) -> Iterator[Any]:
+        query_kwargs = self._query_kwargs
+        while True:
+            response = self._query(**query_kwargs)
+            for item in response.get("Items", []):
+                self._cursor = encode_cursor({attribute: item[attribute] for attribute in self._key_attributes})
+                yield self._hydrate(item)
+            if "LastEvaluatedKey" not in response:
+                self._cursor = None
+                return
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
@@ -0,0 +1,115 @@
+"""Parallel segmented scan of a DynamoDB table for fleet-wide maintenance jobs"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from pydantic import BaseModel, Field
+
+from src.services.pagination import encode_cursor, decode_cursor
+
+MAX_TOTAL_SEGMENTS = 1_000_000
+
+
+class ScanCheckpoint(BaseModel):
+    """Progress of a parallel scan, persisted with model_dump_json to resume an interrupted scan"""
+
+    total_segments: int = Field(
+        ...,
+        ge=1,
+        le=MAX_TOTAL_SEGMENTS,
+        description="Number of segments the table is split into"
+    )
+
+    cursors: dict[int, str] = Field(
+        default_factory=dict,
+        description="Cursor after the last page handed to the sink, per segment still running"
+    )
+
+    completed_segments: set[int] = Field(
+        default_factory=set,
+        description="Segments entirely handed to the sink"
+    )
+
+    def is_complete(self) -> bool:
+        """Return True once every segment has been scanned"""
+        return len(self.completed_segments) == self.total_segments
+
+
+def parallel_scan(
+    scan: Callable[..., dict],
+    scan_kwargs: dict[str, Any],
+    sink: Callable[[dict], None],
+    total_segments: int,
+    max_workers: int | None = None,
+    checkpoint: ScanCheckpoint | None = None,
+    on_checkpoint: Callable[[ScanCheckpoint], None] | None = None,
+) -> ScanCheckpoint:
+    """
+    Scan a table with Segment/TotalSegments, one worker thread per segment at a time.
+
+    Each worker holds a single page in memory and hands its items to the sink before reading
+    the next page, so memory stays bounded by max_workers pages. Calls to the sink and to
+    on_checkpoint are serialized, neither has to be thread safe. A page is recorded in the
+    checkpoint once all its items reached the sink: resuming from a checkpoint may hand again
+    the items of the page being processed when the scan stopped, never skips any.
+
+    Args:
+        scan: The scan function of a thread-safe client, called with scan_kwargs for every page.
+        scan_kwargs: The arguments of the scan (TableName, Limit, ...), without segment arguments.
+        sink: Function called with every raw item scanned.
+        total_segments: Number of segments to split the table into.
+        max_workers: Number of segments scanned concurrently, total_segments if None.
+        checkpoint: Checkpoint of a previous scan to resume, must have the same total_segments.
+        on_checkpoint: Function called with the checkpoint after every page handed to the sink.
+
+    Returns:
+        ScanCheckpoint: The checkpoint of the scan, complete unless a worker failed.
+
+    Raises:
+        ValueError: If the checkpoint was made with another number of segments
+    """
+    if checkpoint is None:
+        checkpoint = ScanCheckpoint(total_segments=total_segments)
+    elif checkpoint.total_segments != total_segments:
+        raise ValueError(
+            f"Checkpoint was made with {checkpoint.total_segments} segments, cannot resume it with {total_segments}"
+        )
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def scan_segment(segment: int) -> None:
+        segment_kwargs = dict(scan_kwargs, Segment=segment, TotalSegments=total_segments)
+        with lock:
+            cursor = checkpoint.cursors.get(segment)
+        if cursor is not None:
+            segment_kwargs["ExclusiveStartKey"] = decode_cursor(cursor)
+        while not stop.is_set():
+            response = scan(**segment_kwargs)
+            last_evaluated_key = response.get("LastEvaluatedKey")
+            with lock:
+                for item in response.get("Items", []):
+                    sink(item)
+                if last_evaluated_key is None:
+                    checkpoint.cursors.pop(segment, None)
+                    checkpoint.completed_segments.add(segment)
+                else:
+                    checkpoint.cursors[segment] = encode_cursor(last_evaluated_key)
+                if on_checkpoint is not None:
+                    on_checkpoint(checkpoint)
+            if last_evaluated_key is None:
+                return
+            segment_kwargs["ExclusiveStartKey"] = last_evaluated_key
+
+    segments = [segment for segment in range(total_segments) if segment not in checkpoint.completed_segments]
+    with ThreadPoolExecutor(max_workers=max_workers or total_segments) as executor:
+        futures = [executor.submit(scan_segment, segment) for segment in segments]
+        try:
+            for future in futures:
+                future.result()
+        except BaseException:
+            stop.set()
+            for future in futures:
+                future.cancel()
+            raise
+    return checkpoint
@@ -0,0 +1,68 @@
+"""Size-bounded LRU cache with time-to-live, for shot lookups repeated within a warm container"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+_MISSING = object()
+
+
+class ShotCache:
+    """
+    Keep the most recently used entries for ttl seconds, at most max_size of them.
+
+    The cache is thread safe and counts its hits and misses. Entries are shared with every caller:
+    values must not be mutated.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 5.0):
+        """
+        Instanciate an empty cache
+
+        Args:
+            max_size (int): Number of entries above which the least recently used one is evicted.
+            ttl (float): Seconds after which an entry expires.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value of a key, or default if it is missing or expired"""
+        with self._lock:
+            expires_at, value = self._entries.get(key, (0.0, _MISSING))
+            if value is _MISSING or expires_at <= time.monotonic():
+                if value is not _MISSING:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store the value of a key for ttl seconds, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Forget a key"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Forget every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
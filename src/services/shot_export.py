@@ -0,0 +1,238 @@
+"""Stream tikee shots to newline-delimited JSON or to columnar files (Parquet, Arrow IPC) for analytics.
+
+Shots are written in batches of batch_rows as they are read: memory holds a page of the query and a
+batch of rows, whatever the number of shots exported. Columnar files are typed: camera_id as UUID,
+shooting_date as timestamp, file_size and photo_index as int64, GPS coordinates as decimal128, and
+low-cardinality strings (side, resolution, camera model, make) as dictionaries. Each batch is a row
+group of the Parquet file, or a record batch of the Arrow IPC file.
+
+pyarrow is only needed for the columnar formats, and only imported when one of them is written.
+"""
+
+import json
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterable, Protocol
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+from src.model.orm.orm_modelling import ORMTikeeShot
+
+EXPORT_FORMATS = ("ndjson", "parquet", "arrow")
+EXPORT_BATCH_ROWS = 10_000
+# GPS coordinates and altitudes are written with 18 decimals, the precision of the EXIF values being lower
+GPS_DECIMAL_PRECISION = 38
+GPS_DECIMAL_SCALE = 18
+# Fields of ORMTikeeShot written as columns, in order; metadata is flattened into the GPS, make and model fields
+EXPORT_FIELDS = (
+    "PK", "SK", "camera_id", "sequence", "photo_index", "side", "photo_name", "resolution", "file_size",
+    "shooting_date", "gps_latitude", "gps_longitude", "gps_altitude", "camera_model_name", "make",
+)
+
+
+class ExportReport(BaseModel):
+    """Size and throughput of an export"""
+
+    rows: int = Field(0, description="Number of shots written")
+    batches: int = Field(0, description="Number of batches written, row groups or record batches of columnar files")
+    bytes_written: int = Field(0, description="Size of the file written, in bytes")
+    elapsed_s: float = Field(0.0, description="Duration of the export, reading the shots included, in seconds")
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.elapsed_s if self.elapsed_s else 0.0
+
+
+class ShotWriter(Protocol):
+    """Writer of batches of shots to a file"""
+
+    path: Path
+
+    def write(self, shots: list[ORMTikeeShot]) -> None:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+class NDJSONShotWriter:
+    """Write shots as JSON lines, None values left out and Decimal values written as exact strings"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._file = self.path.open("w", encoding="utf8")
+
+    def write(self, shots: list[ORMTikeeShot]) -> None:
+        lines = []
+        for shot in shots:
+            values = shot.__dict__
+            lines.append(json.dumps({
+                name: _json_value(values[name]) for name in EXPORT_FIELDS if values.get(name) is not None
+            }) + "\n")
+        self._file.writelines(lines)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ArrowShotWriter:
+    """Write shots as typed columns, to a Parquet file or to an Arrow IPC file"""
+
+    def __init__(self, path: str | Path, export_format: str = "parquet"):
+        """
+        Args:
+            path (str | Path): The file to write.
+            export_format (str): parquet or arrow.
+
+        Raises:
+            ImportError: If pyarrow is not installed
+            ValueError: If the format is not a columnar format
+        """
+        if export_format not in ("parquet", "arrow"):
+            raise ValueError(f"{export_format} is not a columnar export format")
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+
+        self.path = Path(path)
+        self._pyarrow = pyarrow
+        self._schema = shot_schema()
+        self._converters = _column_converters(pyarrow)
+        if export_format == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(self.path, self._schema)
+        else:
+            self._writer = pyarrow.ipc.new_file(self.path, self._schema)
+
+    def write(self, shots: list[ORMTikeeShot]) -> None:
+        values = [shot.__dict__ for shot in shots]
+        columns = [
+            self._converters[field.name](field.type, [value.get(field.name) for value in values])
+            for field in self._schema
+        ]
+        self._writer.write_batch(self._pyarrow.RecordBatch.from_arrays(columns, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def shot_schema():
+    """Return the Arrow schema of the exported shots"""
+    import pyarrow as pa
+
+    gps = pa.decimal128(GPS_DECIMAL_PRECISION, GPS_DECIMAL_SCALE)
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("PK", pa.string()),
+        ("SK", pa.string()),
+        ("camera_id", pa.uuid()),
+        ("sequence", pa.string()),
+        ("photo_index", pa.int64()),
+        ("side", category),
+        ("photo_name", pa.string()),
+        ("resolution", category),
+        ("file_size", pa.int64()),
+        # Timezone-aware dates are converted to UTC, naive ones are kept as is, as in the table
+        ("shooting_date", pa.timestamp("us")),
+        ("gps_latitude", gps),
+        ("gps_longitude", gps),
+        ("gps_altitude", gps),
+        ("camera_model_name", category),
+        ("make", category),
+    ])
+
+
+def open_writer(path: str | Path, export_format: str) -> ShotWriter:
+    """
+    Open the writer of an export format.
+
+    Raises:
+        ValueError: If the format is not one of EXPORT_FORMATS
+        ImportError: If the format is columnar and pyarrow is not installed
+    """
+    if export_format == "ndjson":
+        return NDJSONShotWriter(path)
+    if export_format in EXPORT_FORMATS:
+        return ArrowShotWriter(path, export_format)
+    raise ValueError(f"Unknown export format {export_format}, expected one of {', '.join(EXPORT_FORMATS)}")
+
+
+def export_shots(
+    shots: Iterable[ORMTikeeShot], writer: ShotWriter, batch_rows: int = EXPORT_BATCH_ROWS
+) -> ExportReport:
+    """
+    Write shots in batches as they are iterated, then close the writer.
+
+    Args:
+        shots (Iterable[ORMTikeeShot]): The shots, usually a lazy ShotIterator of the service.
+        writer (ShotWriter): The writer of the export file, closed once every shot is written.
+        batch_rows (int): Number of shots held in memory and written at once.
+
+    Returns:
+        ExportReport: The number of rows and batches written, the size of the file and the duration.
+    """
+    if batch_rows < 1:
+        raise ValueError("batch_rows must be a positive integer")
+    report = ExportReport()
+    start = time.perf_counter()
+    shots = iter(shots)
+    try:
+        while batch := list(islice(shots, batch_rows)):
+            writer.write(batch)
+            report.rows += len(batch)
+            report.batches += 1
+    finally:
+        writer.close()
+    report.elapsed_s = time.perf_counter() - start
+    report.bytes_written = writer.path.stat().st_size
+    return report
+
+
+def _json_value(value: Any) -> Any:
+    """Convert a field value to its JSON value, as model_dump_json would"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def _utc_naive(value: datetime | None) -> datetime | None:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _column_converters(pa) -> dict[str, Callable[[Any, list], Any]]:
+    """Build, per column, the function converting the values of a batch to an Arrow array of the column type"""
+    def plain(arrow_type, values):
+        return pa.array(values, arrow_type)
+
+    def category(arrow_type, values):
+        return pa.array(values, pa.string()).dictionary_encode().cast(arrow_type)
+
+    def enum(arrow_type, values):
+        return category(arrow_type, [None if value is None else value.value for value in values])
+
+    def uuid(arrow_type, values):
+        storage = pa.array([None if value is None else value.bytes for value in values], pa.binary(16))
+        return pa.ExtensionArray.from_storage(arrow_type, storage)
+
+    def timestamp(arrow_type, values):
+        return pa.array([_utc_naive(value) for value in values], arrow_type)
+
+    return {
+        **{name: plain for name in EXPORT_FIELDS},
+        "camera_id": uuid,
+        "side": enum,
+        "resolution": category,
+        "camera_model_name": category,
+        "make": category,
+        "shooting_date": timestamp,
+    }
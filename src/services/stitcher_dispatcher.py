@@ -0,0 +1,89 @@
+"""Dispatch completed pairs of shots to the stitcher lambda, in batches and off the request path"""
+
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from src.constants.constants import LAMBDA_STITCHER, AWS_REGION, AWS_ACCOUNT_ID
+from src.model.orm.orm_modelling import ORMTikeeShot
+from src.services.aws_clients import get_client
+
+# An asynchronous invocation payload is limited to 256 KB, a pair takes about 200 bytes
+MAX_PAIRS_PER_PAYLOAD = 500
+
+# Shared by the invocations of a warm Lambda container, its thread is started on the first dispatch
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stitcher-dispatcher")
+
+
+class StitcherDispatcher:
+    """
+    Collect the pairs completed during an invocation and send them to the stitcher lambda.
+
+    Pairs are sent as one payload {"body": {"pairs": [{"left_side_s3_path", "right_side_s3_path"}]}},
+    by a background worker: the handler keeps processing while the stitcher is invoked, and only
+    waits for the invocations once, when flushing the dispatcher before returning.
+    """
+
+    def __init__(self, function_name: str | None = None, max_pairs_per_payload: int = MAX_PAIRS_PER_PAYLOAD):
+        """
+        Instanciate a dispatcher with no pending pair
+
+        Args:
+            function_name (str | None): The stitcher lambda to invoke, LAMBDA_STITCHER of the account if None.
+            max_pairs_per_payload (int): Number of pairs above which a payload is sent without waiting for the flush.
+        """
+        self.function_name = function_name or f"arn:aws:lambda:{AWS_REGION}:{AWS_ACCOUNT_ID}:function:{LAMBDA_STITCHER}"
+        self.max_pairs_per_payload = max_pairs_per_payload
+        self._lock = threading.Lock()
+        self._pairs: list[dict[str, str]] = []
+        self._futures: list[Future] = []
+
+    def add(self, left_side: ORMTikeeShot, right_side: ORMTikeeShot) -> None:
+        """Queue a completed pair, sending the pending pairs once the payload is full"""
+        with self._lock:
+            self._pairs.append({
+                "left_side_s3_path": left_side.build_s3_path(),
+                "right_side_s3_path": right_side.build_s3_path(),
+            })
+            if len(self._pairs) >= self.max_pairs_per_payload:
+                self._submit()
+
+    def dispatch(self) -> None:
+        """Send the pending pairs in the background, without waiting for the invocation"""
+        with self._lock:
+            self._submit()
+
+    def flush(self) -> int:
+        """
+        Send the pending pairs and wait for every invocation of this dispatcher.
+
+        Returns:
+            int: The number of pairs sent since the last flush.
+
+        Raises:
+            Exception: The error of the first failed invocation, once all of them are over
+        """
+        with self._lock:
+            self._submit()
+            futures, self._futures = self._futures, []
+        errors = [future.exception() for future in futures]
+        for error in errors:
+            if error is not None:
+                raise error
+        return sum(future.result() for future in futures)
+
+    def _submit(self) -> None:
+        """Hand the pending pairs to the background worker, the lock being held"""
+        if not self._pairs:
+            return
+        pairs, self._pairs = self._pairs, []
+        self._futures.append(_executor.submit(self._invoke, pairs))
+
+    def _invoke(self, pairs: list[dict[str, str]]) -> int:
+        """Asynchronously invoke the stitcher lambda on pairs and return their number"""
+        get_client("lambda").invoke(
+            FunctionName=self.function_name,
+            InvocationType="Event",
+            Payload=json.dumps({"body": {"pairs": pairs}}),
+        )
+        return len(pairs)
@@ -1,94 +1,823 @@
 """Provide CRUD services for tikee shots object"""
 
-import boto3
 import src.constants.constants as constants
-import json
+import time
+from datetime import datetime
+from typing import Callable
 from uuid import UUID
 
 from src.model.business.business_modelling import NewTikeeShot, TikeeShotSide
-from src.model.orm.orm_modelling import ORMTikeeShot, ORMTikeeShotIdentifier
-from src.constants.constants import AWS_REGION
+from src.model.orm.orm_modelling import ORMSequenceSummary, ORMTikeeShot, ORMTikeeShotIdentifier
+from src.model.orm.dynamodb_codec import ORM_SEQUENCE_SUMMARY_CODEC, ORM_TIKEE_SHOT_CODEC, encode_datetime, encode_key
+from src.model.orm.key_codec import encode_photo_index, encode_pk, encode_sk
+from src.services import metrics
+from src.services.aws_clients import get_client
+from src.services.pagination import ShotIterator
+from src.services.shot_cache import ShotCache
+from src.services.parallel_scan import ScanCheckpoint, parallel_scan
 
+BATCH_WRITE_CHUNK_SIZE = 25
+BATCH_GET_CHUNK_SIZE = 100
+BATCH_MAX_ATTEMPTS = 5
+BATCH_RETRY_BASE_DELAY = 0.05
+TABLE_KEY_ATTRIBUTES = ("PK", "SK")
+CAMERA_INDEX_KEY_ATTRIBUTES = ("camera_id", "PK", "SK")
+SHOOTING_DATE_INDEX_KEY_ATTRIBUTES = ("PK", "SK", "shooting_date")
+# Pair records live in their own partitions, out of the sequence queries and the camera_id index
+PAIR_PK_PREFIX = "PAIR#"
+# Sequence summaries too, one item per sequence
+SUMMARY_PK_PREFIX = "SUMMARY#"
+SUMMARY_SK = "SUMMARY"
 
 class TikeeShotServices:
     """Class used to store method for CRUD for tikee shots"""
 
-    def __init__(self):
-        """Instanciate a TikeeShotService object storing table in which to write"""
+    def __init__(self, trusted_hydration: bool = False, cache: ShotCache | None = None):
+        """
+        Instanciate a TikeeShotService object storing table in which to write
+
+        Args:
+            trusted_hydration (bool): Build the shots read from DB without validating them, as they
+                were written by this service. Every read method can override it with its trusted argument.
+            cache (ShotCache | None): Cache of the shots read by key and by photo index, and of the shots
+                created, usually shared by the invocations of a warm container. Reads with consistent=True
+                bypass it and refresh it.
+        """
         self.table_name = constants.DDB_TABLE_NAME
-        dynamodb = boto3.resource("dynamodb", AWS_REGION)
-        self.tikee_shot_table = dynamodb.Table(constants.DDB_TABLE_NAME)
+        self.trusted_hydration = trusted_hydration
+        self.cache = cache
+        # Low-level client: items are converted by ORM_TIKEE_SHOT_CODEC, without boto3's serializer
+        self.client = get_client("dynamodb")
 
+    @metrics.timed("TikeeShotServices.create")
     def create(self, new_tikee_shot: NewTikeeShot) -> ORMTikeeShot:
         """
-        Persist a tikeeshot in DB.
+        Persist a tikeeshot in DB and add it to the summary of its sequence.
         If a shot already exists with another side, check same resolution
+
+        The summary is updated once the shot is written: if the update fails, the shot is not counted,
+        and a retry of the request finds the shot written already and adds nothing, the summary drifting
+        until rebuilt. create_with_pairing_check updates it within the write.
+
+        The shot is not registered on its pair: callers counting or stitching pairs call register_side
+        once the shot is written, completed_pairs of the summary only counting the registered pairs.
         """
 
-        orm_tikee_shot = new_tikee_shot.to_orm()
-        dict_tikee_shot = orm_tikee_shot.model_dump_json(by_alias=True,exclude_none=True,exclude_unset=True)
-        self.tikee_shot_table.put_item(Item=json.loads(dict_tikee_shot))
+        with metrics.stage("to_orm"):
+            orm_tikee_shot = new_tikee_shot.to_orm()
+        response = self.client.put_item(
+            TableName=self.table_name, Item=ORM_TIKEE_SHOT_CODEC.encode(orm_tikee_shot), ReturnValues="ALL_OLD"
+        )
+        self._cache_created(orm_tikee_shot)
+        self._update_summaries([(orm_tikee_shot, self._previous_file_size(response.get("Attributes")))])
         return orm_tikee_shot
 
-    def get_tikee_shot_by_id(
-        self, orm_tikee_shot_identifier: ORMTikeeShotIdentifier
-    ) -> ORMTikeeShot | None:
-        """Get a tikee shot by Id"""
-        response_db = self.tikee_shot_table.get_item(
-            Key={"PK": orm_tikee_shot_identifier.PK, "SK": orm_tikee_shot_identifier.SK}
-        )
-        if "Item" in response_db:
-            item = response_db["Item"]
-            orm_tikee_shot = ORMTikeeShot(**item)
+    @metrics.timed("TikeeShotServices.create_with_pairing_check")
+    def create_with_pairing_check(self, new_tikee_shot: NewTikeeShot) -> ORMTikeeShot:
+        """
+        Persist a tikee shot if its opposite side, when it exists, has the same resolution.
+
+        The rule is enforced by DynamoDB: the shot is written in a transaction guarded by a
+        condition check on the opposite side, absent or of the same resolution, so two mismatched
+        sides arriving at the same time cannot both be written. Either side is written in one round
+        trip; a failed check refuses a mismatch. The opposite side is not read: callers needing it,
+        to stitch the pair, read it once register_side claims the complete pair. A stitched shot
+        has no opposite side: its transaction only holds the put.
+
+        The shot is also added to the summary of its sequence, by an update of the same transaction:
+        the counters cannot miss a written shot. A shot written again is only counted once: the put is
+        conditioned on the shot being new, a failed condition returning the previous version, which
+        is then overwritten only as long as it is the one found. The shooting dates of the summary are
+        then moved by conditional updates, which a retry sends again. The shot is not registered on
+        its pair, see create.
+
+        Returns:
+            ORMTikeeShot: The persisted shot.
+
+        Raises:
+            ValueError: If the opposite side does not have the same resolution
+        """
+        with metrics.stage("to_orm"):
+            orm_tikee_shot = new_tikee_shot.to_orm()
+        opposite_side = orm_tikee_shot.side.opposite_side()
+        # A stitched shot is its own opposite side: a transaction cannot check and put the same item
+        checks_opposite = opposite_side != orm_tikee_shot.side
+        check = {
+            "ConditionCheck": {
+                "TableName": self.table_name,
+                "Key": encode_key(orm_tikee_shot.PK, encode_sk(orm_tikee_shot.photo_index, opposite_side)),
+                "ConditionExpression": "attribute_not_exists(PK) OR resolution = :resolution",
+                "ExpressionAttributeValues": {":resolution": {"S": orm_tikee_shot.resolution}},
+            }
+        }
+        item = ORM_TIKEE_SHOT_CODEC.encode(orm_tikee_shot)
+        previous_file_size = None
+        put_condition = {"ConditionExpression": "attribute_not_exists(PK)"}
+        for attempt in range(BATCH_MAX_ATTEMPTS):
+            put = {
+                "Put": {
+                    "TableName": self.table_name,
+                    "Item": item,
+                    "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+                    **put_condition,
+                }
+            }
+            summary_update, = self._summary_updates(self.table_name, [(orm_tikee_shot, previous_file_size)])
+            transact_items = [put, {"Update": summary_update}]
+            if checks_opposite:
+                transact_items.insert(0, check)
+            try:
+                self.client.transact_write_items(TransactItems=transact_items)
+            except self.client.exceptions.TransactionCanceledException as e:
+                reasons = e.response.get("CancellationReasons", [])
+                reason = reasons[0] if checks_opposite and reasons else {}
+                put_index = int(checks_opposite)
+                put_reason = reasons[put_index] if len(reasons) > put_index else {}
+                if reason.get("Code") == "ConditionalCheckFailed":
+                    raise ValueError(
+                        f"Resolution mismatch: The other side does not have the same resolution for camera {orm_tikee_shot.camera_id}."
+                    )
+                if put_reason.get("Code") != "ConditionalCheckFailed":
+                    # Conflict with a concurrent transaction on one of the two shots
+                    time.sleep(BATCH_RETRY_BASE_DELAY * 2 ** attempt)
+                    continue
+                # The shot exists, or no longer is the version found by the previous attempt
+                previous_file_size = self._previous_file_size(put_reason.get("Item"))
+                put_condition = {"ConditionExpression": "attribute_not_exists(PK)"}
+                if previous_file_size is not None:
+                    put_condition = {
+                        "ConditionExpression": "file_size = :previous_file_size",
+                        "ExpressionAttributeValues": {":previous_file_size": put_reason["Item"]["file_size"]},
+                    }
+                continue
+            self._cache_created(orm_tikee_shot)
+            for date_request in self._summary_date_updates(self.table_name, summary_update):
+                try:
+                    self.client.update_item(**date_request)
+                except self.client.exceptions.ConditionalCheckFailedException:
+                    # The date is already further
+                    pass
             return orm_tikee_shot
-        else:
+        raise RuntimeError("TransactWriteItems kept being cancelled")
+
+    @metrics.timed("TikeeShotServices.register_side")
+    def register_side(self, orm_tikee_shot: ORMTikeeShot, claim: bool = True) -> bool:
+        """
+        Record a persisted side on the pair record of its photo index, and claim the dispatch of the pair once complete.
+
+        The side is added to the pair record with an atomic ADD, which returns the record as it was:
+        among concurrent or repeated registrations, only the one finding the opposite side alone
+        completes the pair, which is then counted once in the summary of the sequence. A complete pair
+        the stitcher was not dispatched for is then claimed by a conditional update setting a lease,
+        so concurrent registrations do not dispatch it twice. The claim is settled by mark_dispatched
+        once the stitcher is invoked, or by release_dispatch when it could not be: a registration
+        retried after a failed dispatch claims the pair again.
+
+        Args:
+            orm_tikee_shot (ORMTikeeShot): The persisted shot.
+            claim (bool): Claim the dispatch of the complete pair, False to only record the side.
+
+        Returns:
+            bool: True if this registration claimed the dispatch of the pair.
+        """
+        side = TikeeShotSide(orm_tikee_shot.side)
+        if side not in (TikeeShotSide.LEFT, TikeeShotSide.RIGHT):
+            return False
+        response = self.client.update_item(
+            TableName=self.table_name,
+            Key=self._pair_key(orm_tikee_shot),
+            UpdateExpression="ADD sides :side",
+            ExpressionAttributeValues={":side": {"SS": [side.value]}},
+            ReturnValues="ALL_OLD",
+        )
+        pair_record = response.get("Attributes", {})
+        previous_sides = pair_record.get("sides", {}).get("SS", [])
+        if previous_sides == [side.opposite_side().value]:
+            self.client.update_item(
+                TableName=self.table_name,
+                Key=self._summary_key(orm_tikee_shot.PK),
+                UpdateExpression="ADD completed_pairs :one",
+                ExpressionAttributeValues={":one": {"N": "1"}},
+            )
+        elif side.opposite_side().value not in previous_sides or "dispatched" in pair_record:
+            return False
+        if not claim:
+            return False
+        now = time.time()
+        try:
+            self.client.update_item(
+                TableName=self.table_name,
+                Key=self._pair_key(orm_tikee_shot),
+                UpdateExpression="SET dispatch_lease = :lease",
+                ConditionExpression=(
+                    "attribute_not_exists(dispatched) "
+                    "AND (attribute_not_exists(dispatch_lease) OR dispatch_lease < :now)"
+                ),
+                ExpressionAttributeValues={
+                    ":lease": {"N": str(now + constants.STITCHER_DISPATCH_LEASE)},
+                    ":now": {"N": str(now)},
+                },
+            )
+        except self.client.exceptions.ConditionalCheckFailedException:
+            # Dispatched meanwhile, or claimed by a concurrent registration
+            return False
+        return True
+
+    @metrics.timed("TikeeShotServices.mark_dispatched")
+    def mark_dispatched(self, orm_tikee_shot: ORMTikeeShot) -> None:
+        """Record that the stitcher was invoked on the pair of a shot, whose dispatch was claimed by register_side"""
+        self.client.update_item(
+            TableName=self.table_name,
+            Key=self._pair_key(orm_tikee_shot),
+            UpdateExpression="SET dispatched = :dispatched REMOVE dispatch_lease",
+            ExpressionAttributeValues={":dispatched": {"BOOL": True}},
+        )
+
+    @metrics.timed("TikeeShotServices.release_dispatch")
+    def release_dispatch(self, orm_tikee_shot: ORMTikeeShot) -> None:
+        """Release the dispatch of the pair of a shot claimed by register_side, the stitcher invocation having failed"""
+        self.client.update_item(
+            TableName=self.table_name,
+            Key=self._pair_key(orm_tikee_shot),
+            UpdateExpression="REMOVE dispatch_lease",
+        )
+
+    @metrics.timed("TikeeShotServices.create_many")
+    def create_many(
+        self, new_tikee_shots: list[NewTikeeShot]
+    ) -> tuple[list[ORMTikeeShot], list[ORMTikeeShot]]:
+        """
+        Persist several tikee shots in DB with BatchWriteItem, 25 items per request.
+        Items left in UnprocessedItems are retried with an exponential backoff; the ones
+        still unprocessed after the last attempt are reported as failed instead of raising.
+        BatchWriteItem does not return the items it overwrites: their file sizes are read
+        beforehand, so the summaries of the sequences count shots written again only once.
+        The summaries are updated once the shots are written, and drift if that fails, see create.
+        The shots are not registered on their pairs, see create.
+
+        Returns:
+            tuple[list[ORMTikeeShot], list[ORMTikeeShot]]: The persisted shots and the shots
+            DynamoDB could not write.
+        """
+        # BatchWriteItem rejects a request holding the same key twice: the last shot wins,
+        # as it would with successive put_item calls
+        items_by_key: dict[tuple[str, str], tuple[ORMTikeeShot, dict]] = {}
+        for new_tikee_shot in new_tikee_shots:
+            orm_tikee_shot = new_tikee_shot.to_orm()
+            item = ORM_TIKEE_SHOT_CODEC.encode(orm_tikee_shot)
+            items_by_key[(orm_tikee_shot.PK, orm_tikee_shot.SK)] = (orm_tikee_shot, item)
+
+        entries = list(items_by_key.items())
+        previous_file_sizes = {
+            (previous.PK, previous.SK): previous.file_size
+            for previous in self.get_tikee_shots_by_ids(
+                [orm for orm, _ in items_by_key.values()], fields=["file_size"], consistent=True
+            )
+        }
+        failed_keys: set[tuple[str, str]] = set()
+        for start in range(0, len(entries), BATCH_WRITE_CHUNK_SIZE):
+            chunk = entries[start:start + BATCH_WRITE_CHUNK_SIZE]
+            requests = [{"PutRequest": {"Item": item}} for _, (_, item) in chunk]
+            unprocessed = self._batch_write(requests)
+            failed_keys.update(
+                (request["PutRequest"]["Item"]["PK"]["S"], request["PutRequest"]["Item"]["SK"]["S"])
+                for request in unprocessed
+            )
+
+        created = [orm for key, (orm, _) in entries if key not in failed_keys]
+        failed = [orm for key, (orm, _) in entries if key in failed_keys]
+        for orm_tikee_shot in created:
+            self._cache_created(orm_tikee_shot)
+        self._update_summaries([
+            (orm_tikee_shot, previous_file_sizes.get((orm_tikee_shot.PK, orm_tikee_shot.SK)))
+            for orm_tikee_shot in created
+        ])
+        return created, failed
+
+    def _batch_write(self, requests: list[dict]) -> list[dict]:
+        """Send one BatchWriteItem request and retry its unprocessed items, return the ones left"""
+        for attempt in range(BATCH_MAX_ATTEMPTS):
+            response = self.client.batch_write_item(RequestItems={self.table_name: requests})
+            requests = response.get("UnprocessedItems", {}).get(self.table_name, [])
+            if not requests:
+                return []
+            time.sleep(BATCH_RETRY_BASE_DELAY * 2 ** attempt)
+        return requests
+
+    def _update_summaries(self, written_shots: list[tuple[ORMTikeeShot, int | None]]) -> None:
+        """Add written shots to the summaries of their sequences, with one UpdateItem per sequence, see _summary_updates"""
+        for request in self._summary_updates(self.table_name, written_shots):
+            summary = self.client.update_item(**request, ReturnValues="ALL_NEW")["Attributes"]
+            for date_request in self._summary_date_updates(self.table_name, request, summary):
+                try:
+                    self.client.update_item(**date_request)
+                except self.client.exceptions.ConditionalCheckFailedException:
+                    # A concurrent write moved the date further already
+                    pass
+
+    @classmethod
+    def _summary_updates(cls, table_name: str, written_shots: list[tuple[ORMTikeeShot, int | None]]) -> list[dict]:
+        """
+        Build the UpdateItem requests adding written shots to the summaries of their sequences, one per sequence.
+
+        Counters are increased by atomic ADDs, a shot overwriting a previous version (whose file size is
+        given, None for a new shot) only adding its change of file size. Shooting dates are compared as
+        stored, ISO 8601 strings: they are set if absent, the summary returned with ReturnValues=ALL_NEW
+        then telling whether a conditional update must still lower the first one or raise the last one,
+        see _summary_date_updates.
+        """
+        summaries: dict[str, tuple[int, int, str, str]] = {}
+        for orm_tikee_shot, previous_file_size in written_shots:
+            shooting_date = encode_datetime(orm_tikee_shot.shooting_date)
+            shot_count, total_file_size, first, last = summaries.get(
+                orm_tikee_shot.PK, (0, 0, shooting_date, shooting_date)
+            )
+            summaries[orm_tikee_shot.PK] = (
+                shot_count + (previous_file_size is None),
+                total_file_size + orm_tikee_shot.file_size - (previous_file_size or 0),
+                min(first, shooting_date),
+                max(last, shooting_date),
+            )
+        return [
+            {
+                "TableName": table_name,
+                "Key": cls._summary_key(pk),
+                "UpdateExpression": (
+                    "ADD shot_count :shot_count, total_file_size :total_file_size "
+                    "SET first_shooting_date = if_not_exists(first_shooting_date, :first), "
+                    "last_shooting_date = if_not_exists(last_shooting_date, :last)"
+                ),
+                "ExpressionAttributeValues": {
+                    ":shot_count": {"N": str(shot_count)},
+                    ":total_file_size": {"N": str(total_file_size)},
+                    ":first": {"S": first},
+                    ":last": {"S": last},
+                },
+            }
+            for pk, (shot_count, total_file_size, first, last) in summaries.items()
+        ]
+
+    @staticmethod
+    def _summary_date_updates(table_name: str, summary_update: dict, summary: dict | None = None) -> list[dict]:
+        """
+        Build the conditional UpdateItem requests still moving the shooting dates of a summary, given the
+        summary returned by its update, both when it is unknown: a request fails its condition if the date
+        is already further.
+        """
+        def date_update(attribute: str, shooting_date: dict, comparison: str) -> dict:
+            return {
+                "TableName": table_name,
+                "Key": summary_update["Key"],
+                "UpdateExpression": f"SET {attribute} = :shooting_date",
+                "ConditionExpression": f"{attribute} {comparison} :shooting_date",
+                "ExpressionAttributeValues": {":shooting_date": shooting_date},
+            }
+
+        first = summary_update["ExpressionAttributeValues"][":first"]
+        last = summary_update["ExpressionAttributeValues"][":last"]
+        requests = []
+        if summary is None or summary["first_shooting_date"]["S"] > first["S"]:
+            requests.append(date_update("first_shooting_date", first, ">"))
+        if summary is None or summary["last_shooting_date"]["S"] < last["S"]:
+            requests.append(date_update("last_shooting_date", last, "<"))
+        return requests
+
+    @staticmethod
+    def _summary_key(pk: str) -> dict[str, dict[str, str]]:
+        return encode_key(f"{SUMMARY_PK_PREFIX}{pk}", SUMMARY_SK)
+
+    @staticmethod
+    def _pair_key(orm_tikee_shot: ORMTikeeShot) -> dict[str, dict[str, str]]:
+        return encode_key(f"{PAIR_PK_PREFIX}{orm_tikee_shot.PK}", encode_sk(orm_tikee_shot.photo_index, None))
+
+    @staticmethod
+    def _previous_file_size(item: dict | None) -> int | None:
+        """Return the file size of the previous version of a shot, None if the shot was new"""
+        if not item:
+            return None
+        return ORM_TIKEE_SHOT_CODEC.decode_fields({"file_size": item["file_size"]})["file_size"]
+
+    @metrics.timed("TikeeShotServices.get_sequence_summary")
+    def get_sequence_summary(self, uuid: UUID, sequence: str, consistent: bool = False) -> ORMSequenceSummary | None:
+        """
+        Get the shot count, total file size, first and last shooting dates and completed pairs of a
+        sequence in one read, None if no shot of the sequence was written. Completed pairs only count
+        the pairs whose sides were registered with register_side.
+        """
+        request = {"TableName": self.table_name, "Key": self._summary_key(self.build_pk(uuid, sequence))}
+        if consistent:
+            request["ConsistentRead"] = True
+        response_db = self.client.get_item(**request)
+        if "Item" not in response_db:
             return None
+        return ORM_SEQUENCE_SUMMARY_CODEC.decode(response_db["Item"])
 
-    def get_tikee_shot_of_camera_by_id(self, uuid: UUID) -> list[ORMTikeeShot]:
-        """Retrieve all rows of tikee_shot_table with camera uuid"""
-        pk = str(uuid)
-        response = self.tikee_shot_table.scan(
-            FilterExpression=boto3.dynamodb.conditions.Key("PK").begins_with(pk)
+    @metrics.timed("TikeeShotServices.get_tikee_shot_by_id")
+    def get_tikee_shot_by_id(
+        self,
+        orm_tikee_shot_identifier: ORMTikeeShotIdentifier,
+        trusted: bool | None = None,
+        fields: list[str] | None = None,
+        consistent: bool = False,
+    ) -> ORMTikeeShot | None:
+        """Get a tikee shot by Id, from the cache unless consistent"""
+        return self._get_item(orm_tikee_shot_identifier.PK, orm_tikee_shot_identifier.SK, trusted, fields, consistent)
+
+    @metrics.timed("TikeeShotServices.get_tikee_shots_by_ids")
+    def get_tikee_shots_by_ids(
+        self,
+        orm_tikee_shot_identifiers: list[ORMTikeeShotIdentifier],
+        trusted: bool | None = None,
+        fields: list[str] | None = None,
+        consistent: bool = False,
+    ) -> list[ORMTikeeShot]:
+        """
+        Get several tikee shots by Id with BatchGetItem, missing shots are left out.
+        Shots found in the cache are not requested, unless consistent.
+        """
+        identifiers = {(identifier.PK, identifier.SK) for identifier in orm_tikee_shot_identifiers}
+        cached_shots = []
+        if self.cache is not None and not consistent:
+            for pk, sk in list(identifiers):
+                cached_shot = self.cache.get(("id", pk, sk))
+                if cached_shot is not None:
+                    cached_shots.append(cached_shot)
+                    identifiers.discard((pk, sk))
+        keys = [encode_key(pk, sk) for pk, sk in identifiers]
+        projection = self._projection(fields, TABLE_KEY_ATTRIBUTES)
+        if consistent:
+            projection["ConsistentRead"] = True
+        items = []
+        for start in range(0, len(keys), BATCH_GET_CHUNK_SIZE):
+            request = {self.table_name: {"Keys": keys[start:start + BATCH_GET_CHUNK_SIZE], **projection}}
+            for attempt in range(BATCH_MAX_ATTEMPTS):
+                response = self.client.batch_get_item(RequestItems=request)
+                items.extend(response.get("Responses", {}).get(self.table_name, []))
+                request = response.get("UnprocessedKeys", {})
+                if not request:
+                    break
+                time.sleep(BATCH_RETRY_BASE_DELAY * 2 ** attempt)
+            else:
+                raise RuntimeError("BatchGetItem kept returning unprocessed keys")
+        tikee_shots = [self._hydrate(item, trusted, fields) for item in items]
+        if self.cache is not None and fields is None:
+            for orm_tikee_shot in tikee_shots:
+                self.cache.put(("id", orm_tikee_shot.PK, orm_tikee_shot.SK), orm_tikee_shot)
+        return cached_shots + tikee_shots
+
+    @metrics.timed("TikeeShotServices.get_tikee_shot_of_camera_by_id")
+    def get_tikee_shot_of_camera_by_id(
+        self, uuid: UUID, trusted: bool | None = None, fields: list[str] | None = None
+    ) -> list[ORMTikeeShot]:
+        """Retrieve all rows of tikee_shot_table with camera uuid, through the camera_id index"""
+        return list(self.iter_tikee_shot_of_camera_by_id(uuid, trusted=trusted, fields=fields))
+
+    def iter_tikee_shot_of_camera_by_id(
+        self,
+        uuid: UUID,
+        page_size: int | None = None,
+        cursor: str | None = None,
+        trusted: bool | None = None,
+        fields: list[str] | None = None,
+    ) -> ShotIterator:
+        """Lazily iterate over the shots of a camera, page by page, through the camera_id index"""
+        return self._iter_query(
+            {
+                "IndexName": constants.DDB_CAMERA_INDEX_NAME,
+                "KeyConditionExpression": "camera_id = :camera_id",
+                "ExpressionAttributeValues": {":camera_id": {"S": str(uuid)}},
+            },
+            CAMERA_INDEX_KEY_ATTRIBUTES,
+            page_size,
+            cursor,
+            trusted,
+            fields,
         )
-        items = response.get("Items", [])
-        return [ORMTikeeShot(**item) for item in items]
 
+    @metrics.timed("TikeeShotServices.get_tikee_shot_of_sequence")
     def get_tikee_shot_of_sequence(
-        self, uuid: UUID, sequence: str
+        self, uuid: UUID, sequence: str, trusted: bool | None = None, fields: list[str] | None = None
     ) -> list[ORMTikeeShot]:
+        return list(self.iter_tikee_shot_of_sequence(uuid, sequence, trusted=trusted, fields=fields))
+
+    def iter_tikee_shot_of_sequence(
+        self,
+        uuid: UUID,
+        sequence: str,
+        page_size: int | None = None,
+        cursor: str | None = None,
+        trusted: bool | None = None,
+        fields: list[str] | None = None,
+    ) -> ShotIterator:
+        """Lazily iterate over the shots of a sequence, page by page"""
         pk = self.build_pk(uuid, sequence)
-        response = self.tikee_shot_table.query(
-            KeyConditionExpression=boto3.dynamodb.conditions.Key("PK").eq(pk)
+        return self._iter_query(
+            {
+                "KeyConditionExpression": "PK = :pk",
+                "ExpressionAttributeValues": {":pk": {"S": pk}},
+            },
+            TABLE_KEY_ATTRIBUTES,
+            page_size,
+            cursor,
+            trusted,
+            fields,
         )
-        items = response.get("Items", [])
-        return [ORMTikeeShot(**item) for item in items]
-    
-    def get_tikee_shot_of_photo_index(self, uuid: UUID, sequence: str, photo_index: int | None):
+
+    @metrics.timed("TikeeShotServices.get_tikee_shots_in_index_range")
+    def get_tikee_shots_in_index_range(
+        self,
+        uuid: UUID,
+        sequence: str,
+        start: int,
+        stop: int,
+        trusted: bool | None = None,
+        fields: list[str] | None = None,
+    ) -> list[ORMTikeeShot]:
+        """Retrieve the shots of a sequence whose photo index is in range(start, stop)"""
+        return list(self.iter_tikee_shots_in_index_range(uuid, sequence, start, stop, trusted=trusted, fields=fields))
+
+    def iter_tikee_shots_in_index_range(
+        self,
+        uuid: UUID,
+        sequence: str,
+        start: int,
+        stop: int,
+        page_size: int | None = None,
+        cursor: str | None = None,
+        trusted: bool | None = None,
+        fields: list[str] | None = None,
+    ) -> ShotIterator:
+        """
+        Lazily iterate over the shots of a sequence whose photo index is in range(start, stop), page by page.
+
+        SKs sort numerically: a single key condition reads the range in photo index order. The bounds
+        are bare encoded indexes, the SKs of start sorting after the first one and the SKs of stop after
+        the second one.
+
+        Raises:
+            ValueError: If start is negative or not lower than stop
+        """
+        if not 0 <= start < stop:
+            raise ValueError(f"Invalid photo index range: {start} to {stop}")
+        pk = self.build_pk(uuid, sequence)
+        return self._iter_query(
+            {
+                "KeyConditionExpression": "PK = :pk AND SK BETWEEN :start AND :stop",
+                "ExpressionAttributeValues": {
+                    ":pk": {"S": pk},
+                    ":start": {"S": encode_photo_index(start)},
+                    ":stop": {"S": encode_photo_index(stop)},
+                },
+            },
+            TABLE_KEY_ATTRIBUTES,
+            page_size,
+            cursor,
+            trusted,
+            fields,
+        )
+
+    @metrics.timed("TikeeShotServices.get_tikee_shots_between")
+    def get_tikee_shots_between(
+        self,
+        uuid: UUID,
+        sequence: str,
+        start: datetime,
+        end: datetime,
+        trusted: bool | None = None,
+        fields: list[str] | None = None,
+    ) -> list[ORMTikeeShot]:
+        """Retrieve the shots of a sequence shot between start and end, both included, by shooting date"""
+        return list(self.iter_tikee_shots_between(uuid, sequence, start, end, trusted=trusted, fields=fields))
+
+    def iter_tikee_shots_between(
+        self,
+        uuid: UUID,
+        sequence: str,
+        start: datetime,
+        end: datetime,
+        page_size: int | None = None,
+        cursor: str | None = None,
+        trusted: bool | None = None,
+        fields: list[str] | None = None,
+    ) -> ShotIterator:
+        """
+        Lazily iterate over the shots of a sequence shot between start and end, both included, page by page.
+
+        The shots are read in shooting date order through the shooting_date local index, only the ones
+        of the time window being read. Dates are compared as encoded by encode_datetime: the window
+        must be naive for shots with naive shooting dates, and timezone-aware for aware ones.
+        """
+        pk = self.build_pk(uuid, sequence)
+        return self._iter_query(
+            {
+                "IndexName": constants.DDB_SHOOTING_DATE_INDEX_NAME,
+                "KeyConditionExpression": "PK = :pk AND shooting_date BETWEEN :start AND :end",
+                "ExpressionAttributeValues": {
+                    ":pk": {"S": pk},
+                    ":start": {"S": encode_datetime(start)},
+                    ":end": {"S": encode_datetime(end)},
+                },
+            },
+            SHOOTING_DATE_INDEX_KEY_ATTRIBUTES,
+            page_size,
+            cursor,
+            trusted,
+            fields,
+        )
+
+    @metrics.timed("TikeeShotServices.get_tikee_shot_of_photo_index")
+    def get_tikee_shot_of_photo_index(
+        self,
+        uuid: UUID,
+        sequence: str,
+        photo_index: int | None,
+        trusted: bool | None = None,
+        fields: list[str] | None = None,
+        consistent: bool = False,
+    ):
+        """Retrieve the shots of a photo index, from the cache unless consistent"""
+        key = ("photo_index", self.build_pk(uuid, sequence), self.build_sk(photo_index, None))
+        if self.cache is not None and not consistent:
+            cached_shots = self.cache.get(key)
+            if cached_shots is not None:
+                return list(cached_shots)
+        tikee_shots = list(self.iter_tikee_shot_of_photo_index(
+            uuid, sequence, photo_index, trusted=trusted, fields=fields, consistent=consistent
+        ))
+        if self.cache is not None and fields is None:
+            self.cache.put(key, tuple(tikee_shots))
+            for orm_tikee_shot in tikee_shots:
+                self.cache.put(("id", orm_tikee_shot.PK, orm_tikee_shot.SK), orm_tikee_shot)
+        return tikee_shots
+
+    def iter_tikee_shot_of_photo_index(
+        self,
+        uuid: UUID,
+        sequence: str,
+        photo_index: int | None,
+        page_size: int | None = None,
+        cursor: str | None = None,
+        trusted: bool | None = None,
+        fields: list[str] | None = None,
+        consistent: bool = False,
+    ) -> ShotIterator:
+        """Lazily iterate over the shots of a photo index, page by page"""
         pk = self.build_pk(uuid, sequence)
         sk = self.build_sk(photo_index, None)
-        response = self.tikee_shot_table.query(
-            KeyConditionExpression=boto3.dynamodb.conditions.Key("PK").eq(pk) & boto3.dynamodb.conditions.Key("SK").begins_with(sk)
+        return self._iter_query(
+            {
+                "KeyConditionExpression": "PK = :pk AND begins_with(SK, :sk)",
+                "ExpressionAttributeValues": {":pk": {"S": pk}, ":sk": {"S": sk}},
+                **({"ConsistentRead": True} if consistent else {}),
+            },
+            TABLE_KEY_ATTRIBUTES,
+            page_size,
+            cursor,
+            trusted,
+            fields,
+        )
+
+    def _iter_query(
+        self,
+        query_kwargs: dict,
+        key_attributes: tuple[str, ...],
+        page_size: int | None,
+        cursor: str | None,
+        trusted: bool | None,
+        fields: list[str] | None,
+    ) -> ShotIterator:
+        """Build a lazy iterator of ORMTikeeShot over a query of tikee_shot_table"""
+        return ShotIterator(
+            self.client.query,
+            dict(query_kwargs, TableName=self.table_name, **self._projection(fields, key_attributes)),
+            key_attributes,
+            lambda item: self._hydrate(item, trusted, fields),
+            page_size=page_size,
+            cursor=cursor,
         )
-        items = response.get("Items", [])
-        return [ORMTikeeShot(**item) for item in items]
 
+    @metrics.timed("TikeeShotServices.scan_tikee_shots")
+    def scan_tikee_shots(
+        self,
+        sink: Callable[[ORMTikeeShot | dict], None],
+        total_segments: int = 8,
+        max_workers: int | None = None,
+        hydrate: bool = True,
+        page_size: int | None = None,
+        checkpoint: ScanCheckpoint | None = None,
+        on_checkpoint: Callable[[ScanCheckpoint], None] | None = None,
+        trusted: bool | None = None,
+        fields: list[str] | None = None,
+    ) -> ScanCheckpoint:
+        """
+        Stream every row of tikee_shot_table to a sink with a parallel segmented scan.
+
+        Meant for fleet-wide maintenance jobs (audits, re-indexing, exports), see parallel_scan
+        for the guarantees on memory, sink calls and checkpoints.
+
+        Args:
+            sink: Function called with every shot, as an ORMTikeeShot or as a raw item.
+            total_segments: Number of segments the table is split into.
+            max_workers: Number of segments scanned concurrently, capped by the connection pool size if None.
+            hydrate: Hand ORMTikeeShot objects to the sink if True, raw items in low-level format otherwise.
+            page_size: Maximum number of items read per page, DynamoDB's 1 MB limit if None.
+            checkpoint: Checkpoint of a previous scan to resume.
+            on_checkpoint: Function called with the checkpoint after every page, to persist it.
+            trusted: Hydrate shots without validation, the service's trusted_hydration if None.
+            fields: Only read these fields (and the key), partial shots being built without validation.
+
+        Returns:
+            ScanCheckpoint: The checkpoint of the completed scan.
+        """
+        scan_kwargs = {
+            "TableName": self.table_name,
+            # Leave out the pair records, shots are the only items holding a camera_id
+            "FilterExpression": "attribute_exists(camera_id)",
+            **self._projection(fields, TABLE_KEY_ATTRIBUTES),
+        }
+        if page_size is not None:
+            scan_kwargs["Limit"] = page_size
+        return parallel_scan(
+            self.client.scan,
+            scan_kwargs,
+            (lambda item: sink(self._hydrate(item, trusted, fields))) if hydrate else sink,
+            total_segments,
+            max_workers=max_workers or min(total_segments, constants.AWS_MAX_POOL_CONNECTIONS),
+            checkpoint=checkpoint,
+            on_checkpoint=on_checkpoint,
+        )
+
+    @metrics.timed("TikeeShotServices.get_tikee_shot")
     def get_tikee_shot(
-        self, uuid: UUID, sequence: str, photo_index: int | None, side: TikeeShotSide
+        self,
+        uuid: UUID,
+        sequence: str,
+        photo_index: int | None,
+        side: TikeeShotSide,
+        trusted: bool | None = None,
+        fields: list[str] | None = None,
+        consistent: bool = False,
     ) -> ORMTikeeShot | None:
-        pk = self.build_pk(uuid, sequence)
-        sk = self.build_sk(photo_index, side)
-        response_db = self.tikee_shot_table.get_item(Key={"PK": pk, "SK": sk})
-        if "Item" in response_db:
-            item = response_db["Item"]
-            return ORMTikeeShot(**item)
-        return None
+        """Get a tikee shot by its camera, sequence, photo index and side, from the cache unless consistent"""
+        return self._get_item(
+            self.build_pk(uuid, sequence), self.build_sk(photo_index, side), trusted, fields, consistent
+        )
+
+    def _get_item(
+        self, pk: str, sk: str, trusted: bool | None, fields: list[str] | None, consistent: bool
+    ) -> ORMTikeeShot | None:
+        """Get a shot by key, from the cache unless consistent; missing shots are never cached"""
+        key = ("id", pk, sk)
+        if self.cache is not None and not consistent:
+            cached_shot = self.cache.get(key)
+            if cached_shot is not None:
+                return cached_shot
+        request = {
+            "TableName": self.table_name,
+            "Key": encode_key(pk, sk),
+            **self._projection(fields, TABLE_KEY_ATTRIBUTES),
+        }
+        if consistent:
+            request["ConsistentRead"] = True
+        response_db = self.client.get_item(**request)
+        if "Item" not in response_db:
+            return None
+        orm_tikee_shot = self._hydrate(response_db["Item"], trusted, fields)
+        if self.cache is not None and fields is None:
+            self.cache.put(key, orm_tikee_shot)
+        return orm_tikee_shot
+
+    def _cache_created(self, orm_tikee_shot: ORMTikeeShot) -> None:
+        """Cache a created shot, the cached shots of its photo index being out of date"""
+        if self.cache is None:
+            return
+        self.cache.put(("id", orm_tikee_shot.PK, orm_tikee_shot.SK), orm_tikee_shot)
+        self.cache.invalidate(("photo_index", orm_tikee_shot.PK, self.build_sk(orm_tikee_shot.photo_index, None)))
+
+    @staticmethod
+    def _projection(fields: list[str] | None, key_attributes: tuple[str, ...]) -> dict:
+        """
+        Build the ProjectionExpression reading only some fields of the shots.
+
+        The key attributes are always read: they identify partial shots and build resume cursors.
+        """
+        if fields is None:
+            return {}
+        return ORM_TIKEE_SHOT_CODEC.projection([*key_attributes, *fields])
+
+    def _hydrate(self, item: dict, trusted: bool | None, fields: list[str] | None = None) -> ORMTikeeShot:
+        """
+        Build a shot from an item, without validation if trusted (the service's default if None).
+        Partial shots read through a projection are never validated, their other fields are not set.
+        """
+        if fields is not None:
+            trusted = True
+        return ORM_TIKEE_SHOT_CODEC.decode(item, trusted=self.trusted_hydration if trusted is None else trusted)
 
     @staticmethod
     def build_pk(uuid: UUID, sequence: str) -> str:
-        return f"{str(uuid)}#{sequence}"
+        return encode_pk(uuid, sequence)
 
     @staticmethod
     def build_sk(photo_index: int | None, side: TikeeShotSide | None) -> str:
-        index = str(photo_index) if photo_index is not None else ""
-        photo_side = side.value if side is not None else ""
-        return f"{index}#{photo_side}"
+        return encode_sk(photo_index, side)
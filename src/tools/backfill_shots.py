@@ -0,0 +1,259 @@
+"""Register historical shots listed in a JSONL or CSV manifest, in bulk.
+
+Each manifest row holds the body lambda_create_shot would receive: s3_key, resolution, file_size,
+shooting_date and, for CSV, any other column as metadata (GPSLatitude, Make, ...). Rows are
+parsed and validated as NewTikeeShot by a pool of --processes processes, --chunk-rows rows per
+task, a side whose opposite side in the same chunk has another resolution being refused, then
+written by create_many: BatchWriteItem requests of 25 items, unprocessed items being retried. The
+left and right sides are registered on their pair records, without dispatching the stitcher, so
+the pairs completed later by live uploads are stitched as usual; a historical pair is only stitched
+if one of its sides is uploaded again. The resolutions of the two sides of a pair are not compared
+when they are in different chunks or one of them is already in the table: keep the sides of a
+photo next to each other in the manifest.
+
+Progress is saved to --checkpoint after every chunk: running the tool again with the same manifest
+resumes after the last chunk written. Invalid rows and rows DynamoDB could not write are reported
+to --errors, as JSON lines with their line number. --dry-run only validates the manifest.
+
+Usage: set -a; . ./.env; set +a; PYTHONPATH=. python -m src.tools.backfill_shots manifest.jsonl \
+    [--format jsonl|csv] [--processes 4] [--chunk-rows 1000] [--checkpoint backfill.json] \
+    [--errors errors.jsonl] [--dry-run]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from pydantic import BaseModel, Field, ValidationError
+
+import src.constants.constants as constants
+from src.model.base.base_modelling import TikeeShotSide
+from src.model.business.business_modelling import NewTikeeShot
+from src.services.tikee_shot_service import TikeeShotServices
+
+MANIFEST_FORMATS = ("jsonl", "csv")
+BACKFILL_CHUNK_ROWS = 1000
+# Manifest columns that are fields of NewTikeeShot, the other CSV columns are metadata
+SHOT_COLUMNS = ("s3_key", "resolution", "file_size", "shooting_date")
+# Concurrent registrations of sides on their pair records
+PAIR_REGISTRATION_THREADS = 16
+
+
+class BackfillCheckpoint(BaseModel):
+    """Progress of a backfill, persisted with model_dump_json to resume an interrupted backfill"""
+
+    manifest: str = Field(..., description="Path of the manifest being backfilled")
+    rows: int = Field(0, ge=0, description="Number of manifest rows handled, the backfill resumes after them")
+    written: int = Field(0, ge=0, description="Number of shots written")
+    invalid: int = Field(0, ge=0, description="Number of rows refused by the validation")
+    failed: int = Field(0, ge=0, description="Number of valid rows DynamoDB could not write")
+
+
+def read_manifest(path: str | Path, manifest_format: str | None = None) -> Iterator[tuple[int, str | dict]]:
+    """
+    Read the rows of a manifest lazily, with their line number.
+
+    JSON lines are read as is, parsed by validate_rows so that a malformed line is reported
+    as an invalid row; CSV rows are read as bodies.
+
+    Args:
+        path (str | Path): The manifest, JSON lines or CSV with a header.
+        manifest_format (str | None): jsonl or csv, from the file extension if None.
+
+    Raises:
+        ValueError: If the format cannot be told from the extension
+    """
+    path = Path(path)
+    manifest_format = manifest_format or {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(path.suffix)
+    if manifest_format not in MANIFEST_FORMATS:
+        raise ValueError(f"Cannot tell the format of the manifest {path}, expected one of {', '.join(MANIFEST_FORMATS)}")
+    with path.open("r", encoding="utf8", newline="") as file:
+        if manifest_format == "jsonl":
+            for line_number, line in enumerate(file, start=1):
+                if line.strip():
+                    yield line_number, line
+            return
+        reader = csv.DictReader(file)
+        for row in reader:
+            body = {column: row[column] for column in SHOT_COLUMNS if row.get(column)}
+            metadata = {column: value for column, value in row.items() if column not in SHOT_COLUMNS and value}
+            if metadata:
+                body["metadata"] = metadata
+            yield reader.line_num, body
+
+
+def validate_rows(
+    rows: list[tuple[int, str | dict]]
+) -> tuple[list[tuple[int, NewTikeeShot]], list[tuple[int, str]]]:
+    """
+    Parse and validate manifest rows as NewTikeeShot, return the valid shots and the errors, with their line numbers.
+
+    A left or right side is refused if its opposite side, accepted earlier in the rows, has another resolution.
+    """
+    shots = []
+    errors = []
+    resolutions: dict[tuple, str] = {}
+    for line_number, body in rows:
+        try:
+            if isinstance(body, str):
+                body = json.loads(body)
+            shot = NewTikeeShot(**body)
+        except (ValidationError, ValueError, TypeError) as e:
+            errors.append((line_number, str(e)))
+            continue
+        side = TikeeShotSide(shot.side)
+        photo = (shot.camera_id, shot.sequence, shot.photo_index)
+        # A stitched shot is its own opposite side
+        opposite = (*photo, side.opposite_side())
+        if side != side.opposite_side() and resolutions.get(opposite, shot.resolution) != shot.resolution:
+            errors.append((
+                line_number,
+                f"Resolution mismatch: The other side does not have the same resolution for camera {shot.camera_id}.",
+            ))
+            continue
+        resolutions[(*photo, side)] = shot.resolution
+        shots.append((line_number, shot))
+    return shots, errors
+
+
+def backfill(
+    rows: Iterable[tuple[int, str | dict]],
+    service: TikeeShotServices | None,
+    checkpoint: BackfillCheckpoint,
+    processes: int | None = None,
+    chunk_rows: int = BACKFILL_CHUNK_ROWS,
+    on_checkpoint: Callable[[BackfillCheckpoint], None] | None = None,
+    on_error: Callable[[int, str], None] | None = None,
+) -> BackfillCheckpoint:
+    """
+    Validate manifest rows in a process pool and write the valid shots, chunk by chunk, in manifest order.
+
+    The rows already handled by the checkpoint are skipped. At most two chunks per process are
+    read ahead of the one being written, so memory stays bounded whatever the manifest size.
+
+    Args:
+        rows (Iterable[tuple[int, str | dict]]): The manifest rows with their line number, see read_manifest.
+        service (TikeeShotServices | None): The service writing the shots, None to only validate them.
+        checkpoint (BackfillCheckpoint): The progress to resume from, updated as chunks are handled.
+        processes (int | None): Number of validating processes, the number of CPUs if None, inline if 1.
+        chunk_rows (int): Number of rows validated per task and written at once.
+        on_checkpoint (Callable[[BackfillCheckpoint], None] | None): Function called with the checkpoint
+            after every chunk, to persist it.
+        on_error (Callable[[int, str], None] | None): Function called with the line number and the error
+            of every row invalid or not written.
+
+    Returns:
+        BackfillCheckpoint: The checkpoint once every row is handled.
+    """
+    rows = islice(iter(rows), checkpoint.rows, None)
+    chunks = iter(lambda: list(islice(rows, chunk_rows)), [])
+    processes = processes or os.cpu_count() or 1
+
+    def handle(chunk_size: int, shots: list[tuple[int, NewTikeeShot]], errors: list[tuple[int, str]]) -> None:
+        checkpoint.invalid += len(errors)
+        if service is not None and shots:
+            line_numbers = {}
+            for line_number, shot in shots:
+                orm_tikee_shot = shot.to_orm()
+                line_numbers[(orm_tikee_shot.PK, orm_tikee_shot.SK)] = line_number
+            created, failed = service.create_many([shot for _, shot in shots])
+            with ThreadPoolExecutor(max_workers=PAIR_REGISTRATION_THREADS) as registrations:
+                list(registrations.map(partial(service.register_side, claim=False), created))
+            checkpoint.written += len(created)
+            checkpoint.failed += len(failed)
+            errors = errors + [
+                (line_numbers[(orm_tikee_shot.PK, orm_tikee_shot.SK)], "Not written: left unprocessed by DynamoDB")
+                for orm_tikee_shot in failed
+            ]
+        if on_error is not None:
+            for line_number, error in sorted(errors):
+                on_error(line_number, error)
+        checkpoint.rows += chunk_size
+        if on_checkpoint is not None:
+            on_checkpoint(checkpoint)
+
+    if processes == 1:
+        for chunk in chunks:
+            handle(len(chunk), *validate_rows(chunk))
+        return checkpoint
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((len(chunk), pool.submit(validate_rows, chunk)))
+            if len(pending) > 2 * processes:
+                chunk_size, future = pending.popleft()
+                handle(chunk_size, *future.result())
+        while pending:
+            chunk_size, future = pending.popleft()
+            handle(chunk_size, *future.result())
+    return checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("manifest", help="JSONL or CSV file listing the shots")
+    parser.add_argument("--format", choices=MANIFEST_FORMATS, help="format of the manifest, from its extension if omitted")
+    parser.add_argument("--processes", type=int, help="validating processes, the number of CPUs if omitted")
+    parser.add_argument("--chunk-rows", type=int, default=BACKFILL_CHUNK_ROWS, help="rows validated and written at once")
+    parser.add_argument("--checkpoint", help="JSON file the progress is saved to, and resumed from if it exists")
+    parser.add_argument("--errors", help="JSONL file the invalid and unwritten rows are reported to")
+    parser.add_argument("--dry-run", action="store_true", help="only validate the manifest")
+    args = parser.parse_args()
+    if constants.DDB_TABLE_NAME is None and not args.dry_run:
+        parser.error("DDB_TABLE_NAME must be set, see .env")
+
+    checkpoint = BackfillCheckpoint(manifest=str(Path(args.manifest).resolve()))
+    checkpoint_path = Path(args.checkpoint) if args.checkpoint and not args.dry_run else None
+    if checkpoint_path is not None and checkpoint_path.exists():
+        checkpoint = BackfillCheckpoint.model_validate_json(checkpoint_path.read_text(encoding="utf8"))
+        if checkpoint.manifest != str(Path(args.manifest).resolve()):
+            parser.error(f"{checkpoint_path} is the checkpoint of {checkpoint.manifest}")
+    resumed_rows = checkpoint.rows
+    start = time.perf_counter()
+
+    def save(progress: BackfillCheckpoint) -> None:
+        if checkpoint_path is not None:
+            temporary_path = checkpoint_path.with_suffix(".tmp")
+            temporary_path.write_text(progress.model_dump_json(), encoding="utf8")
+            temporary_path.replace(checkpoint_path)
+        rows = progress.rows - resumed_rows
+        elapsed = time.perf_counter() - start
+        print(f"{progress.rows:>12,} rows {rows / elapsed if elapsed else 0.0:>10,.0f} rows/s", file=sys.stderr)
+
+    errors_file = Path(args.errors).open("a", encoding="utf8") if args.errors else None
+
+    def report_error(line_number: int, error: str) -> None:
+        if errors_file is not None:
+            errors_file.write(json.dumps({"line": line_number, "error": error}) + "\n")
+
+    try:
+        checkpoint = backfill(
+            read_manifest(args.manifest, args.format),
+            None if args.dry_run else TikeeShotServices(trusted_hydration=True),
+            checkpoint,
+            args.processes,
+            args.chunk_rows,
+            save,
+            report_error,
+        )
+    finally:
+        if errors_file is not None:
+            errors_file.close()
+    elapsed = time.perf_counter() - start
+    rows = checkpoint.rows - resumed_rows
+    print(json.dumps(
+        {**checkpoint.model_dump(), "elapsed_s": elapsed, "rows_per_s": rows / elapsed if elapsed else 0.0}, indent=2
+    ))
+
+
+if __name__ == "__main__":
+    main()
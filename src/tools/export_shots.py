@@ -0,0 +1,45 @@
+"""Export the shots of a camera, or of one of its sequences, to NDJSON, Parquet or Arrow IPC.
+
+The shots are read page by page, hydrated without validation, and written in batches of --batch-rows:
+memory stays bounded whatever the number of shots. The run reports the rows written and the export
+throughput in rows per second. Parquet and Arrow IPC need pyarrow.
+
+Usage: set -a; . ./.env; set +a; PYTHONPATH=. python -m src.tools.export_shots --camera UUID \
+    [--sequence 123456] --output shots.parquet [--format parquet|arrow|ndjson] \
+    [--batch-rows 10000] [--page-size 1000]
+"""
+import argparse
+import json
+from uuid import UUID
+
+import src.constants.constants as constants
+from src.services.shot_export import EXPORT_BATCH_ROWS, EXPORT_FORMATS, export_shots, open_writer
+from src.services.tikee_shot_service import TikeeShotServices
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--camera", type=UUID, required=True, help="camera whose shots are exported")
+    parser.add_argument("--sequence", help="only export the shots of this sequence")
+    parser.add_argument("--output", required=True, help="file to write")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="format of the file, from its extension if omitted")
+    parser.add_argument("--batch-rows", type=int, default=EXPORT_BATCH_ROWS, help="shots written at once")
+    parser.add_argument("--page-size", type=int, help="shots read per page")
+    args = parser.parse_args()
+    if constants.DDB_TABLE_NAME is None:
+        parser.error("DDB_TABLE_NAME must be set, see .env")
+    export_format = args.format or args.output.rsplit(".", 1)[-1]
+    if export_format not in EXPORT_FORMATS:
+        parser.error(f"cannot tell the format of {args.output}, use --format")
+
+    service = TikeeShotServices(trusted_hydration=True)
+    if args.sequence is not None:
+        shots = service.iter_tikee_shot_of_sequence(args.camera, args.sequence, page_size=args.page_size)
+    else:
+        shots = service.iter_tikee_shot_of_camera_by_id(args.camera, page_size=args.page_size)
+    report = export_shots(shots, open_writer(args.output, export_format), args.batch_rows)
+    print(json.dumps({**report.model_dump(), "rows_per_s": report.rows_per_s}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
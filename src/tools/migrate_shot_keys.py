@@ -0,0 +1,218 @@
+"""Rewrite the items of tikee_shot_table keyed by the former SKs, 1#left or None#left, to zero-padded SKs.
+
+The table is read with a parallel scan. Shots with a former SK are put under their new key with
+BatchWriteItem, a shot already written there by the new code being kept as is, and their former
+item is deleted once its put succeeded. Their shooting date is written again as encode_datetime
+does, in UTC, for the shooting_date index to sort them by instant. Pair records and sequence
+summaries were keyed by the new SKs from the start, and are left as is.
+
+The progress is saved to --checkpoint after every page: running the tool again resumes the scan,
+and migrating an item twice changes nothing. The items whose new key cannot be built, such as a
+photo index wider than the new SKs, are left as is, counted as failed and reported to stderr.
+--dry-run only counts the items to migrate.
+
+Usage: set -a; . ./.env; set +a; PYTHONPATH=. python -m src.tools.migrate_shot_keys \
+    [--segments 8] [--page-size 1000] [--checkpoint migration.json] [--dry-run]
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import src.constants.constants as constants
+from src.model.orm.dynamodb_codec import ORM_TIKEE_SHOT_CODEC, encode_datetime, encode_key
+from src.model.orm.key_codec import encode_sk
+from src.model.orm.orm_modelling import ORMTikeeShotIdentifier
+from src.services.parallel_scan import ScanCheckpoint, parallel_scan
+from src.services.tikee_shot_service import (
+    BATCH_WRITE_CHUNK_SIZE, PAIR_PK_PREFIX, SUMMARY_PK_PREFIX, TikeeShotServices
+)
+
+
+def migrated_key(item: dict) -> tuple[str, str] | None:
+    """Return the new key of an item keyed by a former SK, None if its key is up to date"""
+    pk, sk = item["PK"]["S"], item["SK"]["S"]
+    if pk.startswith((PAIR_PK_PREFIX, SUMMARY_PK_PREFIX)):
+        return None
+    fields = ORM_TIKEE_SHOT_CODEC.decode_fields(
+        {attribute: item[attribute] for attribute in ("photo_index", "side") if attribute in item}
+    )
+    new_sk = encode_sk(fields.get("photo_index"), fields["side"])
+    return None if new_sk == sk else (pk, new_sk)
+
+
+def migrated_item(item: dict, sk: str) -> dict:
+    """
+    Return a shot keyed by a former SK under its new SK.
+
+    Former versions wrote the shooting date as pydantic serializes it, with a Z or the local offset:
+    it is written again by encode_datetime, so the shot sorts by instant in the shooting_date index.
+    """
+    migrated = dict(item, SK={"S": sk})
+    if "shooting_date" in item:
+        migrated["shooting_date"] = {"S": encode_datetime(datetime.fromisoformat(item["shooting_date"]["S"]))}
+    return migrated
+
+
+class KeyMigration:
+    """Sink of the scanned items, moving the ones keyed by a former SK in batches"""
+
+    def __init__(
+        self,
+        service: TikeeShotServices,
+        dry_run: bool = False,
+        on_error: Callable[[tuple[str, str], str], None] | None = None,
+    ):
+        self.service = service
+        self.dry_run = dry_run
+        self.on_error = on_error
+        self.counts: Counter[str] = Counter()
+        self._pending: list[tuple[dict, tuple[str, str]]] = []
+
+    def add(self, item: dict) -> None:
+        """Queue an item to migrate, moving the queued items once a batch is full"""
+        self.counts["scanned"] += 1
+        try:
+            new_key = migrated_key(item)
+        except ValueError as e:
+            # A photo index too wide for the new SKs: the item is left under its former key
+            self.counts["failed"] += 1
+            if self.on_error is not None:
+                self.on_error((item["PK"]["S"], item["SK"]["S"]), str(e))
+            return
+        if new_key is None:
+            self.counts["up_to_date"] += 1
+            return
+        if self.dry_run:
+            self.counts["to_migrate"] += 1
+            return
+        self._pending.append((item, new_key))
+        if len(self._pending) >= BATCH_WRITE_CHUNK_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """Move the queued items: write them under their new key, then delete the former ones"""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        # A shot written under its new key since the deployment is more recent than its former item
+        already_migrated = {
+            (shot.PK, shot.SK)
+            for shot in self.service.get_tikee_shots_by_ids(
+                [ORMTikeeShotIdentifier(PK=pk, SK=sk) for _, (pk, sk) in pending], fields=[], consistent=True
+            )
+        }
+        puts = [
+            {"PutRequest": {"Item": migrated_item(item, sk)}}
+            for item, (pk, sk) in pending
+            if (pk, sk) not in already_migrated
+        ]
+        unprocessed = self.service._batch_write(puts) if puts else []
+        failed = {
+            (request["PutRequest"]["Item"]["PK"]["S"], request["PutRequest"]["Item"]["SK"]["S"])
+            for request in unprocessed
+        }
+        moved = [item for item, new_key in pending if new_key not in failed]
+        self.counts["failed"] += len(failed)
+
+        deletes = [{"DeleteRequest": {"Key": encode_key(item["PK"]["S"], item["SK"]["S"])}} for item in moved]
+        undeleted = self.service._batch_write(deletes)
+        self.counts["migrated"] += len(moved) - len(undeleted)
+        # Both items are kept: running the migration again deletes the former one
+        self.counts["failed"] += len(undeleted)
+
+
+def migrate_keys(
+    service: TikeeShotServices,
+    total_segments: int = 8,
+    page_size: int | None = None,
+    checkpoint: ScanCheckpoint | None = None,
+    on_checkpoint: Callable[[ScanCheckpoint], None] | None = None,
+    dry_run: bool = False,
+    on_error: Callable[[tuple[str, str], str], None] | None = None,
+) -> Counter[str]:
+    """
+    Move every item keyed by a former SK to its new key.
+
+    Args:
+        service (TikeeShotServices): The service of the table to migrate.
+        total_segments (int): Number of segments the table is scanned in.
+        page_size (int | None): Maximum number of items read per page, DynamoDB's 1 MB limit if None.
+        checkpoint (ScanCheckpoint | None): Checkpoint of a previous migration to resume.
+        on_checkpoint (Callable[[ScanCheckpoint], None] | None): Function called with the checkpoint
+            once the items of every page are migrated, to persist it.
+        dry_run (bool): Only count the items to migrate.
+        on_error (Callable[[tuple[str, str], str], None] | None): Function called with the key of
+            every item whose new key cannot be built, and the error, the item being left as is.
+
+    Returns:
+        Counter[str]: The number of items scanned, up to date, migrated (or to migrate) and failed.
+    """
+    migration = KeyMigration(service, dry_run, on_error=on_error)
+
+    def save(scan_checkpoint: ScanCheckpoint) -> None:
+        migration.flush()
+        if on_checkpoint is not None:
+            on_checkpoint(scan_checkpoint)
+
+    scan_kwargs = {"TableName": service.table_name}
+    if page_size is not None:
+        scan_kwargs["Limit"] = page_size
+    parallel_scan(
+        service.client.scan,
+        scan_kwargs,
+        migration.add,
+        total_segments,
+        max_workers=min(total_segments, constants.AWS_MAX_POOL_CONNECTIONS),
+        checkpoint=checkpoint,
+        on_checkpoint=save,
+    )
+    migration.flush()
+    return migration.counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, default=8, help="segments the table is scanned in")
+    parser.add_argument("--page-size", type=int, help="items read per page")
+    parser.add_argument("--checkpoint", help="JSON file the progress is saved to, and resumed from if it exists")
+    parser.add_argument("--dry-run", action="store_true", help="only count the items to migrate")
+    args = parser.parse_args()
+    if constants.DDB_TABLE_NAME is None:
+        parser.error("DDB_TABLE_NAME must be set, see .env")
+
+    checkpoint = None
+    checkpoint_path = Path(args.checkpoint) if args.checkpoint else None
+    if checkpoint_path is not None and checkpoint_path.exists():
+        checkpoint = ScanCheckpoint.model_validate_json(checkpoint_path.read_text(encoding="utf8"))
+
+    def save(scan_checkpoint: ScanCheckpoint) -> None:
+        temporary_path = checkpoint_path.with_suffix(".tmp")
+        temporary_path.write_text(scan_checkpoint.model_dump_json(), encoding="utf8")
+        temporary_path.replace(checkpoint_path)
+
+    def report_error(key: tuple[str, str], error: str) -> None:
+        print(json.dumps({"PK": key[0], "SK": key[1], "error": error}), file=sys.stderr)
+
+    start = time.perf_counter()
+    counts = migrate_keys(
+        TikeeShotServices(),
+        args.segments,
+        args.page_size,
+        checkpoint,
+        save if checkpoint_path is not None and not args.dry_run else None,
+        args.dry_run,
+        report_error,
+    )
+    elapsed = time.perf_counter() - start
+    print(json.dumps(
+        {**counts, "elapsed_s": elapsed, "items_per_s": counts["scanned"] / elapsed if elapsed else 0.0}, indent=2
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 """This file is automatically read when running tests"""
 import pytest
 
+from src.services import aws_clients
+
 
 @pytest.fixture(autouse=True)
 def aws_credentials(monkeypatch):
@@ -10,3 +12,11 @@ def aws_credentials(monkeypatch):
     monkeypatch.setenv("AWS_SECURITY_TOKEN", "testing")
     monkeypatch.setenv("AWS_SESSION_TOKEN", "testing")
     monkeypatch.setenv("AWS_ACCOUNT_ID", "testing")
+
+
+@pytest.fixture(autouse=True)
+def aws_clients_registry():
+    """Start every test with an empty registry of AWS clients"""
+    aws_clients.reset()
+    yield
+    aws_clients.reset()
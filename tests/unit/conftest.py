@@ -5,8 +5,11 @@ import pytest
 import src.constants.constants as constants
 import json
 import io
+import threading
 import zipfile
 
+from src.services.aws_clients import get_client
+
 
 @pytest.fixture()
 def tikee_shot_table():
@@ -27,6 +30,8 @@ def tikee_shot_table():
                 TableName=table_name,
                 KeySchema=key_schema,
                 AttributeDefinitions=attribute_definitions,
+                GlobalSecondaryIndexes=constants.DDB_GLOBAL_SECONDARY_INDEXES,
+                LocalSecondaryIndexes=constants.DDB_LOCAL_SECONDARY_INDEXES,
                 BillingMode="PAY_PER_REQUEST",
             )
             # Wait for the table to be created (important for testing)
@@ -82,3 +87,13 @@ def stitcher_lambda():
             return lambda_client, iam_client
     return MockedLambdaStitcherConstructor()
 
+@pytest.fixture()
+def atomic_dynamodb(monkeypatch):
+    """Make each request of the shared DynamoDB client atomic, as DynamoDB does: moto is not thread safe"""
+    client = get_client("dynamodb")
+    make_api_call = client._make_api_call
+    request_lock = threading.Lock()
+    def atomic_make_api_call(operation_name, api_params):
+        with request_lock:
+            return make_api_call(operation_name, api_params)
+    monkeypatch.setattr(client, "_make_api_call", atomic_make_api_call)
@@ -0,0 +1,26 @@
+import subprocess
+import sys
+
+import src.constants.constants as constants
+
+def test_table_setup_constants():
+    """Test that the key schema, attributes and indexes are read from the CloudFormation template"""
+    assert constants.DDB_KEYS == [
+        {"AttributeName": "PK", "KeyType": "HASH"},
+        {"AttributeName": "SK", "KeyType": "RANGE"},
+    ]
+    assert {"AttributeName": "camera_id", "AttributeType": "S"} in constants.DDB_ATTRIBUTE
+    assert [index["IndexName"] for index in constants.DDB_GLOBAL_SECONDARY_INDEXES] == [constants.DDB_CAMERA_INDEX_NAME]
+    assert [index["IndexName"] for index in constants.DDB_LOCAL_SECONDARY_INDEXES] == [constants.DDB_SHOOTING_DATE_INDEX_NAME]
+
+def test_import_does_not_parse_the_template():
+    """Test that importing the constants neither imports PyYAML nor parses the template"""
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, src.constants.constants; print('yaml' in sys.modules)"],
+        capture_output=True, check=True, text=True,
+    )
+    assert result.stdout.strip() == "False"
+
+def test_unknown_constant():
+    """Test that an unknown constant raises AttributeError"""
+    assert not hasattr(constants, "DDB_UNKNOWN")
@@ -3,9 +3,11 @@ import json
 from uuid import UUID
 from datetime import datetime
 from moto import mock_aws
+from concurrent.futures import ThreadPoolExecutor
 
 from src.model.business.business_modelling import NewTikeeShot, TikeeShotSide
 from src.services.tikee_shot_service import TikeeShotServices
+from src.services.stitcher_dispatcher import StitcherDispatcher
 from src.lambdas.lambda_create_shot.lambda_create_shot import lambda_handler
 
 @pytest.fixture
@@ -94,6 +96,29 @@ def test_create_new_shot_with_mismatched_resolution(tikee_shot_table, valid_even
     body = json.loads(response["body"])
     assert "Resolution mismatch" in body["message"]
 
+@mock_aws
+def test_create_new_stitched_shot(tikee_shot_table, monkeypatch):
+    """Test creating a stitched shot, which is its own opposite side, without dispatching the stitcher"""
+    # Setup
+    table = tikee_shot_table.create_tikee_shot_table()
+    dispatched = []
+    monkeypatch.setattr(StitcherDispatcher, "_invoke", lambda dispatcher, pairs: dispatched.extend(pairs) or len(pairs))
+    event = {"body": json.dumps(build_shot_body("stitched", 1))}
+
+    # Execute
+    response = lambda_handler(event, None)
+    response_again = lambda_handler(event, None)
+
+    # Verify
+    assert response["statusCode"] == 201
+    assert response_again["statusCode"] == 201
+    assert json.loads(response["body"])["data"]["side"] == "stitched"
+    shot = TikeeShotServices().get_tikee_shot(
+        UUID("12345678-1234-5678-1234-567812345678"), "12345678", 1, TikeeShotSide.STITCHED
+    )
+    assert shot.resolution == "1920x1080"
+    assert dispatched == []
+
 @mock_aws
 def test_create_new_shot_with_same_side_existing(tikee_shot_table, valid_event):
     """Test creating a new shot when same side already exists"""
@@ -159,4 +184,203 @@ def test_create_new_shot_malformed_json(tikee_shot_table):
     response = lambda_handler(invalid_event, None)
     
     # Verify
-    assert response["statusCode"] == 400
\ No newline at end of file
+    assert response["statusCode"] == 400
+
+def build_shot_body(side, photo_index, resolution="1920x1080", camera_uuid="12345678-1234-5678-1234-567812345678"):
+    """Build the JSON body of a shot"""
+    return {
+        "s3_key": f"{camera_uuid}/12345678/{side}/my_photo{photo_index}.jpg",
+        "resolution": resolution,
+        "file_size": 1024,
+        "shooting_date": "2024-01-01T12:00:00"
+    }
+
+@mock_aws
+def test_create_shot_batch(tikee_shot_table, atomic_dynamodb, stitcher_lambda):
+    """Test creating a batch of shots in a single invocation"""
+    # Setup
+    table = tikee_shot_table.create_tikee_shot_table()
+    lambda_client = stitcher_lambda.create_stitcher_lambda()
+    bodies = [build_shot_body(side, index) for index in range(1, 31) for side in ("left", "right")]
+
+    # Execute
+    response = lambda_handler({"body": json.dumps(bodies)}, None)
+
+    # Verify
+    assert response["statusCode"] == 201
+    body = json.loads(response["body"])
+    assert [result["index"] for result in body["results"]] == list(range(60))
+    assert all(result["statusCode"] == 201 for result in body["results"])
+    shots = TikeeShotServices().get_tikee_shot_of_sequence(UUID("12345678-1234-5678-1234-567812345678"), "12345678")
+    assert len(shots) == 60
+
+@mock_aws
+def test_create_shot_batch_sends_pairs_in_one_payload(tikee_shot_table, atomic_dynamodb, monkeypatch):
+    """Test that the pairs completed by a batch are sent to the stitcher in a single payload"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    payloads = []
+    def invoke(dispatcher, pairs):
+        payloads.append(pairs)
+        return len(pairs)
+    monkeypatch.setattr(StitcherDispatcher, "_invoke", invoke)
+    bodies = [build_shot_body(side, index) for index in range(1, 31) for side in ("left", "right")]
+
+    response = lambda_handler({"body": json.dumps(bodies)}, None)
+    response_again = lambda_handler({"body": json.dumps(bodies)}, None)
+
+    assert response["statusCode"] == 201
+    assert response_again["statusCode"] == 201
+    assert len(payloads) == 1
+    assert len(payloads[0]) == 30
+
+@mock_aws
+def test_create_shot_batch_reports_invalid_shots(tikee_shot_table, atomic_dynamodb, stitcher_lambda):
+    """Test that an invalid shot of a batch does not reject the other ones"""
+    # Setup
+    table = tikee_shot_table.create_tikee_shot_table()
+    lambda_client = stitcher_lambda.create_stitcher_lambda()
+    bodies = [
+        build_shot_body("left", 1),
+        build_shot_body("left", 2, camera_uuid="invalid-uuid"),
+        "not a shot",
+        build_shot_body("right", 1),
+    ]
+
+    # Execute
+    response = lambda_handler({"body": json.dumps(bodies)}, None)
+
+    # Verify
+    assert response["statusCode"] == 207
+    results = json.loads(response["body"])["results"]
+    assert [result["statusCode"] for result in results] == [201, 400, 400, 201]
+    assert results[1]["message"] == "Validation failed"
+
+@mock_aws
+def test_create_shot_batch_with_mismatched_resolution(tikee_shot_table, atomic_dynamodb):
+    """Test that a batch shot is rejected when its other side, in DB or in the batch, has another resolution"""
+    # Setup
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+    service.create(NewTikeeShot(**build_shot_body("right", 1, resolution="3840x2160")))
+    bodies = [
+        build_shot_body("left", 1),
+        build_shot_body("left", 2),
+        build_shot_body("right", 2, resolution="3840x2160"),
+    ]
+
+    # Execute
+    response = lambda_handler({"body": json.dumps(bodies)}, None)
+
+    # Verify
+    assert response["statusCode"] == 207
+    results = json.loads(response["body"])["results"]
+    assert [result["statusCode"] for result in results] == [400, 201, 400]
+    assert "Resolution mismatch" in results[0]["message"]
+    assert "Resolution mismatch" in results[2]["message"]
+
+@mock_aws
+def test_create_shot_batch_all_invalid(tikee_shot_table):
+    """Test that a batch where no shot is valid is rejected"""
+    # Setup
+    table = tikee_shot_table.create_tikee_shot_table()
+
+    # Execute
+    response = lambda_handler({"body": json.dumps([{"s3_key": "invalid"}])}, None)
+
+    # Verify
+    assert response["statusCode"] == 400
+    assert json.loads(response["body"])["message"] == "Insertion failed"
+
+@mock_aws
+def test_create_shot_batch_empty(tikee_shot_table):
+    """Test that an empty batch is rejected"""
+    # Setup
+    table = tikee_shot_table.create_tikee_shot_table()
+
+    # Execute
+    response = lambda_handler({"body": "[]"}, None)
+
+    # Verify
+    assert response["statusCode"] == 400
+    assert json.loads(response["body"])["message"] == "The batch must hold at least one shot"
+
+@mock_aws
+def test_concurrent_sides_invoke_stitcher_once(tikee_shot_table, atomic_dynamodb, monkeypatch):
+    """Test that both sides of many photos created concurrently dispatch each pair exactly once"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    dispatched = []
+    def invoke(dispatcher, pairs):
+        dispatched.extend((pair["left_side_s3_path"], pair["right_side_s3_path"]) for pair in pairs)
+        return len(pairs)
+    monkeypatch.setattr(StitcherDispatcher, "_invoke", invoke)
+    events = [
+        {"body": json.dumps(build_shot_body(side, photo_index))}
+        for photo_index in range(1, 21)
+        for side in ("left", "right", "left")
+    ]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(executor.map(lambda event: lambda_handler(event, None), events))
+
+    assert all(response["statusCode"] == 201 for response in responses)
+    assert sorted(dispatched) == sorted(
+        (
+            f"12345678-1234-5678-1234-567812345678/12345678/left/my_photo{photo_index}.jpg",
+            f"12345678-1234-5678-1234-567812345678/12345678/right/my_photo{photo_index}.jpg",
+        )
+        for photo_index in range(1, 21)
+    )
+
+@mock_aws
+def test_failed_stitcher_invoke_is_dispatched_on_retry(tikee_shot_table, monkeypatch):
+    """Test that a pair whose stitcher invocation failed is dispatched by the retry of the request, once"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    dispatched = []
+    failures = [RuntimeError("Lambda invoke failed")]
+    def invoke(dispatcher, pairs):
+        if failures:
+            raise failures.pop()
+        dispatched.extend((pair["left_side_s3_path"], pair["right_side_s3_path"]) for pair in pairs)
+        return len(pairs)
+    monkeypatch.setattr(StitcherDispatcher, "_invoke", invoke)
+    assert lambda_handler({"body": json.dumps(build_shot_body("left", 1))}, None)["statusCode"] == 201
+    right_event = {"body": json.dumps(build_shot_body("right", 1))}
+
+    failed_response = lambda_handler(right_event, None)
+    retried_response = lambda_handler(right_event, None)
+    repeated_response = lambda_handler(right_event, None)
+
+    assert failed_response["statusCode"] == 500
+    assert retried_response["statusCode"] == 201
+    assert repeated_response["statusCode"] == 201
+    assert dispatched == [(
+        "12345678-1234-5678-1234-567812345678/12345678/left/my_photo1.jpg",
+        "12345678-1234-5678-1234-567812345678/12345678/right/my_photo1.jpg",
+    )]
+    summary = TikeeShotServices().get_sequence_summary(
+        UUID("12345678-1234-5678-1234-567812345678"), "12345678", consistent=True
+    )
+    assert summary.completed_pairs == 1
+
+@mock_aws
+def test_opposite_side_is_read_consistently(tikee_shot_table, monkeypatch):
+    """Test that a stale read of the opposite side, once the pair is complete, does not drop the pair"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    dispatched = []
+    monkeypatch.setattr(StitcherDispatcher, "_invoke", lambda dispatcher, pairs: dispatched.extend(pairs) or len(pairs))
+    assert lambda_handler({"body": json.dumps(build_shot_body("left", 1))}, None)["statusCode"] == 201
+    # An eventually consistent read does not see the left side yet
+    get_item = TikeeShotServices._get_item
+    def stale_get_item(service, pk, sk, trusted, fields, consistent):
+        if not consistent:
+            return None
+        return get_item(service, pk, sk, trusted, fields, consistent)
+    monkeypatch.setattr(TikeeShotServices, "_get_item", stale_get_item)
+
+    response = lambda_handler({"body": json.dumps(build_shot_body("right", 1))}, None)
+
+    assert response["statusCode"] == 201
+    assert dispatched == [{
+        "left_side_s3_path": "12345678-1234-5678-1234-567812345678/12345678/left/my_photo1.jpg",
+        "right_side_s3_path": "12345678-1234-5678-1234-567812345678/12345678/right/my_photo1.jpg",
+    }]
@@ -4,6 +4,8 @@ import pytest
 from uuid import UUID
 from src.model.business.business_modelling import NewTikeeShot
 from src.model.base.base_modelling import TikeeMetadata, TikeeShotSide
+from src.model.orm.orm_modelling import ORMTikeeShot
+from src.model.orm.key_codec import encode_pk, encode_sk
 
 def test_new_tikee_shot_creation_with_valid_data():
     """Test creating NewTikeeShot with valid data"""
@@ -120,7 +122,7 @@ def test_new_tikee_shot_to_orm():
     orm_shot = shot.to_orm()
     
     assert orm_shot.PK == "123e4567-e89b-12d3-a456-426614174000#123456"
-    assert orm_shot.SK == "1#left"
+    assert orm_shot.SK == "0000000001#left"
     assert orm_shot.resolution == "1920x1080"
     assert orm_shot.file_size == 1024
     assert orm_shot.shooting_date == datetime(2024, 1, 1, 12, 0)
@@ -149,4 +151,49 @@ def test_new_tikee_shot_to_orm_with_metadata():
     orm_shot = shot.to_orm()
     
     assert orm_shot.gps_latitude == Decimal('48.8584')
-    assert orm_shot.gps_longitude == Decimal('2.2945') 
\ No newline at end of file
+    assert orm_shot.gps_longitude == Decimal('2.2945') 
+
+def test_new_tikee_shot_to_orm_matches_validated_orm():
+    """Test that the trusted conversion builds the same ORM model as a validated one"""
+    metadata = TikeeMetadata(
+        gps_latitude=48.8584,
+        gps_longitude=2.2945,
+        camera_model_name="Tikee 3 PRO+"
+    )
+    for s3_key, shot_metadata in [
+        ("123e4567-e89b-12d3-a456-426614174000/123456/left/my_photo1.jpg", metadata),
+        ("123e4567-e89b-12d3-a456-426614174000/123456/right/my_photo.jpg", None),
+    ]:
+        shot = NewTikeeShot(
+            s3_key=s3_key,
+            resolution="1920x1080",
+            file_size=1024,
+            shooting_date=datetime(2024, 1, 1, 12, 0),
+            metadata=shot_metadata
+        )
+        model_dict = shot.model_dump()
+        for key in ['metadata', 's3_key']:
+            model_dict.pop(key, None)
+        validated_orm_shot = ORMTikeeShot(
+            PK=encode_pk(shot.camera_id, shot.sequence),
+            SK=encode_sk(shot.photo_index, shot.side),
+            **model_dict,
+            **(shot.metadata.model_dump() if shot.metadata is not None else {})
+        )
+
+        orm_shot = shot.to_orm()
+
+        assert orm_shot == validated_orm_shot
+        assert orm_shot.model_dump_json(by_alias=True, exclude_none=True, exclude_unset=True) == \
+            validated_orm_shot.model_dump_json(by_alias=True, exclude_none=True, exclude_unset=True)
+
+def test_new_tikee_shot_to_orm_is_cached():
+    """Test that the ORM model is built once per business model"""
+    shot = NewTikeeShot(
+        s3_key="123e4567-e89b-12d3-a456-426614174000/123456/left/my_photo1.jpg",
+        resolution="1920x1080",
+        file_size=1024,
+        shooting_date=datetime(2024, 1, 1, 12, 0)
+    )
+
+    assert shot.to_orm() is shot.to_orm()
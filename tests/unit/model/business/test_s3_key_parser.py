@@ -0,0 +1,53 @@
+"""Unit tests for the s3 key parser"""
+from uuid import UUID
+import pytest
+from src.model.business.s3_key_parser import parse_s3_key, split_s3_key, _parse_camera_id
+
+def test_parse_s3_key_with_index():
+    """Test parsing a valid s3 key with a photo index"""
+    parsed = parse_s3_key("123e4567-e89b-12d3-a456-426614174000/123456/left/my_photo12.jpg")
+
+    assert parsed.camera_id == UUID("123e4567-e89b-12d3-a456-426614174000")
+    assert parsed.camera_id_str == "123e4567-e89b-12d3-a456-426614174000"
+    assert parsed.sequence == "123456"
+    assert parsed.side == "left"
+    assert parsed.photo_name == "my_photo12.jpg"
+    assert parsed.photo_index == 12
+
+def test_parse_s3_key_without_index():
+    """Test parsing a valid s3 key without photo index, surrounded by whitespaces"""
+    parsed = parse_s3_key(" 123e4567-e89b-12d3-a456-426614174000/123456/stitched/my_photo.jpg\n")
+
+    assert parsed.side == "stitched"
+    assert parsed.photo_name == "my_photo.jpg"
+    assert parsed.photo_index is None
+
+def test_parse_s3_key_memoizes_camera_id():
+    """Test that the camera id of repeated keys is parsed once"""
+    _parse_camera_id.cache_clear()
+    for index in range(10):
+        parse_s3_key(f"123e4567-e89b-12d3-a456-426614174000/123456/right/my_photo{index}.jpg")
+
+    assert _parse_camera_id.cache_info().misses == 1
+    assert _parse_camera_id.cache_info().hits == 9
+
+@pytest.mark.parametrize("s3_key,expected_error", [
+    ("invalid-uuid/123456/left/my_photo.jpg", "Error processing s3_key for camera invalid-uuid': Invalid UUID in s3_key"),
+    ("123e4567-e89b-12d3-a456-426614174000/123456/left", "s3_key must have 4 parts: <uuid>/<sequence>/<side>/<filename>"),
+    ("123e4567-e89b-12d3-a456-426614174000/abc/left/my_photo.jpg", "Error processing s3_key for camera 123e4567-e89b-12d3-a456-426614174000: Sequence must be digits"),
+    ("123e4567-e89b-12d3-a456-426614174000/123456/up/my_photo.jpg", "Error processing s3_key for camera 123e4567-e89b-12d3-a456-426614174000: Side must be one of: left, right, stitched"),
+    ("123e4567-e89b-12d3-a456-426614174000/123456/left/photo.jpg", "Error processing s3_key for camera 123e4567-e89b-12d3-a456-426614174000: Filename must be in the format \"my_photo.jpg\" or \"my_photo[int].jpg\""),
+    ("123e4567-e89b-12d3-a456-426614174000/123456/left/my_photo12345678901.jpg", "Error processing s3_key for camera 123e4567-e89b-12d3-a456-426614174000: Photo index must have at most 10 digits"),
+])
+def test_parse_invalid_s3_key(s3_key, expected_error):
+    """Test that invalid s3 keys report their first invalid component"""
+    with pytest.raises(ValueError) as exc_info:
+        parse_s3_key(s3_key)
+
+    assert str(exc_info.value) == expected_error
+
+def test_split_s3_key():
+    """Test splitting an s3 key without validating its parts"""
+    assert split_s3_key("a/b/c/d") == ["a", "b", "c", "d"]
+    with pytest.raises(ValueError):
+        split_s3_key("a/b/c/d/e")
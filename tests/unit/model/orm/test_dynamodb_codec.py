@@ -0,0 +1,145 @@
+"""Unit tests for the DynamoDB codec of ORM models"""
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import UUID
+import pytest
+from src.model.orm.orm_modelling import ORMTikeeShot
+from src.model.orm.dynamodb_codec import ORM_TIKEE_SHOT_CODEC, encode_value, decode_value, encode_key, encode_datetime
+from src.model.base.base_modelling import TikeeShotSide
+
+def build_shot(**kwargs):
+    """Build an ORM shot with GPS metadata"""
+    fields = dict(
+        PK="123e4567-e89b-12d3-a456-426614174000#123456",
+        SK="1#left",
+        camera_id=UUID("123e4567-e89b-12d3-a456-426614174000"),
+        sequence="123456",
+        side=TikeeShotSide.LEFT,
+        photo_name="my_photo1.jpg",
+        photo_index=1,
+        resolution="1920x1080",
+        file_size=1024,
+        shooting_date=datetime(2024, 1, 1, 12, 0),
+        gps_latitude=Decimal("48.858370123456789"),
+        gps_longitude=Decimal("2.2945"),
+        camera_model_name="Tikee 3 PRO+",
+    )
+    fields.update(kwargs)
+    return ORMTikeeShot(**fields)
+
+def test_encode_orm_tikee_shot():
+    """Test encoding a shot to attribute values, by alias and without None values"""
+    item = ORM_TIKEE_SHOT_CODEC.encode(build_shot())
+
+    assert item["PK"] == {"S": "123e4567-e89b-12d3-a456-426614174000#123456"}
+    assert item["camera_id"] == {"S": "123e4567-e89b-12d3-a456-426614174000"}
+    assert item["side"] == {"S": "left"}
+    assert item["file_size"] == {"N": "1024"}
+    assert item["photo_index"] == {"N": "1"}
+    assert item["shooting_date"] == {"S": "2024-01-01T12:00:00"}
+    assert item["GPSLatitude"] == {"N": "48.858370123456789"}
+    assert item["Camera Model Name"] == {"S": "Tikee 3 PRO+"}
+    assert "GPSAltitude" not in item
+    assert "metadata" not in item
+
+def test_decode_orm_tikee_shot_round_trip():
+    """Test that a decoded shot equals the encoded one, Decimal values being exact"""
+    shot = build_shot(shooting_date=datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc))
+
+    decoded = ORM_TIKEE_SHOT_CODEC.decode(ORM_TIKEE_SHOT_CODEC.encode(shot))
+
+    assert decoded == shot
+    assert decoded.gps_latitude == Decimal("48.858370123456789")
+
+def test_encode_datetime_sorts_like_instants():
+    """Test that timezone-aware datetimes are encoded in UTC, their strings sorting like the instants"""
+    paris = timezone(timedelta(hours=2))
+    dates = [
+        datetime(2024, 1, 1, 11, 30, tzinfo=paris),
+        datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, 10, 0, 0, 500000, tzinfo=timezone.utc),
+    ]
+
+    assert encode_datetime(dates[0]) == "2024-01-01T09:30:00+00:00"
+    assert sorted(dates, key=encode_datetime) == sorted(dates)
+    assert encode_datetime(datetime(2024, 1, 1, 12, 0)) == "2024-01-01T12:00:00"
+
+def test_decode_fields_types():
+    """Test that decoded fields have their annotated type"""
+    fields = ORM_TIKEE_SHOT_CODEC.decode_fields(ORM_TIKEE_SHOT_CODEC.encode(build_shot()))
+
+    assert isinstance(fields["camera_id"], UUID)
+    assert isinstance(fields["shooting_date"], datetime)
+    assert fields["side"] is TikeeShotSide.LEFT
+    assert fields["file_size"] == 1024 and isinstance(fields["file_size"], int)
+    assert isinstance(fields["gps_longitude"], Decimal)
+
+def test_decode_items_written_as_json():
+    """Test decoding items written before the codec, GPS values being strings"""
+    item = ORM_TIKEE_SHOT_CODEC.encode(build_shot())
+    item["GPSLatitude"] = {"S": "48.8584"}
+    item["unknown"] = {"S": "ignored"}
+
+    decoded = ORM_TIKEE_SHOT_CODEC.decode(item)
+
+    assert decoded.gps_latitude == Decimal("48.8584")
+
+@pytest.mark.parametrize("value,attribute_value", [
+    ("a", {"S": "a"}),
+    (True, {"BOOL": True}),
+    (3, {"N": "3"}),
+    (Decimal("0.1"), {"N": "0.1"}),
+    (TikeeShotSide.RIGHT, {"S": "right"}),
+    ({"a": 1, "b": None}, {"M": {"a": {"N": "1"}}}),
+    (["a"], {"L": [{"S": "a"}]}),
+])
+def test_encode_value(value, attribute_value):
+    """Test encoding python values"""
+    assert encode_value(value) == attribute_value
+
+def test_encode_value_unsupported():
+    """Test that values without DynamoDB representation are rejected"""
+    with pytest.raises(TypeError):
+        encode_value(object())
+
+def test_decode_value():
+    """Test decoding attribute values, numbers being Decimal"""
+    assert decode_value({"M": {"a": {"N": "1.5"}, "b": {"NULL": True}, "c": {"L": [{"S": "x"}]}}}) == \
+        {"a": Decimal("1.5"), "b": None, "c": ["x"]}
+
+def test_encode_key():
+    """Test encoding the primary key of an item"""
+    assert encode_key("pk", "sk") == {"PK": {"S": "pk"}, "SK": {"S": "sk"}}
+
+def test_decode_trusted_matches_strict():
+    """Test that a trusted decode builds the same shot as a validated one"""
+    item = ORM_TIKEE_SHOT_CODEC.encode(build_shot())
+
+    trusted = ORM_TIKEE_SHOT_CODEC.decode(item, trusted=True)
+    strict = ORM_TIKEE_SHOT_CODEC.decode(item)
+
+    assert trusted == strict
+    assert trusted.model_fields_set == strict.model_fields_set
+    assert trusted.gps_altitude is None
+    assert trusted.build_s3_path() == "123e4567-e89b-12d3-a456-426614174000/123456/left/my_photo1.jpg"
+
+def test_decode_trusted_skips_validation():
+    """Test that a trusted decode does not validate, while a strict one does"""
+    item = ORM_TIKEE_SHOT_CODEC.encode(build_shot())
+    item["resolution"] = {"S": "invalid"}
+
+    assert ORM_TIKEE_SHOT_CODEC.decode(item, trusted=True).resolution == "invalid"
+    with pytest.raises(ValueError):
+        ORM_TIKEE_SHOT_CODEC.decode(item)
+
+def test_projection():
+    """Test building a projection on the attribute names of the fields, duplicates removed"""
+    assert ORM_TIKEE_SHOT_CODEC.projection(["PK", "resolution", "gps_latitude", "PK"]) == {
+        "ProjectionExpression": "#p0, #p1, #p2",
+        "ExpressionAttributeNames": {"#p0": "PK", "#p1": "resolution", "#p2": "GPSLatitude"},
+    }
+
+def test_projection_unknown_field():
+    """Test that a projection on a field unknown to the model is refused"""
+    with pytest.raises(ValueError):
+        ORM_TIKEE_SHOT_CODEC.projection(["PK", "unknown"])
@@ -0,0 +1,46 @@
+"""Unit tests for the keys of the tikee shots"""
+import pytest
+from uuid import UUID
+
+from src.model.base.base_modelling import TikeeShotSide
+from src.model.business.business_modelling import NewTikeeShot
+from src.model.orm.key_codec import encode_photo_index, encode_pk, encode_sk
+from src.services.tikee_shot_service import TikeeShotServices
+
+def test_encode_pk():
+    """Test that the PK joins the camera and the sequence"""
+    assert encode_pk(UUID("123e4567-e89b-12d3-a456-426614174000"), "123456") == "123e4567-e89b-12d3-a456-426614174000#123456"
+
+def test_encode_sk():
+    """Test the SK of indexed and unindexed photos, and the prefixes of their photo index"""
+    assert encode_photo_index(None) == ""
+    assert encode_photo_index(42) == "0000000042"
+    assert encode_sk(42, TikeeShotSide.RIGHT) == "0000000042#right"
+    assert encode_sk(42, "right") == "0000000042#right"
+    assert encode_sk(42, None) == "0000000042#"
+    assert encode_sk(None, TikeeShotSide.LEFT) == "#left"
+    assert encode_photo_index(9999999999) == "9999999999"
+    with pytest.raises(ValueError):
+        encode_photo_index(10 ** 10)
+    with pytest.raises(ValueError):
+        encode_photo_index(-1)
+
+def test_encoded_sk_sorts_numerically():
+    """Test that SKs sort like photo indexes, unindexed photos first"""
+    photo_indexes = [10, 2, None, 1, 100]
+    sks = sorted(encode_sk(photo_index, TikeeShotSide.LEFT) for photo_index in photo_indexes)
+
+    assert sks == [encode_sk(photo_index, TikeeShotSide.LEFT) for photo_index in (None, 1, 2, 10, 100)]
+
+def test_to_orm_and_build_sk_agree_on_unindexed_photos():
+    """Test that the SK written for a photo without index is the one its lookups build"""
+    orm_shot = NewTikeeShot(
+        s3_key="123e4567-e89b-12d3-a456-426614174000/123456/left/my_photo.jpg",
+        resolution="1920x1080",
+        file_size=1024,
+        shooting_date="2024-01-01T12:00:00",
+    ).to_orm()
+
+    assert orm_shot.photo_index is None
+    assert orm_shot.SK == TikeeShotServices.build_sk(None, TikeeShotSide.LEFT) == "#left"
+    assert orm_shot.PK == TikeeShotServices.build_pk(orm_shot.camera_id, orm_shot.sequence)
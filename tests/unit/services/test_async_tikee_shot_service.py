@@ -0,0 +1,138 @@
+import asyncio
+import boto3
+import pytest
+from uuid import UUID
+from datetime import datetime
+
+pytest.importorskip("aiobotocore")
+moto_server = pytest.importorskip("moto.server")
+
+import src.constants.constants as constants
+from src.model.business.business_modelling import NewTikeeShot, TikeeShotSide
+from src.model.orm.orm_modelling import ORMTikeeShotIdentifier
+from src.model.orm.dynamodb_codec import ORM_SEQUENCE_SUMMARY_CODEC
+from src.services.async_tikee_shot_service import AsyncTikeeShotServices
+from src.services.tikee_shot_service import TikeeShotServices
+
+@pytest.fixture()
+def moto_endpoint():
+    """Start a local moto server holding the tikee_shot table"""
+    server = moto_server.ThreadedMotoServer(port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    endpoint_url = f"http://{host}:{port}"
+    client = boto3.client("dynamodb", constants.AWS_REGION, endpoint_url=endpoint_url)
+    client.create_table(
+        TableName=constants.DDB_TABLE_NAME,
+        KeySchema=constants.DDB_KEYS,
+        AttributeDefinitions=constants.DDB_ATTRIBUTE,
+        GlobalSecondaryIndexes=constants.DDB_GLOBAL_SECONDARY_INDEXES,
+        LocalSecondaryIndexes=constants.DDB_LOCAL_SECONDARY_INDEXES,
+        BillingMode="PAY_PER_REQUEST",
+    )
+    yield endpoint_url
+    # The backends of moto outlive the server
+    client.delete_table(TableName=constants.DDB_TABLE_NAME)
+    server.stop()
+
+def build_new_shot(side, photo_index, sequence="12345678"):
+    """Build a new shot of the test camera"""
+    return NewTikeeShot(
+        s3_key=f"12345678-1234-5678-1234-567812345678/{sequence}/{side}/my_photo{photo_index}.jpg",
+        resolution="1920x1080",
+        file_size=1024,
+        shooting_date=datetime(2024, 1, 1, 12, 0)
+    )
+
+def test_create_and_get(moto_endpoint):
+    """Test creating shots and reading them back with the asynchronous service"""
+    camera_uuid = UUID('12345678-1234-5678-1234-567812345678')
+
+    async def scenario():
+        async with AsyncTikeeShotServices(endpoint_url=moto_endpoint) as service:
+            created_shots = await asyncio.gather(*(
+                service.create(build_new_shot(side, photo_index))
+                for photo_index in range(1, 11)
+                for side in ("left", "right")
+            ))
+            by_id = await service.get_tikee_shot_by_id(
+                ORMTikeeShotIdentifier(PK=created_shots[0].PK, SK=created_shots[0].SK)
+            )
+            shot = await service.get_tikee_shot(camera_uuid, "12345678", 1, TikeeShotSide.RIGHT, fields=["resolution"])
+            missing = await service.get_tikee_shot(camera_uuid, "12345678", 11, TikeeShotSide.LEFT)
+            sequence, photo_index, camera = await asyncio.gather(
+                service.get_tikee_shot_of_sequence(camera_uuid, "12345678"),
+                service.get_tikee_shot_of_photo_index(camera_uuid, "12345678", 2),
+                service.get_tikee_shot_of_camera_by_id(camera_uuid),
+            )
+            return created_shots, by_id, shot, missing, sequence, photo_index, camera
+
+    created_shots, by_id, shot, missing, sequence, photo_index, camera = asyncio.run(scenario())
+
+    assert by_id == created_shots[0]
+    assert shot.model_fields_set == {"PK", "SK", "resolution"}
+    assert missing is None
+    assert sorted(shot.SK for shot in sequence) == sorted(shot.SK for shot in created_shots)
+    assert sorted(shot.SK for shot in photo_index) == ["0000000002#left", "0000000002#right"]
+    assert len(camera) == 20
+
+def test_create_updates_sequence_summary(moto_endpoint):
+    """Test that the shots created by the asynchronous service are added to the summary of their sequence"""
+    def build_dated_shot(side, photo_index, file_size, day):
+        return NewTikeeShot(
+            s3_key=f"12345678-1234-5678-1234-567812345678/12345678/{side}/my_photo{photo_index}.jpg",
+            resolution="1920x1080",
+            file_size=file_size,
+            shooting_date=datetime(2024, 1, day, 12, 0)
+        )
+
+    async def scenario():
+        async with AsyncTikeeShotServices(endpoint_url=moto_endpoint) as service:
+            await service.create(build_dated_shot("left", 1, 1000, 10))
+            await service.create(build_dated_shot("right", 1, 2000, 12))
+            await service.create(build_dated_shot("left", 2, 500, 8))
+            await service.create(build_dated_shot("right", 1, 2500, 12))
+
+    asyncio.run(scenario())
+    client = boto3.client("dynamodb", constants.AWS_REGION, endpoint_url=moto_endpoint)
+    item = client.get_item(
+        TableName=constants.DDB_TABLE_NAME,
+        Key=TikeeShotServices._summary_key("12345678-1234-5678-1234-567812345678#12345678"),
+        ConsistentRead=True,
+    )["Item"]
+    summary = ORM_SEQUENCE_SUMMARY_CODEC.decode(item)
+
+    assert (summary.shot_count, summary.total_file_size) == (3, 4000)
+    assert summary.first_shooting_date == datetime(2024, 1, 8, 12, 0)
+    assert summary.last_shooting_date == datetime(2024, 1, 12, 12, 0)
+
+def test_concurrency_is_bounded(moto_endpoint):
+    """Test that no more than max_concurrency requests are in flight at once"""
+    in_flight = 0
+    max_in_flight = 0
+
+    async def scenario():
+        async with AsyncTikeeShotServices(endpoint_url=moto_endpoint, max_concurrency=3) as service:
+            get_item = service.client.get_item
+            async def counting_get_item(**kwargs):
+                nonlocal in_flight, max_in_flight
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+                try:
+                    await asyncio.sleep(0.01)
+                    return await get_item(**kwargs)
+                finally:
+                    in_flight -= 1
+            service.client.get_item = counting_get_item
+            return await asyncio.gather(*(
+                service.get_tikee_shot(UUID('12345678-1234-5678-1234-567812345678'), "12345678", photo_index, TikeeShotSide.LEFT)
+                for photo_index in range(12)
+            ))
+
+    assert asyncio.run(scenario()) == [None] * 12
+    assert max_in_flight == 3
+
+def test_service_must_be_entered():
+    """Test that the service refuses requests before its client is opened"""
+    with pytest.raises(RuntimeError):
+        asyncio.run(AsyncTikeeShotServices().get_tikee_shot_of_sequence(UUID('12345678-1234-5678-1234-567812345678'), "12345678"))
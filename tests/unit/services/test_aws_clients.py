@@ -0,0 +1,81 @@
+import json
+import boto3
+from botocore.config import Config
+from moto import mock_aws
+
+from src.services import aws_clients
+from src.services.tikee_shot_service import TikeeShotServices
+from src.lambdas.lambda_create_shot.lambda_create_shot import lambda_handler
+from src.constants.constants import AWS_MAX_POOL_CONNECTIONS
+
+
+def count_built_clients(monkeypatch):
+    """Count the clients and resources built by boto3 sessions, per service"""
+    built = {"client": [], "resource": []}
+    original_client = boto3.session.Session.client
+    original_resource = boto3.session.Session.resource
+
+    def client(self, service_name, *args, **kwargs):
+        built["client"].append(service_name)
+        return original_client(self, service_name, *args, **kwargs)
+
+    def resource(self, service_name, *args, **kwargs):
+        built["resource"].append(service_name)
+        return original_resource(self, service_name, *args, **kwargs)
+
+    monkeypatch.setattr(boto3.session.Session, "client", client)
+    monkeypatch.setattr(boto3.session.Session, "resource", resource)
+    return built
+
+
+def test_get_client_is_built_once():
+    """Test that the registry returns the same client on every call"""
+    client = aws_clients.get_client("lambda")
+
+    assert aws_clients.get_client("lambda") is client
+    assert aws_clients.get_client("lambda", "us-east-1") is not client
+    assert client.meta.config.max_pool_connections == AWS_MAX_POOL_CONNECTIONS
+
+
+def test_build_config(monkeypatch):
+    """Test that timeouts and retries keep botocore's defaults unless set through the environment"""
+    config = aws_clients.build_config()
+    assert config.max_pool_connections == AWS_MAX_POOL_CONNECTIONS
+    assert config.read_timeout == Config().read_timeout
+    assert config.retries is None
+
+    monkeypatch.setattr(aws_clients, "AWS_READ_TIMEOUT", "5")
+    monkeypatch.setattr(aws_clients, "AWS_TCP_KEEPALIVE", "true")
+    config = aws_clients.build_config()
+    assert config.read_timeout == 5
+    assert config.tcp_keepalive is True
+
+
+def test_reset():
+    """Test that a reset registry builds new clients"""
+    client = aws_clients.get_client("lambda")
+    aws_clients.reset()
+
+    assert aws_clients.get_client("lambda") is not client
+
+
+@mock_aws
+def test_warm_invocations_reuse_clients(tikee_shot_table, stitcher_lambda, monkeypatch):
+    """Test that only one client per service is built across warm invocations of the lambda"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    lambda_client = stitcher_lambda.create_stitcher_lambda()
+    built = count_built_clients(monkeypatch)
+
+    for index in range(1, 4):
+        for side in ("left", "right"):
+            response = lambda_handler({"body": json.dumps({
+                "s3_key": f"12345678-1234-5678-1234-567812345678/12345678/{side}/my_photo{index}.jpg",
+                "resolution": "1920x1080",
+                "file_size": 1024,
+                "shooting_date": "2024-01-01T12:00:00"
+            })}, None)
+            assert response["statusCode"] == 201
+    TikeeShotServices()
+
+    assert built["resource"] == []
+    assert sorted(built["client"]) == ["dynamodb", "lambda"]
@@ -0,0 +1,104 @@
+import json
+from datetime import datetime
+from moto import mock_aws
+
+from src.services import metrics
+from src.lambdas.lambda_create_shot.lambda_create_shot import lambda_handler
+
+def read_emf_lines(capsys):
+    """Parse the EMF lines written to stdout"""
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+
+def test_disabled_invocation_records_nothing(capsys):
+    """Test that an invocation which is not sampled emits nothing and times nothing"""
+    with metrics.invocation("function", sample_rate=0):
+        assert metrics.stage("stage") is metrics.stage("other stage")
+        with metrics.stage("stage"):
+            pass
+
+    assert read_emf_lines(capsys) == []
+
+def test_sampled_invocation_emits_emf(capsys):
+    """Test that a sampled invocation emits its stages as one EMF line"""
+    @metrics.timed("service_call")
+    def service_call():
+        return "result"
+
+    with metrics.invocation("function", sample_rate=1, namespace="Tests"):
+        with metrics.stage("parse"):
+            pass
+        assert service_call() == "result"
+        assert service_call() == "result"
+
+    emf, = read_emf_lines(capsys)
+    assert emf["_aws"]["CloudWatchMetrics"] == [{
+        "Namespace": "Tests",
+        "Dimensions": [["Function"]],
+        "Metrics": [
+            {"Name": "parse", "Unit": "Milliseconds"},
+            {"Name": "service_call", "Unit": "Milliseconds"},
+            {"Name": "invocation", "Unit": "Milliseconds"},
+        ],
+    }]
+    assert emf["Function"] == "function"
+    assert isinstance(emf["parse"], float)
+    assert len(emf["service_call"]) == 2
+    assert emf["invocation"] >= emf["parse"]
+
+def test_sample_rate(capsys, monkeypatch):
+    """Test that only the share of invocations drawn under the sample rate is recorded"""
+    draws = iter([0.1, 0.9])
+    monkeypatch.setattr(metrics.random, "random", lambda: next(draws))
+    for _ in range(2):
+        with metrics.invocation("function", sample_rate=0.5):
+            pass
+
+    assert len(read_emf_lines(capsys)) == 1
+
+@mock_aws
+def test_lambda_handler_stages(tikee_shot_table, capsys, monkeypatch):
+    """Test that a sampled invocation of the handler times its phases and service calls"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    monkeypatch.setattr(metrics, "METRICS_SAMPLE_RATE", 1.0)
+
+    response = lambda_handler({"body": json.dumps({
+        "s3_key": "12345678-1234-5678-1234-567812345678/12345678/left/my_photo1.jpg",
+        "resolution": "1920x1080",
+        "file_size": 1024,
+        "shooting_date": datetime(2024, 1, 1, 12, 0).isoformat(),
+    })}, None)
+
+    assert response["statusCode"] == 201
+    emf, = read_emf_lines(capsys)
+    assert emf["Function"] == "lambda_create_shot"
+    assert {
+        "parse_json",
+        "validate",
+        "to_orm",
+        "TikeeShotServices.create_with_pairing_check",
+        "TikeeShotServices.register_side",
+        "stitcher_flush",
+        "invocation",
+    } <= set(emf)
+
+@mock_aws
+def test_lambda_handler_batch_stages(tikee_shot_table, atomic_dynamodb, capsys, monkeypatch):
+    """Test that the service calls made by the threads of a batch are recorded"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    monkeypatch.setattr(metrics, "METRICS_SAMPLE_RATE", 1.0)
+
+    response = lambda_handler({"body": json.dumps([
+        {
+            "s3_key": f"12345678-1234-5678-1234-567812345678/12345678/left/my_photo{photo_index}.jpg",
+            "resolution": "1920x1080",
+            "file_size": 1024,
+            "shooting_date": datetime(2024, 1, 1, 12, 0).isoformat(),
+        }
+        for photo_index in range(1, 4)
+    ])}, None)
+
+    assert response["statusCode"] == 201
+    emf, = read_emf_lines(capsys)
+    assert {"validate", "create_shots", "invocation"} <= set(emf)
+    assert len(emf["TikeeShotServices.create_with_pairing_check"]) == 3
+    assert len(emf["TikeeShotServices.register_side"]) == 3
@@ -0,0 +1,80 @@
+import pytest
+
+from src.services.pagination import ShotIterator, encode_cursor, decode_cursor
+
+
+def build_pages(items, page_size):
+    """Build a fake query function serving items page by page"""
+    calls = []
+
+    def query(Limit=page_size, ExclusiveStartKey=None, **kwargs):
+        calls.append(ExclusiveStartKey)
+        start = 0 if ExclusiveStartKey is None else [item["PK"] for item in items].index(ExclusiveStartKey["PK"]) + 1
+        page = items[start:start + Limit]
+        response = {"Items": page}
+        if start + Limit < len(items):
+            response["LastEvaluatedKey"] = {"PK": page[-1]["PK"]}
+        return response
+
+    return query, calls
+
+
+def test_encode_decode_cursor():
+    """Test that a cursor decodes back to its key"""
+    key = {"PK": "12345678-1234-5678-1234-567812345678#12345678", "SK": "1#left"}
+
+    assert decode_cursor(encode_cursor(key)) == key
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", encode_cursor(["PK"])])
+def test_decode_invalid_cursor(cursor):
+    """Test that a cursor not built by encode_cursor is rejected"""
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_shot_iterator_reads_pages_lazily():
+    """Test that pages are only read when the iteration reaches them"""
+    items = [{"PK": str(index)} for index in range(10)]
+    query, calls = build_pages(items, 3)
+    iterator = iter(ShotIterator(query, {}, ("PK",), lambda item: item["PK"], page_size=3))
+
+    assert [next(iterator) for _ in range(4)] == ["0", "1", "2", "3"]
+    assert len(calls) == 2
+    assert list(iterator) == [str(index) for index in range(4, 10)]
+    assert len(calls) == 4
+
+
+def test_shot_iterator_resumes_from_cursor():
+    """Test that a new iterator resumes right after the last item yielded"""
+    items = [{"PK": str(index)} for index in range(10)]
+    query, calls = build_pages(items, 4)
+    shot_iterator = ShotIterator(query, {}, ("PK",), lambda item: item["PK"], page_size=4)
+    first = []
+    for pk in shot_iterator:
+        first.append(pk)
+        if len(first) == 6:
+            break
+    calls.clear()
+
+    resumed = ShotIterator(query, {}, ("PK",), lambda item: item["PK"], page_size=4, cursor=shot_iterator.cursor)
+
+    assert list(resumed) == [str(index) for index in range(6, 10)]
+    assert calls[0] == {"PK": "5"}
+    assert resumed.cursor is None
+
+
+def test_shot_iterator_single_use():
+    """Test that an iterator cannot be iterated twice"""
+    query, _ = build_pages([{"PK": "0"}], 1)
+    shot_iterator = ShotIterator(query, {}, ("PK",), lambda item: item)
+    list(shot_iterator)
+
+    with pytest.raises(RuntimeError):
+        iter(shot_iterator)
+
+
+def test_shot_iterator_invalid_page_size():
+    """Test that the page size must be positive"""
+    with pytest.raises(ValueError):
+        ShotIterator(lambda **kwargs: {}, {}, ("PK",), lambda item: item, page_size=0)
@@ -0,0 +1,62 @@
+import pytest
+
+from src.services.parallel_scan import ScanCheckpoint, parallel_scan
+
+
+def build_segmented_scan(items, page_size, failing_segment=None):
+    """Build a fake scan function splitting items into segments by their index"""
+    calls = []
+
+    def scan(Segment, TotalSegments, ExclusiveStartKey=None, **kwargs):
+        calls.append((Segment, ExclusiveStartKey))
+        if Segment == failing_segment:
+            raise RuntimeError("Segment failed")
+        segment_items = [item for item in items if item["id"] % TotalSegments == Segment]
+        start = 0 if ExclusiveStartKey is None else ExclusiveStartKey["position"]
+        response = {"Items": segment_items[start:start + page_size]}
+        if start + page_size < len(segment_items):
+            response["LastEvaluatedKey"] = {"position": start + page_size}
+        return response
+
+    return scan, calls
+
+
+def test_parallel_scan_reads_every_segment():
+    """Test that every item of every segment reaches the sink exactly once"""
+    items = [{"id": index} for index in range(100)]
+    scan, calls = build_segmented_scan(items, 7)
+    scanned = []
+
+    checkpoint = parallel_scan(scan, {}, scanned.append, total_segments=4, max_workers=2)
+
+    assert sorted(item["id"] for item in scanned) == list(range(100))
+    assert {segment for segment, _ in calls} == {0, 1, 2, 3}
+    assert checkpoint.is_complete()
+    assert checkpoint.cursors == {}
+
+
+def test_parallel_scan_resumes_from_checkpoint():
+    """Test that a scan resumes from the pages recorded in its checkpoint"""
+    items = [{"id": index} for index in range(40)]
+    scan, _ = build_segmented_scan(items, 5, failing_segment=1)
+    scanned = []
+    saved = []
+
+    with pytest.raises(RuntimeError):
+        parallel_scan(scan, {}, scanned.append, total_segments=2, max_workers=1,
+                      on_checkpoint=lambda checkpoint: saved.append(checkpoint.model_dump_json()))
+    checkpoint = ScanCheckpoint.model_validate_json(saved[-1])
+    assert checkpoint.completed_segments == {0}
+
+    scan, calls = build_segmented_scan(items, 5)
+    checkpoint = parallel_scan(scan, {}, scanned.append, total_segments=2, checkpoint=checkpoint)
+
+    assert sorted(item["id"] for item in scanned) == list(range(40))
+    assert {segment for segment, _ in calls} == {1}
+    assert checkpoint.is_complete()
+
+
+def test_parallel_scan_rejects_other_segmentation():
+    """Test that a checkpoint cannot be resumed with another number of segments"""
+    with pytest.raises(ValueError):
+        parallel_scan(lambda **kwargs: {}, {}, print, total_segments=4, checkpoint=ScanCheckpoint(total_segments=2))
@@ -0,0 +1,46 @@
+from src.services import shot_cache
+from src.services.shot_cache import ShotCache
+
+def test_get_and_put():
+    """Test that values are returned until invalidated, and hits and misses counted"""
+    cache = ShotCache()
+    assert cache.get("key") is None
+    cache.put("key", "value")
+    assert cache.get("key") == "value"
+    cache.invalidate("key")
+    assert cache.get("key", "default") == "default"
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_least_recently_used_is_evicted():
+    """Test that the least recently used entry is evicted once max_size is reached"""
+    cache = ShotCache(max_size=2)
+    cache.put("first", 1)
+    cache.put("second", 2)
+    cache.get("first")
+    cache.put("third", 3)
+
+    assert len(cache) == 2
+    assert cache.get("second") is None
+    assert cache.get("first") == 1
+    assert cache.get("third") == 3
+
+def test_entries_expire(monkeypatch):
+    """Test that an entry is no longer returned after its ttl"""
+    now = [100.0]
+    monkeypatch.setattr(shot_cache.time, "monotonic", lambda: now[0])
+    cache = ShotCache(ttl=5)
+    cache.put("key", "value")
+
+    now[0] = 104.9
+    assert cache.get("key") == "value"
+    now[0] = 105.0
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+def test_clear():
+    """Test that clear forgets entries and counters"""
+    cache = ShotCache()
+    cache.put("key", "value")
+    cache.get("key")
+    cache.clear()
+    assert (len(cache), cache.hits, cache.misses) == (0, 0, 0)
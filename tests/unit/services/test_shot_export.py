@@ -0,0 +1,122 @@
+"""Unit tests for the export of tikee shots"""
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+from moto import mock_aws
+
+from src.model.base.base_modelling import TikeeMetadata
+from src.model.business.business_modelling import NewTikeeShot
+from src.services.shot_export import EXPORT_FIELDS, export_shots, open_writer
+from src.services.tikee_shot_service import TikeeShotServices
+
+CAMERA_ID = UUID("12345678-1234-5678-1234-567812345678")
+
+def build_shots(count):
+    """Build the ORM shots of a sequence, the first ones with GPS metadata"""
+    return [
+        NewTikeeShot(
+            s3_key=f"{CAMERA_ID}/12345678/{('left', 'right')[index % 2]}/my_photo{index // 2}.jpg",
+            resolution="1920x1080",
+            file_size=1024 + index,
+            shooting_date=datetime(2024, 1, 1, 12, 0) + timedelta(seconds=index),
+            metadata=TikeeMetadata(
+                gps_latitude=Decimal("48.858370123456789"), gps_longitude=Decimal("2.294481"), gps_altitude=Decimal("35")
+            ) if index < 3 else None,
+        ).to_orm()
+        for index in range(count)
+    ]
+
+def test_export_ndjson(tmp_path):
+    """Test that shots are written as JSON lines in batches, Decimal values being exact"""
+    shots = build_shots(25)
+
+    report = export_shots(iter(shots), open_writer(tmp_path / "shots.ndjson", "ndjson"), batch_rows=10)
+
+    assert (report.rows, report.batches) == (25, 3)
+    assert report.bytes_written == (tmp_path / "shots.ndjson").stat().st_size
+    rows = [json.loads(line) for line in (tmp_path / "shots.ndjson").read_text().splitlines()]
+    assert len(rows) == 25
+    assert rows[0] == {
+        "PK": shots[0].PK,
+        "SK": shots[0].SK,
+        "camera_id": str(CAMERA_ID),
+        "sequence": "12345678",
+        "photo_index": 0,
+        "side": "left",
+        "photo_name": "my_photo0.jpg",
+        "resolution": "1920x1080",
+        "file_size": 1024,
+        "shooting_date": "2024-01-01T12:00:00",
+        "gps_latitude": "48.858370123456789",
+        "gps_longitude": "2.294481",
+        "gps_altitude": "35",
+    }
+    assert "gps_latitude" not in rows[3]
+
+@pytest.mark.parametrize("export_format", ["parquet", "arrow"])
+def test_export_columnar(tmp_path, export_format):
+    """Test that columnar files have typed columns, one row group or record batch per batch"""
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+    shots = build_shots(25)
+    shots[4].shooting_date = datetime(2024, 1, 1, 14, 0, tzinfo=timezone(timedelta(hours=2)))
+    path = tmp_path / f"shots.{export_format}"
+
+    report = export_shots(shots, open_writer(path, export_format), batch_rows=10)
+
+    assert (report.rows, report.batches) == (25, 3)
+    if export_format == "parquet":
+        assert pyarrow.parquet.ParquetFile(path).num_row_groups == 3
+        table = pyarrow.parquet.read_table(path)
+    else:
+        reader = pyarrow.ipc.open_file(path)
+        assert reader.num_record_batches == 3
+        table = reader.read_all()
+    assert table.column_names == list(EXPORT_FIELDS)
+    assert table.schema.field("camera_id").type == pa.uuid()
+    assert table.schema.field("file_size").type == pa.int64()
+    assert table.schema.field("shooting_date").type == pa.timestamp("us")
+    assert table.schema.field("gps_latitude").type == pa.decimal128(38, 18)
+    assert pa.types.is_dictionary(table.schema.field("resolution").type)
+
+    rows = table.to_pylist()
+    assert rows[0]["camera_id"] == CAMERA_ID
+    assert rows[0]["gps_latitude"] == Decimal("48.858370123456789")
+    assert rows[3]["gps_latitude"] is None
+    assert rows[4]["shooting_date"] == datetime(2024, 1, 1, 12, 0)
+    assert [row["file_size"] for row in rows] == [shot.file_size for shot in shots]
+    assert {row["resolution"] for row in rows} == {"1920x1080"}
+
+def test_unknown_export_format(tmp_path):
+    """Test that an unknown format is refused"""
+    with pytest.raises(ValueError, match="Unknown export format"):
+        open_writer(tmp_path / "shots.csv", "csv")
+
+@mock_aws
+def test_export_sequence_page_by_page(tikee_shot_table, tmp_path):
+    """Test exporting a sequence read lazily from the table"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices(trusted_hydration=True)
+    service.create_many([
+        NewTikeeShot(
+            s3_key=f"{CAMERA_ID}/12345678/left/my_photo{index}.jpg",
+            resolution="1920x1080",
+            file_size=1024,
+            shooting_date=datetime(2024, 1, 1, 12, 0)
+        )
+        for index in range(30)
+    ])
+
+    report = export_shots(
+        service.iter_tikee_shot_of_sequence(CAMERA_ID, "12345678", page_size=7),
+        open_writer(tmp_path / "sequence.ndjson", "ndjson"),
+        batch_rows=8,
+    )
+
+    assert (report.rows, report.batches) == (30, 4)
+    lines = (tmp_path / "sequence.ndjson").read_text().splitlines()
+    assert [json.loads(line)["photo_index"] for line in lines] == list(range(30))
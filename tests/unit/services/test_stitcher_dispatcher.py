@@ -0,0 +1,65 @@
+import pytest
+from datetime import datetime
+from moto import mock_aws
+
+from src.model.business.business_modelling import NewTikeeShot
+from src.services.stitcher_dispatcher import StitcherDispatcher
+
+def build_orm_shot(side, photo_index):
+    """Build the ORM model of a shot"""
+    return NewTikeeShot(
+        s3_key=f"12345678-1234-5678-1234-567812345678/12345678/{side}/my_photo{photo_index}.jpg",
+        resolution="1920x1080",
+        file_size=1024,
+        shooting_date=datetime(2024, 1, 1, 12, 0)
+    ).to_orm()
+
+@mock_aws
+def test_flush_sends_pairs_in_one_payload(stitcher_lambda, monkeypatch):
+    """Test that the pending pairs are sent as a single payload when flushing"""
+    stitcher_lambda.create_stitcher_lambda()
+    dispatcher = StitcherDispatcher()
+    payloads = []
+    invoke = dispatcher._invoke
+    def spy_invoke(pairs):
+        payloads.append(pairs)
+        return invoke(pairs)
+    monkeypatch.setattr(dispatcher, "_invoke", spy_invoke)
+
+    for photo_index in (1, 2, 3):
+        dispatcher.add(build_orm_shot("left", photo_index), build_orm_shot("right", photo_index))
+
+    assert payloads == []
+    assert dispatcher.flush() == 3
+    assert payloads == [[
+        {
+            "left_side_s3_path": f"12345678-1234-5678-1234-567812345678/12345678/left/my_photo{photo_index}.jpg",
+            "right_side_s3_path": f"12345678-1234-5678-1234-567812345678/12345678/right/my_photo{photo_index}.jpg",
+        }
+        for photo_index in (1, 2, 3)
+    ]]
+    assert dispatcher.flush() == 0
+
+def test_full_payloads_are_sent_before_flushing(monkeypatch):
+    """Test that a payload is sent in the background once it holds max_pairs_per_payload pairs"""
+    payloads = []
+    monkeypatch.setattr(StitcherDispatcher, "_invoke", lambda dispatcher, pairs: payloads.append(pairs) or len(pairs))
+    dispatcher = StitcherDispatcher(max_pairs_per_payload=2)
+
+    for photo_index in range(5):
+        dispatcher.add(build_orm_shot("left", photo_index), build_orm_shot("right", photo_index))
+
+    assert dispatcher.flush() == 5
+    assert [len(pairs) for pairs in payloads] == [2, 2, 1]
+
+def test_flush_raises_invocation_errors(monkeypatch):
+    """Test that an invocation failing in the background is raised by flush"""
+    def failing_invoke(dispatcher, pairs):
+        raise RuntimeError("Stitcher unavailable")
+    monkeypatch.setattr(StitcherDispatcher, "_invoke", failing_invoke)
+    dispatcher = StitcherDispatcher()
+    dispatcher.add(build_orm_shot("left", 1), build_orm_shot("right", 1))
+    dispatcher.dispatch()
+
+    with pytest.raises(RuntimeError, match="Stitcher unavailable"):
+        dispatcher.flush()
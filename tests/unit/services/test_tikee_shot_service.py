@@ -2,10 +2,13 @@ import pytest
 import boto3
 from moto import mock_aws
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timedelta
+from decimal import Decimal
 
 from src.services.tikee_shot_service import TikeeShotServices
+from src.services.shot_cache import ShotCache
 from src.model.business.business_modelling import NewTikeeShot, TikeeShotSide
+from src.model.base.base_modelling import TikeeMetadata
 from src.model.orm.orm_modelling import ORMTikeeShot, ORMTikeeShotIdentifier
 
 
@@ -223,7 +226,7 @@ def test_build_sk():
     
     # Test with all values provided
     sk1 = service.build_sk(1, TikeeShotSide.LEFT)
-    assert sk1 == "1#left"
+    assert sk1 == "0000000001#left"
     
     # Test with None values
     sk2 = service.build_sk(None, None)
@@ -231,8 +234,590 @@ def test_build_sk():
     
     # Test with mixed values
     sk3 = service.build_sk(1, None)
-    assert sk3 == "1#"
+    assert sk3 == "0000000001#"
+
+    # Sorted numerically
+    assert service.build_sk(2, TikeeShotSide.LEFT) < service.build_sk(10, TikeeShotSide.LEFT)
     
     sk4 = service.build_sk(None, TikeeShotSide.RIGHT)
     assert sk4 == "#right"
 
+
+@mock_aws
+def test_create_many(tikee_shot_table):
+    """Test creating shots in batches of 25 items"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+
+    camera_uuid = UUID('12345678-1234-5678-1234-567812345678')
+    sequence = "12345678"
+    new_shots = [
+        NewTikeeShot(
+            s3_key=f"{str(camera_uuid)}/{sequence}/{TikeeShotSide.LEFT.value}/my_photo{str(pic_index)}.jpg",
+            resolution="1920x1080",
+            file_size=1024,
+            shooting_date=datetime(2024, 1, 1, 12, 0)
+        )
+        for pic_index in range(1, 61)
+    ]
+
+    created, failed = service.create_many(new_shots + new_shots[:5])
+
+    assert len(created) == 60
+    assert failed == []
+    assert len(service.get_tikee_shot_of_sequence(camera_uuid, sequence)) == 60
+
+@mock_aws
+def test_create_many_reports_unprocessed_items(tikee_shot_table, monkeypatch):
+    """Test that items DynamoDB keeps leaving unprocessed are reported as failed"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+    monkeypatch.setattr("src.services.tikee_shot_service.BATCH_RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(service, "_batch_write", lambda requests: requests[:1])
+
+    new_shots = [
+        NewTikeeShot(
+            s3_key=f"12345678-1234-5678-1234-567812345678/12345678/left/my_photo{str(pic_index)}.jpg",
+            resolution="1920x1080",
+            file_size=1024,
+            shooting_date=datetime(2024, 1, 1, 12, 0)
+        )
+        for pic_index in range(1, 4)
+    ]
+
+    created, failed = service.create_many(new_shots)
+
+    assert [shot.photo_index for shot in created] == [2, 3]
+    assert [shot.photo_index for shot in failed] == [1]
+
+@mock_aws
+def test_get_tikee_shots_by_ids(tikee_shot_table):
+    """Test retrieving several tikee shots by their identifiers"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+
+    created_shot = service.create(NewTikeeShot(
+        s3_key="12345678-1234-5678-1234-567812345678/12345678/left/my_photo1.jpg",
+        resolution="1920x1080",
+        file_size=1024,
+        shooting_date=datetime(2024, 1, 1, 12, 0)
+    ))
+
+    retrieved_shots = service.get_tikee_shots_by_ids([
+        ORMTikeeShotIdentifier(PK=created_shot.PK, SK=created_shot.SK),
+        ORMTikeeShotIdentifier(PK=created_shot.PK, SK=created_shot.SK),
+        ORMTikeeShotIdentifier(PK=created_shot.PK, SK="0000000001#right"),
+    ])
+
+    assert len(retrieved_shots) == 1
+    assert retrieved_shots[0].SK == created_shot.SK
+
+@mock_aws
+def test_get_tikee_shot_of_camera_by_id_follows_pages(tikee_shot_table, monkeypatch):
+    """Test that the camera listing only reads the camera's shots and reads every page"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+
+    camera_uuid = UUID('12345678-1234-5678-1234-567812345678')
+    other_camera_uuid = UUID('87654321-4321-8765-4321-876543218765')
+    for uuid in (camera_uuid, other_camera_uuid):
+        for pic_index in range(1, 6):
+            service.create(NewTikeeShot(
+                s3_key=f"{str(uuid)}/12345678/{TikeeShotSide.LEFT.value}/my_photo{str(pic_index)}.jpg",
+                resolution="1920x1080",
+                file_size=1024,
+                shooting_date=datetime(2024, 1, 1, 12, 0)
+            ))
+
+    # Force one item per page
+    queries = []
+    original_query = service.client.query
+    def query(**kwargs):
+        queries.append(kwargs)
+        return original_query(Limit=1, **kwargs)
+    monkeypatch.setattr(service.client, "query", query)
+
+    retrieved_shots = service.get_tikee_shot_of_camera_by_id(camera_uuid)
+
+    assert len(retrieved_shots) == 5
+    assert all(shot.camera_id == camera_uuid for shot in retrieved_shots)
+    assert len(queries) >= 5
+    assert all(query["IndexName"] == "camera_id-index" for query in queries)
+
+@mock_aws
+def test_iter_tikee_shot_of_sequence_resumes_from_cursor(tikee_shot_table):
+    """Test streaming the shots of a sequence and resuming from a cursor"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+
+    camera_uuid = UUID('12345678-1234-5678-1234-567812345678')
+    sequence = "12345678"
+    service.create_many([
+        NewTikeeShot(
+            s3_key=f"{str(camera_uuid)}/{sequence}/{side.value}/my_photo{str(pic_index)}.jpg",
+            resolution="1920x1080",
+            file_size=1024,
+            shooting_date=datetime(2024, 1, 1, 12, 0)
+        )
+        for pic_index in range(1, 11)
+        for side in (TikeeShotSide.LEFT, TikeeShotSide.RIGHT)
+    ])
+
+    shots = service.iter_tikee_shot_of_sequence(camera_uuid, sequence, page_size=3)
+    first_shots = []
+    for shot in shots:
+        first_shots.append(shot)
+        if len(first_shots) == 7:
+            break
+    remaining_shots = list(service.iter_tikee_shot_of_sequence(camera_uuid, sequence, page_size=3, cursor=shots.cursor))
+
+    assert len(first_shots) + len(remaining_shots) == 20
+    assert {(shot.PK, shot.SK) for shot in first_shots}.isdisjoint({(shot.PK, shot.SK) for shot in remaining_shots})
+
+@mock_aws
+def test_iter_tikee_shot_of_photo_index_and_camera(tikee_shot_table):
+    """Test streaming the shots of a photo index and of a camera"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+
+    camera_uuid = UUID('12345678-1234-5678-1234-567812345678')
+    sequence = "12345678"
+    for side in (TikeeShotSide.LEFT, TikeeShotSide.RIGHT):
+        service.create(NewTikeeShot(
+            s3_key=f"{str(camera_uuid)}/{sequence}/{side.value}/my_photo1.jpg",
+            resolution="1920x1080",
+            file_size=1024,
+            shooting_date=datetime(2024, 1, 1, 12, 0)
+        ))
+
+    photo_index_shots = service.iter_tikee_shot_of_photo_index(camera_uuid, sequence, 1, page_size=1)
+    camera_shots = service.iter_tikee_shot_of_camera_by_id(camera_uuid, page_size=1)
+
+    assert {shot.side for shot in photo_index_shots} == {TikeeShotSide.LEFT, TikeeShotSide.RIGHT}
+    assert len(list(camera_shots)) == 2
+    assert photo_index_shots.cursor is None
+
+@mock_aws
+def test_scan_tikee_shots(tikee_shot_table):
+    """Test streaming every shot of the table with a parallel scan"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+
+    service.create_many([
+        NewTikeeShot(
+            s3_key=f"12345678-1234-5678-1234-56781234567{str(camera_index)}/12345678/left/my_photo{str(pic_index)}.jpg",
+            resolution="1920x1080",
+            file_size=1024,
+            shooting_date=datetime(2024, 1, 1, 12, 0)
+        )
+        for camera_index in range(5)
+        for pic_index in range(1, 11)
+    ])
+
+    shots = []
+    checkpoints = []
+    checkpoint = service.scan_tikee_shots(shots.append, total_segments=4, page_size=3, on_checkpoint=checkpoints.append)
+    raw_items = []
+    service.scan_tikee_shots(raw_items.append, total_segments=2, hydrate=False)
+
+    assert len(shots) == 50
+    assert all(isinstance(shot, ORMTikeeShot) for shot in shots)
+    assert len({(shot.PK, shot.SK) for shot in shots}) == 50
+    assert checkpoint.is_complete()
+    assert len(checkpoints) > 4
+    assert len(raw_items) == 50
+    assert isinstance(raw_items[0], dict)
+
+@mock_aws
+def test_create_tikee_shot_with_gps_metadata(tikee_shot_table):
+    """Test that GPS Decimal values are written as exact numbers"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+
+    created_shot = service.create(NewTikeeShot(
+        s3_key="12345678-1234-5678-1234-567812345678/12345678/left/my_photo1.jpg",
+        resolution="1920x1080",
+        file_size=1024,
+        shooting_date=datetime(2024, 1, 1, 12, 0),
+        metadata=TikeeMetadata(gps_latitude=Decimal("48.858370123456789"), gps_altitude=Decimal("35"))
+    ))
+
+    item = service.client.get_item(TableName=service.table_name, Key={"PK": {"S": created_shot.PK}, "SK": {"S": created_shot.SK}})["Item"]
+    retrieved_shot = service.get_tikee_shot_by_id(ORMTikeeShotIdentifier(PK=created_shot.PK, SK=created_shot.SK))
+
+    assert item["GPSLatitude"] == {"N": "48.858370123456789"}
+    assert retrieved_shot.gps_latitude == Decimal("48.858370123456789")
+    assert retrieved_shot.gps_altitude == Decimal("35")
+
+@mock_aws
+def test_trusted_hydration(tikee_shot_table):
+    """Test that trusted hydration is configurable per service and per call"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices(trusted_hydration=True)
+
+    camera_uuid = UUID('12345678-1234-5678-1234-567812345678')
+    service.create(NewTikeeShot(
+        s3_key=f"{str(camera_uuid)}/12345678/left/my_photo1.jpg",
+        resolution="1920x1080",
+        file_size=1024,
+        shooting_date=datetime(2024, 1, 1, 12, 0)
+    ))
+    # Corrupt the shot behind the service's back
+    service.client.update_item(
+        TableName=service.table_name,
+        Key={"PK": {"S": f"{str(camera_uuid)}#12345678"}, "SK": {"S": "0000000001#left"}},
+        UpdateExpression="SET resolution = :resolution",
+        ExpressionAttributeValues={":resolution": {"S": "invalid"}},
+    )
+
+    trusted_shot = service.get_tikee_shot(camera_uuid, "12345678", 1, TikeeShotSide.LEFT)
+    assert trusted_shot.resolution == "invalid"
+    assert trusted_shot.camera_id == camera_uuid
+    assert trusted_shot.side == TikeeShotSide.LEFT
+    with pytest.raises(ValueError):
+        service.get_tikee_shot_of_sequence(camera_uuid, "12345678", trusted=False)
+    with pytest.raises(ValueError):
+        TikeeShotServices().get_tikee_shot_of_camera_by_id(camera_uuid)
+
+@mock_aws
+def test_read_projected_fields(tikee_shot_table, monkeypatch):
+    """Test that reads with fields only request those attributes and the key"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+
+    camera_uuid = UUID('12345678-1234-5678-1234-567812345678')
+    created_shot = service.create(NewTikeeShot(
+        s3_key=f"{str(camera_uuid)}/12345678/left/my_photo1.jpg",
+        resolution="1920x1080",
+        file_size=1024,
+        shooting_date=datetime(2024, 1, 1, 12, 0)
+    ))
+    requests = []
+    query = service.client.query
+    def spy_query(**kwargs):
+        requests.append(kwargs)
+        return query(**kwargs)
+    monkeypatch.setattr(service.client, "query", spy_query)
+
+    shots = service.get_tikee_shot_of_photo_index(camera_uuid, "12345678", 1, fields=["resolution"])
+    by_id = service.get_tikee_shots_by_ids(
+        [ORMTikeeShotIdentifier(PK=created_shot.PK, SK=created_shot.SK)], fields=["resolution", "photo_name"]
+    )
+    by_camera = service.get_tikee_shot_of_camera_by_id(camera_uuid, fields=["file_size"])
+
+    assert sorted(requests[0]["ExpressionAttributeNames"].values()) == ["PK", "SK", "resolution"]
+    assert shots[0].model_fields_set == {"PK", "SK", "resolution"}
+    assert shots[0].resolution == "1920x1080"
+    assert by_id[0].model_fields_set == {"PK", "SK", "resolution", "photo_name"}
+    assert by_camera[0].model_fields_set == {"PK", "SK", "camera_id", "file_size"}
+    assert by_camera[0].file_size == 1024
+    assert service.get_tikee_shot(camera_uuid, "12345678", 1, TikeeShotSide.LEFT, fields=[]).model_fields_set == {"PK", "SK"}
+    with pytest.raises(ValueError):
+        service.get_tikee_shot_of_sequence(camera_uuid, "12345678", fields=["unknown"])
+
+@mock_aws
+def test_create_with_pairing_check(tikee_shot_table, monkeypatch):
+    """Test that a shot is written only if its opposite side has the same resolution"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+
+    camera_uuid = UUID('12345678-1234-5678-1234-567812345678')
+    def build_new_shot(side, resolution):
+        return NewTikeeShot(
+            s3_key=f"{str(camera_uuid)}/12345678/{side}/my_photo1.jpg",
+            resolution=resolution,
+            file_size=1024,
+            shooting_date=datetime(2024, 1, 1, 12, 0)
+        )
+
+    left_side = service.create_with_pairing_check(build_new_shot("left", "1920x1080"))
+    with pytest.raises(ValueError, match="Resolution mismatch"):
+        service.create_with_pairing_check(build_new_shot("right", "1280x720"))
+    assert service.get_tikee_shot(camera_uuid, "12345678", 1, TikeeShotSide.RIGHT) is None
+
+    transact_write_items = service.client.transact_write_items
+    calls = []
+    def counting_transact_write_items(**kwargs):
+        calls.append(kwargs)
+        return transact_write_items(**kwargs)
+    monkeypatch.setattr(service.client, "transact_write_items", counting_transact_write_items)
+    right_side = service.create_with_pairing_check(build_new_shot("right", "1920x1080"))
+    assert len(calls) == 1
+    assert service.get_tikee_shot(camera_uuid, "12345678", 1, TikeeShotSide.LEFT) == left_side
+    assert service.get_tikee_shot(camera_uuid, "12345678", 1, TikeeShotSide.RIGHT) == right_side
+
+@mock_aws
+def test_create_with_pairing_check_retries_conflicts(tikee_shot_table, monkeypatch):
+    """Test that a transaction cancelled by a concurrent one is retried"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+    monkeypatch.setattr("src.services.tikee_shot_service.BATCH_RETRY_BASE_DELAY", 0)
+
+    transact_write_items = service.client.transact_write_items
+    calls = []
+    def conflicting_transact_write_items(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise service.client.exceptions.TransactionCanceledException(
+                {
+                    "Error": {"Code": "TransactionCanceledException", "Message": "Transaction cancelled"},
+                    "CancellationReasons": [{"Code": "TransactionConflict"}, {"Code": "None"}],
+                },
+                "TransactWriteItems",
+            )
+        return transact_write_items(**kwargs)
+    monkeypatch.setattr(service.client, "transact_write_items", conflicting_transact_write_items)
+
+    created_shot = service.create_with_pairing_check(NewTikeeShot(
+        s3_key="12345678-1234-5678-1234-567812345678/12345678/left/my_photo1.jpg",
+        resolution="1920x1080",
+        file_size=1024,
+        shooting_date=datetime(2024, 1, 1, 12, 0)
+    ))
+
+    assert len(calls) == 2
+    assert service.get_tikee_shot_by_id(ORMTikeeShotIdentifier(PK=created_shot.PK, SK=created_shot.SK)) == created_shot
+
+@mock_aws
+def test_register_side(tikee_shot_table):
+    """Test that only the registration finding the opposite side alone completes the pair"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+
+    def build_orm_shot(side):
+        return NewTikeeShot(
+            s3_key=f"12345678-1234-5678-1234-567812345678/12345678/{side}/my_photo1.jpg",
+            resolution="1920x1080",
+            file_size=1024,
+            shooting_date=datetime(2024, 1, 1, 12, 0)
+        ).to_orm()
+
+    assert service.register_side(build_orm_shot("left")) is False
+    assert service.register_side(build_orm_shot("left")) is False
+    assert service.register_side(build_orm_shot("right")) is True
+    assert service.register_side(build_orm_shot("right")) is False
+    assert service.register_side(build_orm_shot("left")) is False
+    assert service.register_side(build_orm_shot("stitched")) is False
+    # A released claim is taken again by the next registration, until the pair is dispatched
+    service.release_dispatch(build_orm_shot("right"))
+    assert service.register_side(build_orm_shot("left"), claim=False) is False
+    assert service.register_side(build_orm_shot("left")) is True
+    service.mark_dispatched(build_orm_shot("left"))
+    assert service.register_side(build_orm_shot("right")) is False
+    assert service.get_sequence_summary(
+        UUID("12345678-1234-5678-1234-567812345678"), "12345678", consistent=True
+    ).completed_pairs == 1
+
+@mock_aws
+def test_register_side_claim_expires(tikee_shot_table, monkeypatch):
+    """Test that a pair claimed by a dispatch that never settled is claimed again once its lease expired"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+    monkeypatch.setattr("src.constants.constants.STITCHER_DISPATCH_LEASE", -1)
+
+    def build_orm_shot(side):
+        return NewTikeeShot(
+            s3_key=f"12345678-1234-5678-1234-567812345678/12345678/{side}/my_photo1.jpg",
+            resolution="1920x1080",
+            file_size=1024,
+            shooting_date=datetime(2024, 1, 1, 12, 0)
+        ).to_orm()
+
+    assert service.register_side(build_orm_shot("left")) is False
+    assert service.register_side(build_orm_shot("right")) is True
+    assert service.register_side(build_orm_shot("right")) is True
+
+@mock_aws
+def test_scan_leaves_out_pair_records(tikee_shot_table):
+    """Test that pair records are not handed to the scan sink"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+
+    created_shot = service.create(NewTikeeShot(
+        s3_key="12345678-1234-5678-1234-567812345678/12345678/left/my_photo1.jpg",
+        resolution="1920x1080",
+        file_size=1024,
+        shooting_date=datetime(2024, 1, 1, 12, 0)
+    ))
+    service.register_side(created_shot)
+    scanned = []
+    service.scan_tikee_shots(scanned.append, total_segments=2)
+
+    assert scanned == [created_shot]
+
+@mock_aws
+def test_cached_lookups(tikee_shot_table, monkeypatch):
+    """Test that cached shots are read from the cache, unless a consistent read is asked"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    cache = ShotCache()
+    service = TikeeShotServices(cache=cache)
+
+    camera_uuid = UUID('12345678-1234-5678-1234-567812345678')
+    def build_new_shot(side):
+        return NewTikeeShot(
+            s3_key=f"{str(camera_uuid)}/12345678/{side}/my_photo1.jpg",
+            resolution="1920x1080",
+            file_size=1024,
+            shooting_date=datetime(2024, 1, 1, 12, 0)
+        )
+    left_side = service.create(build_new_shot("left"))
+    requests = []
+    for operation in ("get_item", "query", "batch_get_item"):
+        def spy(operation=operation, call=getattr(service.client, operation), **kwargs):
+            requests.append((operation, kwargs.get("ConsistentRead")))
+            return call(**kwargs)
+        monkeypatch.setattr(service.client, operation, spy)
+
+    assert service.get_tikee_shot(camera_uuid, "12345678", 1, TikeeShotSide.LEFT) is left_side
+    assert service.get_tikee_shot_by_id(ORMTikeeShotIdentifier(PK=left_side.PK, SK=left_side.SK)) is left_side
+    assert requests == []
+
+    assert service.get_tikee_shot_of_photo_index(camera_uuid, "12345678", 1) == [left_side]
+    assert service.get_tikee_shot_of_photo_index(camera_uuid, "12345678", 1) == [left_side]
+    assert requests == [("query", None)]
+
+    right_side = service.create(build_new_shot("right"))
+    assert service.get_tikee_shot_of_photo_index(camera_uuid, "12345678", 1) == [left_side, right_side]
+    assert service.get_tikee_shots_by_ids([
+        ORMTikeeShotIdentifier(PK=left_side.PK, SK=left_side.SK),
+        ORMTikeeShotIdentifier(PK=left_side.PK, SK="0000000002#left"),
+    ]) == [left_side]
+    assert requests == [("query", None), ("query", None), ("batch_get_item", None)]
+
+    assert service.get_tikee_shot(camera_uuid, "12345678", 1, TikeeShotSide.LEFT, consistent=True) == left_side
+    assert requests[-1] == ("get_item", True)
+    assert service.get_tikee_shot(camera_uuid, "12345678", 2, TikeeShotSide.LEFT) is None
+    assert service.get_tikee_shot(camera_uuid, "12345678", 2, TikeeShotSide.LEFT) is None
+    assert requests[-2:] == [("get_item", None), ("get_item", None)]
+    assert cache.hits == 4
+
+@mock_aws
+def test_sequence_summary(tikee_shot_table):
+    """Test that the summary of a sequence counts shots written again once, and completed pairs"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+
+    camera_uuid = UUID('12345678-1234-5678-1234-567812345678')
+    def build_new_shot(side, photo_index, file_size, day):
+        return NewTikeeShot(
+            s3_key=f"{str(camera_uuid)}/12345678/{side}/my_photo{photo_index}.jpg",
+            resolution="1920x1080",
+            file_size=file_size,
+            shooting_date=datetime(2024, 1, day, 12, 0)
+        )
+
+    assert service.get_sequence_summary(camera_uuid, "12345678") is None
+
+    left_side = service.create_with_pairing_check(build_new_shot("left", 1, 1000, 10))
+    right_side = service.create_with_pairing_check(build_new_shot("right", 1, 2000, 12))
+    for orm_tikee_shot in (left_side, right_side, right_side):
+        service.register_side(orm_tikee_shot)
+    # Written again with another file size
+    service.create_with_pairing_check(build_new_shot("right", 1, 2500, 12))
+    service.create(build_new_shot("left", 2, 3000, 5))
+    service.create(build_new_shot("left", 2, 3500, 5))
+    service.create_many([build_new_shot("left", 3, 100, 20), build_new_shot("left", 2, 4000, 5)])
+
+    summary = service.get_sequence_summary(camera_uuid, "12345678")
+    assert summary.shot_count == 4
+    assert summary.total_file_size == 1000 + 2500 + 4000 + 100
+    assert summary.first_shooting_date == datetime(2024, 1, 5, 12, 0)
+    assert summary.last_shooting_date == datetime(2024, 1, 20, 12, 0)
+    assert summary.completed_pairs == 1
+
+    assert len(service.get_tikee_shot_of_sequence(camera_uuid, "12345678")) == 4
+    assert len(service.get_tikee_shot_of_camera_by_id(camera_uuid)) == 4
+    scanned = []
+    service.scan_tikee_shots(scanned.append, total_segments=2)
+    assert len(scanned) == 4
+
+@mock_aws
+def test_sequence_summary_is_written_with_the_shot(tikee_shot_table, monkeypatch):
+    """Test that a shot written by create_with_pairing_check is counted even if the request fails afterwards and is retried"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+    new_shot = NewTikeeShot(
+        s3_key="12345678-1234-5678-1234-567812345678/12345678/left/my_photo1.jpg",
+        resolution="1920x1080",
+        file_size=1024,
+        shooting_date=datetime(2024, 1, 1, 12, 0)
+    )
+
+    update_item = service.client.update_item
+    def failing_update_item(**kwargs):
+        raise RuntimeError("Connection reset")
+    monkeypatch.setattr(service.client, "update_item", failing_update_item)
+    with pytest.raises(RuntimeError):
+        service.create_with_pairing_check(new_shot)
+    monkeypatch.setattr(service.client, "update_item", update_item)
+    service.create_with_pairing_check(new_shot)
+
+    summary = service.get_sequence_summary(new_shot.camera_id, "12345678", consistent=True)
+    assert summary.shot_count == 1
+    assert summary.total_file_size == 1024
+    assert summary.first_shooting_date == summary.last_shooting_date == datetime(2024, 1, 1, 12, 0)
+
+@mock_aws
+def test_iter_tikee_shots_between(tikee_shot_table):
+    """Test that only the shots of the time window are read, in shooting date order, and resumed from a cursor"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+
+    camera_uuid = UUID('12345678-1234-5678-1234-567812345678')
+    service.create_many([
+        NewTikeeShot(
+            s3_key=f"{str(camera_uuid)}/12345678/left/my_photo{photo_index}.jpg",
+            resolution="1920x1080",
+            file_size=1024,
+            shooting_date=datetime(2024, 1, 1, 9, 0) + timedelta(minutes=15 * (12 - photo_index))
+        )
+        for photo_index in range(1, 13)
+    ])
+    # Summaries and pair records are not in the index
+    service.register_side(service.get_tikee_shot(camera_uuid, "12345678", 1, TikeeShotSide.LEFT))
+
+    start, end = datetime(2024, 1, 1, 10, 0), datetime(2024, 1, 1, 11, 0)
+    shots = service.get_tikee_shots_between(camera_uuid, "12345678", start, end)
+    assert [shot.photo_index for shot in shots] == [8, 7, 6, 5, 4]
+    assert all(start <= shot.shooting_date <= end for shot in shots)
+
+    iterator = service.iter_tikee_shots_between(camera_uuid, "12345678", start, end, page_size=2)
+    first_shots = [shot for _, shot in zip(range(3), iterator)]
+    resumed = service.iter_tikee_shots_between(
+        camera_uuid, "12345678", start, end, page_size=2, cursor=iterator.cursor, fields=["photo_index"]
+    )
+    assert [shot.photo_index for shot in first_shots + list(resumed)] == [8, 7, 6, 5, 4]
+    assert service.get_tikee_shots_between(camera_uuid, "87654321", start, end) == []
+
+@mock_aws
+def test_get_tikee_shots_in_index_range(tikee_shot_table):
+    """Test that a photo index range is read in numeric order, with both sides of each photo"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+
+    camera_uuid = UUID('12345678-1234-5678-1234-567812345678')
+    service.create_many([
+        NewTikeeShot(
+            s3_key=f"{str(camera_uuid)}/12345678/{side}/my_photo{photo_index}.jpg",
+            resolution="1920x1080",
+            file_size=1024,
+            shooting_date=datetime(2024, 1, 1, 12, 0)
+        )
+        for photo_index in range(1, 25)
+        for side in ("left", "right")
+    ] + [NewTikeeShot(
+        s3_key=f"{str(camera_uuid)}/12345678/left/my_photo.jpg",
+        resolution="1920x1080",
+        file_size=1024,
+        shooting_date=datetime(2024, 1, 1, 12, 0)
+    )])
+
+    shots = service.get_tikee_shots_in_index_range(camera_uuid, "12345678", 8, 12)
+    assert [(shot.photo_index, shot.side) for shot in shots] == [
+        (photo_index, side) for photo_index in range(8, 12) for side in (TikeeShotSide.LEFT, TikeeShotSide.RIGHT)
+    ]
+    assert [shot.photo_index for shot in service.get_tikee_shots_in_index_range(camera_uuid, "12345678", 0, 2)] == [1, 1]
+    assert [shot.photo_index for shot in service.get_tikee_shot_of_photo_index(camera_uuid, "12345678", None)] == [None]
+    assert [shot.photo_index for shot in service.get_tikee_shot_of_photo_index(camera_uuid, "12345678", 2)] == [2, 2]
+    with pytest.raises(ValueError, match="Invalid photo index range"):
+        service.get_tikee_shots_in_index_range(camera_uuid, "12345678", 12, 8)
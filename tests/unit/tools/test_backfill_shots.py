@@ -0,0 +1,123 @@
+"""Unit tests for the bulk backfill of historical shots"""
+import csv
+import json
+from uuid import UUID
+
+import pytest
+from moto import mock_aws
+
+from src.model.base.base_modelling import TikeeShotSide
+from src.services.tikee_shot_service import TikeeShotServices
+from src.tools.backfill_shots import BackfillCheckpoint, backfill, read_manifest, validate_rows
+
+CAMERA_ID = UUID("12345678-1234-5678-1234-567812345678")
+
+def build_bodies(photos):
+    """Build the bodies of the left and right sides of photos, then two invalid ones"""
+    bodies = [
+        {
+            "s3_key": f"{CAMERA_ID}/12345678/{side}/my_photo{photo_index}.jpg",
+            "resolution": "1920x1080",
+            "file_size": 1000 + photo_index,
+            "shooting_date": f"2024-01-01T12:{photo_index % 60:02d}:00",
+        }
+        for photo_index in range(1, photos + 1)
+        for side in ("left", "right")
+    ]
+    bodies.append({"s3_key": "not-a-camera/12345678/left/my_photo1.jpg", "resolution": "1920x1080", "file_size": 1, "shooting_date": "2024-01-01T12:00:00"})
+    bodies.append({"s3_key": f"{CAMERA_ID}/12345678/left/my_photo1.jpg", "resolution": "1920x1080", "file_size": -1, "shooting_date": "2024-01-01T12:00:00"})
+    return bodies
+
+def test_read_manifest(tmp_path):
+    """Test that JSONL and CSV manifests give the same bodies, CSV extra columns being metadata"""
+    jsonl_path = tmp_path / "manifest.jsonl"
+    jsonl_path.write_text(json.dumps({"s3_key": "a", "file_size": 1}) + "\n\n" + json.dumps({"s3_key": "b"}) + "\n")
+    csv_path = tmp_path / "manifest.csv"
+    with csv_path.open("w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["s3_key", "resolution", "file_size", "shooting_date", "GPSLatitude", "Make"])
+        writer.writerow(["a", "1920x1080", "1024", "2024-01-01T12:00:00", "48.858370", ""])
+
+    assert list(read_manifest(jsonl_path)) == [
+        (1, json.dumps({"s3_key": "a", "file_size": 1}) + "\n"), (3, json.dumps({"s3_key": "b"}) + "\n")
+    ]
+    assert list(read_manifest(csv_path)) == [(2, {
+        "s3_key": "a",
+        "resolution": "1920x1080",
+        "file_size": "1024",
+        "shooting_date": "2024-01-01T12:00:00",
+        "metadata": {"GPSLatitude": "48.858370"},
+    })]
+    with pytest.raises(ValueError, match="Cannot tell the format"):
+        list(read_manifest(tmp_path / "manifest.txt"))
+
+def test_validate_rows():
+    """Test that malformed lines and sides of another resolution than their opposite one are reported"""
+    left, right, other_right, stitched, other_stitched = (
+        {
+            "s3_key": f"{CAMERA_ID}/12345678/{side}/my_photo1.jpg",
+            "resolution": resolution,
+            "file_size": 1024,
+            "shooting_date": "2024-01-01T12:00:00",
+        }
+        for side, resolution in (
+            ("left", "1920x1080"), ("right", "1920x1080"), ("right", "1280x720"),
+            ("stitched", "3840x1080"), ("stitched", "1920x1080"),
+        )
+    )
+    rows = [
+        (1, json.dumps(left)),
+        (2, '{"s3_key": '),
+        (3, "[1, 2]"),
+        (4, json.dumps(other_right)),
+        (5, right),
+        (6, json.dumps(stitched)),
+        (7, json.dumps(other_stitched)),
+    ]
+
+    shots, errors = validate_rows(rows)
+
+    assert [line_number for line_number, _ in shots] == [1, 5, 6, 7]
+    assert [line_number for line_number, _ in errors] == [2, 3, 4]
+    assert "Resolution mismatch" in errors[2][1]
+
+@mock_aws
+def test_backfill(tikee_shot_table, atomic_dynamodb, tmp_path):
+    """Test that valid rows are written in chunks, pairs registered and invalid rows reported"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+    rows = list(enumerate(build_bodies(30), start=1))
+    checkpoints = []
+    errors = []
+
+    checkpoint = backfill(
+        rows, service, BackfillCheckpoint(manifest="manifest.jsonl"), processes=2, chunk_rows=16,
+        on_checkpoint=lambda progress: checkpoints.append(progress.rows), on_error=lambda *error: errors.append(error),
+    )
+
+    assert (checkpoint.rows, checkpoint.written, checkpoint.invalid, checkpoint.failed) == (62, 60, 2, 0)
+    assert checkpoints == [16, 32, 48, 62]
+    assert [line_number for line_number, _ in errors] == [61, 62]
+    assert len(service.get_tikee_shot_of_sequence(CAMERA_ID, "12345678")) == 60
+    summary = service.get_sequence_summary(CAMERA_ID, "12345678")
+    assert (summary.shot_count, summary.completed_pairs) == (60, 30)
+    assert service.get_tikee_shot(CAMERA_ID, "12345678", 30, TikeeShotSide.RIGHT).file_size == 1030
+
+@mock_aws
+def test_backfill_resumes_from_checkpoint(tikee_shot_table, atomic_dynamodb):
+    """Test that the rows handled by the checkpoint are skipped, and that a dry run writes nothing"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+    rows = list(enumerate(build_bodies(10), start=1))
+
+    dry_run = backfill(rows, None, BackfillCheckpoint(manifest="manifest.jsonl"), processes=1, chunk_rows=8)
+    assert (dry_run.rows, dry_run.written, dry_run.invalid) == (22, 0, 2)
+    assert service.get_tikee_shot_of_sequence(CAMERA_ID, "12345678") == []
+
+    checkpoint = backfill(
+        rows, service, BackfillCheckpoint(manifest="manifest.jsonl", rows=8, written=8), processes=1, chunk_rows=8
+    )
+    assert (checkpoint.rows, checkpoint.written, checkpoint.invalid) == (22, 20, 2)
+    assert [shot.photo_index for shot in service.get_tikee_shot_of_sequence(CAMERA_ID, "12345678")] == [
+        photo_index for photo_index in range(5, 11) for _ in range(2)
+    ]
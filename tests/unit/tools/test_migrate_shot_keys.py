@@ -0,0 +1,127 @@
+"""Unit tests for the migration of the former SKs"""
+import boto3
+from moto import mock_aws
+from datetime import datetime, timezone
+from uuid import UUID
+
+import src.constants.constants as constants
+from src.model.base.base_modelling import TikeeShotSide
+from src.model.business.business_modelling import NewTikeeShot
+from src.model.orm.dynamodb_codec import ORM_TIKEE_SHOT_CODEC
+from src.services.parallel_scan import ScanCheckpoint
+from src.services.tikee_shot_service import TikeeShotServices
+from src.tools.migrate_shot_keys import migrate_keys, migrated_key
+
+CAMERA_ID = "12345678-1234-5678-1234-567812345678"
+PK = f"{CAMERA_ID}#12345678"
+
+def put_legacy_shot(client, photo_index, side, file_size=1024):
+    """Write a shot with the SK of former versions"""
+    photo_name = f"my_photo{'' if photo_index is None else photo_index}.jpg"
+    orm_shot = NewTikeeShot(
+        s3_key=f"{CAMERA_ID}/12345678/{side}/{photo_name}",
+        resolution="1920x1080",
+        file_size=file_size,
+        shooting_date=datetime(2024, 1, 1, 12, 0)
+    ).to_orm()
+    item = ORM_TIKEE_SHOT_CODEC.encode(orm_shot)
+    item["SK"] = {"S": f"{photo_index}#{side}"}
+    client.put_item(TableName=constants.DDB_TABLE_NAME, Item=item)
+
+def read_keys(client):
+    items = client.scan(TableName=constants.DDB_TABLE_NAME)["Items"]
+    return {(item["PK"]["S"], item["SK"]["S"]): item for item in items}
+
+def test_migrated_key():
+    """Test the new key of shots, and that up to date items, pair records and summaries are left as is"""
+    assert migrated_key({"PK": {"S": PK}, "SK": {"S": "10#left"}, "photo_index": {"N": "10"}, "side": {"S": "left"}}) == (PK, "0000000010#left")
+    assert migrated_key({"PK": {"S": PK}, "SK": {"S": "None#left"}, "side": {"S": "left"}}) == (PK, "#left")
+    assert migrated_key({"PK": {"S": PK}, "SK": {"S": "#left"}, "side": {"S": "left"}}) is None
+    assert migrated_key({"PK": {"S": f"PAIR#{PK}"}, "SK": {"S": "0000000010#"}}) is None
+    assert migrated_key({"PK": {"S": f"SUMMARY#{PK}"}, "SK": {"S": "SUMMARY"}}) is None
+
+@mock_aws
+def test_migrate_keys(tikee_shot_table):
+    """Test that shots are moved to their new key, the ones written since being kept"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+    client = boto3.client("dynamodb", constants.AWS_REGION)
+
+    for photo_index in range(1, 31):
+        put_legacy_shot(client, photo_index, "left")
+    put_legacy_shot(client, None, "right")
+    put_legacy_shot(client, 2, "right", file_size=1)
+    # Written by the new code before the migration
+    service.create(NewTikeeShot(
+        s3_key=f"{CAMERA_ID}/12345678/right/my_photo2.jpg",
+        resolution="1920x1080",
+        file_size=2048,
+        shooting_date=datetime(2024, 1, 1, 12, 0)
+    ))
+
+    dry_run = migrate_keys(service, total_segments=3, dry_run=True)
+    assert dry_run["to_migrate"] == 32
+    assert len(read_keys(client)) == 34
+
+    checkpoints = []
+    counts = migrate_keys(service, total_segments=3, page_size=7, on_checkpoint=checkpoints.append)
+    assert counts["migrated"] == 32
+    assert counts["failed"] == 0
+    assert checkpoints[-1].is_complete()
+
+    keys = read_keys(client)
+    assert sorted(sk for pk, sk in keys if pk == PK) == ["#right"] + [
+        sk for photo_index in range(1, 31)
+        for sk in [f"{photo_index:010d}#left"] + ([f"{photo_index:010d}#right"] if photo_index == 2 else [])
+    ]
+    assert service.get_tikee_shot(CAMERA_ID, "12345678", 2, TikeeShotSide.RIGHT).file_size == 2048
+    assert len(service.get_tikee_shots_in_index_range(CAMERA_ID, "12345678", 1, 11)) == 11
+
+    assert migrate_keys(service, total_segments=3)["migrated"] == 0
+    assert migrate_keys(service, total_segments=3, checkpoint=ScanCheckpoint(total_segments=3, completed_segments={0, 1, 2}))["scanned"] == 0
+
+@mock_aws
+def test_migrate_keys_encodes_legacy_shooting_dates(tikee_shot_table):
+    """Test that the shooting dates serialized by pydantic are written in UTC, for range queries to find them"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+    client = boto3.client("dynamodb", constants.AWS_REGION)
+    for photo_index, shooting_date in [(1, "2024-01-01T11:30:00Z"), (2, "2024-01-01T12:45:00+02:00"), (3, "2024-01-01T12:15:00Z")]:
+        put_legacy_shot(client, photo_index, "left")
+        client.update_item(
+            TableName=constants.DDB_TABLE_NAME,
+            Key={"PK": {"S": PK}, "SK": {"S": f"{photo_index}#left"}},
+            UpdateExpression="SET shooting_date = :shooting_date",
+            ExpressionAttributeValues={":shooting_date": {"S": shooting_date}},
+        )
+
+    assert migrate_keys(service, total_segments=1)["migrated"] == 3
+
+    shots = list(service.iter_tikee_shots_between(
+        UUID(CAMERA_ID), "12345678", datetime(2024, 1, 1, 10, tzinfo=timezone.utc), datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+    ))
+    assert [shot.photo_index for shot in shots] == [2, 1]
+    assert read_keys(client)[(PK, "0000000002#left")]["shooting_date"] == {"S": "2024-01-01T10:45:00+00:00"}
+
+@mock_aws
+def test_migrate_keys_reports_unencodable_keys(tikee_shot_table):
+    """Test that an item whose photo index is too wide for the new SKs is reported and left as is"""
+    table = tikee_shot_table.create_tikee_shot_table()
+    service = TikeeShotServices()
+    client = boto3.client("dynamodb", constants.AWS_REGION)
+    put_legacy_shot(client, 1, "left")
+    put_legacy_shot(client, 2, "left")
+    item = client.get_item(TableName=constants.DDB_TABLE_NAME, Key={"PK": {"S": PK}, "SK": {"S": "2#left"}})["Item"]
+    client.delete_item(TableName=constants.DDB_TABLE_NAME, Key={"PK": {"S": PK}, "SK": {"S": "2#left"}})
+    client.put_item(
+        TableName=constants.DDB_TABLE_NAME,
+        Item=dict(item, SK={"S": "12345678901#left"}, photo_index={"N": "12345678901"}),
+    )
+
+    errors = []
+    counts = migrate_keys(service, total_segments=2, on_error=lambda key, error: errors.append(key))
+
+    assert counts["migrated"] == 1
+    assert counts["failed"] == 1
+    assert errors == [(PK, "12345678901#left")]
+    assert sorted(sk for pk, sk in read_keys(client) if pk == PK) == ["0000000001#left", "12345678901#left"]